@@ -0,0 +1,82 @@
+"""
+Compare the compiled column serializers used by `Table.encode()` with the
+generic `Encoder` on number and date heavy tables.
+
+    python benchmarks/bench_encode.py [rows]
+
+The mixed table has random floats. Formatting them with `repr` costs the
+same in both encoders and limits the speedup. The integer table has only
+integers, dates and times.
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gviz_data_table import Table
+from gviz_data_table.encoder import Encoder, date_cache
+
+
+schema = (
+    {'id':'day', 'type':datetime.date},
+    {'id':'time', 'type':datetime.datetime},
+    {'id':'count', 'type':int},
+    {'id':'mean', 'type':float},
+    {'id':'max', 'type':float},
+)
+
+integer_schema = (
+    {'id':'day', 'type':datetime.date},
+    {'id':'hour', 'type':datetime.time},
+    {'id':'count', 'type':int},
+    {'id':'total', 'type':int},
+    {'id':'max', 'type':int},
+)
+
+
+def table(size, storage='rows'):
+    t = Table(schema, storage=storage)
+    start = datetime.datetime(2012, 1, 1)
+    for i in range(size):
+        when = start + datetime.timedelta(minutes=i)
+        t.append([when.date(), when, i, random.random(), random.random() * 100])
+    return t
+
+
+def integer_table(size, storage='rows'):
+    t = Table(integer_schema, storage=storage)
+    start = datetime.datetime(2012, 1, 1)
+    for i in range(size):
+        when = start + datetime.timedelta(minutes=i)
+        t.append([when.date(), when.time().replace(minute=0), i % 60,
+                  i * 7, random.randint(0, 10000)])
+    return t
+
+
+def timed(func, repeat=3):
+    """Best time of `repeat` runs, each with an empty date cache"""
+    times = []
+    for _ in range(repeat):
+        date_cache.clear()
+        times.append(timeit.timeit(func, number=1))
+    return min(times)
+
+
+def main(size=100000):
+    for name, make in (('mixed', table), ('integer', integer_table)):
+        for storage in ('rows', 'columnar'):
+            t = make(size, storage)
+            assert t.encode() == Encoder().encode(t)
+            generic = timed(lambda: Encoder().encode(t))
+            fast = timed(t.encode)
+            print("{0:>7} {1:>9} {2} rows: Encoder {3:.3f}s, serializers "
+                  "{4:.3f}s, {5:.1f}x".format(name, storage, size, generic,
+                                              fast, generic / fast))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
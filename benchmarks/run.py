@@ -0,0 +1,207 @@
+"""
+Benchmarks for building and encoding tables.
+
+Measures rows per second and peak memory of `Table.append`, `Table.extend`,
+`Table.encode`, `Table.source` and `encoder.encode` on synthetic tables with
+a column for every supported type.
+
+    python benchmarks/run.py --sizes 1000 100000 --output results.json
+    python benchmarks/run.py --baseline results.json
+
+With a baseline the results are compared with it and the exit status is 1 if
+any benchmark is slower, or its peak memory higher, by more than the
+tolerance. `baseline.json` holds results of the default benchmarks; they
+depend on the machine, so save a baseline on the machine comparing with it.
+
+The encoded date cache is cleared before every run, so each run encodes
+its dates and times as a fresh process would.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gviz_data_table import Table, encode
+from gviz_data_table.column import valid_types
+from gviz_data_table.encoder import date_cache
+
+
+SIZES = (1000, 10000, 100000)
+MIXES = ('plain', 'labeled', 'options')
+STORAGES = ('rows', 'columnar', 'dictionary')
+OPERATIONS = ('append', 'extend', 'encode', 'source', 'encoder.encode')
+
+start = datetime.datetime(2012, 1, 1)
+
+samples = {
+    str:lambda i: "value {0}".format(i % 100),
+    int:lambda i: i,
+    float:lambda i: i / 7.0,
+    bool:lambda i: i % 2 == 0,
+    datetime.date:lambda i: (start + datetime.timedelta(days=i % 3650)).date(),
+    datetime.datetime:lambda i: start + datetime.timedelta(seconds=i),
+    datetime.time:lambda i: (start + datetime.timedelta(seconds=i)).time(),
+}
+
+
+def schema():
+    """One column for each distinct supported type"""
+    types = [typ for typ in samples if typ in valid_types]
+    return [{'id':"{0}_{1}".format(valid_types[typ], idx), 'type':typ}
+            for idx, typ in enumerate(types)]
+
+
+def rows(size, mix='plain'):
+    """
+    Synthetic rows. Labeled and options mixes give every tenth cell a label
+    or options.
+    """
+    types = [col['type'] for col in schema()]
+    data = []
+    for i in range(size):
+        row = [samples[typ](i) if i % 11 else None for typ in types]
+        if mix != 'plain' and i % 10 == 0:
+            if mix == 'labeled':
+                row[0] = (row[0], "label {0}".format(i))
+            else:
+                row[0] = (row[0], None, {'style':'color: red'})
+        data.append(row)
+    return data
+
+
+def table(data, storage):
+    t = Table(schema(), storage=storage)
+    t.extend(data)
+    return t
+
+
+def operations(data, storage):
+    """Functions to benchmark and the setup they need"""
+    def append():
+        t = Table(schema(), storage=storage)
+        for row in data:
+            t.append(row)
+
+    def extend():
+        Table(schema(), storage=storage).extend(data)
+
+    t = table(data, storage)
+    return {
+        'append':append,
+        'extend':extend,
+        'encode':t.encode,
+        'source':t.source,
+        'encoder.encode':lambda: encode(t),
+    }
+
+
+def measure(func, repeat=3):
+    """Best time of `repeat` runs and peak memory of one run"""
+    best = None
+    for _ in range(repeat):
+        date_cache.clear()
+        gc.collect()
+        before = time.time()
+        func()
+        elapsed = time.time() - before
+        best = elapsed if best is None else min(best, elapsed)
+    date_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes=SIZES, mixes=MIXES, storages=STORAGES, names=OPERATIONS,
+        repeat=3):
+    results = []
+    for size in sizes:
+        for mix in mixes:
+            data = rows(size, mix)
+            for storage in storages:
+                ops = operations(data, storage)
+                for name in names:
+                    elapsed, peak = measure(ops[name], repeat)
+                    result = {'operation':name, 'rows':size, 'mix':mix,
+                              'storage':storage, 'seconds':elapsed,
+                              'rows_per_sec':size / max(elapsed, 1e-9),
+                              'peak_bytes':peak}
+                    print("{operation:>15} {rows:>8} {mix:>8} {storage:>9} "
+                          "{rows_per_sec:>12.0f} rows/s {peak_bytes:>12} "
+                          "bytes".format(**result))
+                    results.append(result)
+    return results
+
+
+def key(result):
+    return (result['operation'], result['rows'], result['mix'],
+            result['storage'])
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    (result, measure, ratio to the baseline) of benchmarks whose rows per
+    second are more than `tolerance` below the baseline or whose peak
+    memory is more than `tolerance` above it
+    """
+    previous = dict((key(result), result) for result in baseline)
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        ratio = result['rows_per_sec'] / old['rows_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append((result, 'rows_per_sec', ratio))
+        if old['peak_bytes']:
+            ratio = float(result['peak_bytes']) / old['peak_bytes']
+            if ratio > 1 + tolerance:
+                regressions.append((result, 'peak_bytes', ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help="table sizes, up to 5000000 rows")
+    parser.add_argument('--mixes', nargs='+', default=MIXES, choices=MIXES)
+    parser.add_argument('--storages', nargs='+', default=STORAGES,
+                        choices=STORAGES)
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS,
+                        choices=OPERATIONS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="compare with saved results")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown or memory growth compared "
+                             "with the baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.mixes, args.storages, args.operations,
+                  args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'python':sys.version.split()[0], 'results':results},
+                      f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for result, field, ratio in regressions:
+            print("REGRESSION {0}: {1} {2:.0%} of baseline".format(
+                " ".join(str(part) for part in key(result)), field, ratio))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
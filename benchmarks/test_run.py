@@ -0,0 +1,70 @@
+import datetime
+import json
+import os
+
+import run
+from gviz_data_table.encoder import date_cache
+
+
+def result(**kwargs):
+    base = {'operation':'encode', 'rows':10, 'mix':'plain', 'storage':'rows',
+            'seconds':0.1, 'rows_per_sec':100.0, 'peak_bytes':1000}
+    base.update(kwargs)
+    return base
+
+
+def test_run():
+    results = run.run(sizes=[20], mixes=['options'],
+                      storages=['rows', 'columnar'], names=['extend', 'encode'],
+                      repeat=1)
+    assert [run.key(r) for r in results] == [
+        ('extend', 20, 'options', 'rows'), ('encode', 20, 'options', 'rows'),
+        ('extend', 20, 'options', 'columnar'),
+        ('encode', 20, 'options', 'columnar')]
+    assert all(r['rows_per_sec'] > 0 and r['peak_bytes'] > 0 for r in results)
+
+
+def test_measure_cold_date_cache():
+    sizes = []
+
+    def func():
+        sizes.append(date_cache.info().size)
+        date_cache.get(datetime.date(2012, 1, 1))
+    run.measure(func, repeat=3)
+    assert sizes == [0, 0, 0, 0]
+
+
+def test_compare():
+    baseline = [result()]
+    assert run.compare([result(rows_per_sec=90.0, peak_bytes=1100)],
+                       baseline) == []
+    slow = result(rows_per_sec=70.0)
+    assert run.compare([slow], baseline) == [(slow, 'rows_per_sec', 0.7)]
+    large = result(peak_bytes=1300)
+    assert run.compare([large], baseline) == [(large, 'peak_bytes', 1.3)]
+    assert run.compare([result(rows=20, rows_per_sec=1.0)], baseline) == []
+
+
+def test_main(tmpdir):
+    output = str(tmpdir.join('results.json'))
+    args = ['--sizes', '10', '--mixes', 'plain', '--storages', 'rows',
+            '--operations', 'extend', '--repeat', '1']
+    assert run.main(args + ['--output', output]) == 0
+    with open(output) as f:
+        saved = json.load(f)
+    assert [run.key(r) for r in saved['results']] == [
+        ('extend', 10, 'plain', 'rows')]
+    saved['results'][0]['rows_per_sec'] *= 1000
+    with open(output, 'w') as f:
+        json.dump(saved, f)
+    assert run.main(args + ['--baseline', output]) == 1
+
+
+def test_baseline():
+    path = os.path.join(os.path.dirname(os.path.abspath(run.__file__)),
+                        'baseline.json')
+    with open(path) as f:
+        results = json.load(f)['results']
+    assert len(set(run.key(r) for r in results)) == len(results) == (
+        len(run.SIZES) * len(run.MIXES) * len(run.STORAGES) *
+        len(run.OPERATIONS))
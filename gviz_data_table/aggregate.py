@@ -0,0 +1,215 @@
+"""
+Grouping and aggregation of tables.
+
+Rows are read once and each group keeps a running state for each of its
+aggregates, so memory depends on the number of groups and not the number
+of rows. Missing values are ignored by aggregates.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+import copy
+
+from .column import basestring, long, valid_types
+from .writers import formatters
+
+
+numbers = (int, long, float)
+
+
+def _count(state, value):
+    return state + 1
+
+
+def _sum(state, value):
+    return value if state is None else state + value
+
+
+def _avg(state, value):
+    return (state[0] + value, state[1] + 1)
+
+
+def _min(state, value):
+    return value if state is None or value < state else state
+
+
+def _max(state, value):
+    return value if state is None or value > state else state
+
+
+def _mean(state):
+    return float(state[0]) / state[1] if state[1] else None
+
+
+def _same(state):
+    return state
+
+
+# function: (initial state, update, result)
+aggregators = {
+    'count':(0, _count, _same),
+    'sum':(None, _sum, _same),
+    'avg':((0, 0), _avg, _mean),
+    'min':(None, _min, _same),
+    'max':(None, _max, _same),
+}
+
+
+def result_type(function, typ):
+    """
+    The column type of an aggregate of a column. Sums and averages are only
+    defined for numbers.
+    """
+    if function not in aggregators:
+        raise ValueError("{0} aggregate not supported".format(function))
+    if function == 'count':
+        return int
+    if function in ('sum', 'avg') and typ not in numbers:
+        raise ValueError("{0} requires a number column".format(function))
+    if function == 'avg':
+        return float
+    return typ
+
+
+def aggregation_pairs(aggregations):
+    """
+    (column id, function) pairs from a sequence of pairs or a dictionary of
+    column ids and functions or lists of functions
+    """
+    if not isinstance(aggregations, dict):
+        return [tuple(pair) for pair in aggregations]
+    pairs = []
+    for key, functions in aggregations.items():
+        if not isinstance(functions, (list, tuple)):
+            functions = [functions]
+        pairs.extend((key, function) for function in functions)
+    return pairs
+
+
+def aggregate_id(function, key):
+    return "{0}-{1}".format(function, key)
+
+
+class Groups(object):
+    """
+    Running aggregates of groups of rows. `keys` and `sources` are the
+    positions in rows of the key columns and the aggregated columns.
+    """
+
+    def __init__(self, keys, sources, functions):
+        self.keys = keys
+        self.sources = list(zip(range(len(sources)), sources,
+                                [aggregators[f][1] for f in functions]))
+        self.initial = [aggregators[f][0] for f in functions]
+        self.results = [aggregators[f][2] for f in functions]
+        self.groups = OrderedDict()
+
+    def add(self, values):
+        """Add a row of values to its group"""
+        key = tuple([values[idx] for idx in self.keys])
+        state = self.groups.get(key)
+        if state is None:
+            state = self.groups[key] = list(self.initial)
+        for pos, idx, update in self.sources:
+            value = values[idx]
+            if value is not None:
+                state[pos] = update(state[pos], value)
+
+    def empty(self):
+        """Results of aggregates of no rows"""
+        return [f(s) for f, s in zip(self.results, self.initial)]
+
+    def items(self):
+        """Keys of the groups in the order they were seen and their results"""
+        results = self.results
+        for key, state in self.groups.items():
+            yield key, [f(s) for f, s in zip(results, state)]
+
+
+def group_by(table, keys, aggregations):
+    """
+    Group the rows of a table by the values of the `keys` columns and
+    aggregate the other columns of each group. Aggregations are pairs of a
+    column id and one of count, sum, avg, min or max, or a dictionary of
+    column ids and functions. Groups are in the order they are first seen.
+
+    The result is a new table with the key columns followed by a column for
+    each aggregate, with ids such as ``sum-salary``.
+    """
+    from .table import Table, column_dict
+    if isinstance(keys, basestring):
+        keys = [keys]
+    ids = list(table.schema)
+    pairs = aggregation_pairs(aggregations)
+    for key in list(keys) + [key for key, function in pairs]:
+        if key not in table.schema:
+            raise ValueError("Unknown column '{0}'".format(key))
+    schema = []
+    for key in keys:
+        schema.append(column_dict(table.schema[key]))
+    for key, function in pairs:
+        col = table.schema[key]
+        schema.append(dict(id=aggregate_id(function, key),
+                           type=result_type(function, col.type),
+                           label="{0} {1}".format(function, col.label)))
+
+    groups = Groups([ids.index(key) for key in keys],
+                    [ids.index(key) for key, function in pairs],
+                    [function for key, function in pairs])
+    for values, extras in table._records():
+        groups.add(values)
+    rows = [list(key) + results for key, results in groups.items()]
+    if not keys and not rows:
+        rows.append(groups.empty())
+    result = Table(schema, copy.deepcopy(table.options), storage=table.storage)
+    result.extend(rows)
+    return result
+
+
+def pivot(table, index, columns, values, agg='sum'):
+    """
+    Spread the values of a table over new columns, one for each distinct
+    value of the `columns` column, aggregated with `agg` for each distinct
+    value of the `index` columns. Missing combinations are None.
+
+    The ids and labels of the new columns are the distinct values, formatted
+    as text, in the order they are first seen.
+    """
+    from .table import Table, column_dict
+    if isinstance(index, basestring):
+        index = [index]
+    ids = list(table.schema)
+    for key in list(index) + [columns, values]:
+        if key not in table.schema:
+            raise ValueError("Unknown column '{0}'".format(key))
+    typ = result_type(agg, table.schema[values].type)
+    keys = [ids.index(key) for key in index]
+    position = len(keys)
+
+    groups = Groups(keys + [ids.index(columns)], [ids.index(values)], [agg])
+    for row, extras in table._records():
+        groups.add(row)
+    rows = OrderedDict()
+    series = OrderedDict()
+    for key, (result, ) in groups.items():
+        series[key[position]] = None
+        rows.setdefault(key[:position], {})[key[position]] = result
+
+    schema = []
+    for key in index:
+        schema.append(column_dict(table.schema[key]))
+    text = formatters[valid_types[table.schema[columns].type]]
+    names = set(index)
+    for value in series:
+        name = u"" if value is None else text(value)
+        if name in names:
+            raise ValueError("Duplicate column ids '{0}'".format(name))
+        names.add(name)
+        schema.append(dict(id=name, type=typ))
+
+    result = Table(schema, copy.deepcopy(table.options), storage=table.storage)
+    result.extend([list(key) + [cells.get(value) for value in series]
+                   for key, cells in rows.items()])
+    return result
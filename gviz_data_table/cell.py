@@ -9,14 +9,29 @@ class Cell(object):
     {'value':'v, 'label':'f', 'options':'p'}
     """
 
-    __slots__ = ['type', '_value', 'label', '_options']
+    __slots__ = ['type', '_value', '_label', '_options', '_owner']
 
     def __init__(self, typ, value, label=None, options=None):
+        self._owner = None
         self.type = typ
         self.label = label
         self.value = value
         self.options = options
 
+    @classmethod
+    def trusted(cls, typ, value, label=None, options=None, owner=None):
+        """
+        Create a cell from a value and options that have already been
+        validated
+        """
+        cell = cls.__new__(cls)
+        cell._owner = owner
+        cell.type = typ
+        cell._label = label
+        cell._value = value
+        cell._options = options
+        return cell
+
     @property
     def value(self):
         return self._value
@@ -25,6 +40,21 @@ class Cell(object):
     def value(self, value):
         self.validate(value)
         self._value = value
+        self._changed()
+
+    @property
+    def label(self):
+        return self._label
+
+    @label.setter
+    def label(self, value):
+        self._label = value
+        self._changed()
+
+    def _changed(self):
+        """Tell the owner of the cell, usually a table, about changes"""
+        if self._owner is not None:
+            self._owner._changed()
 
     def validate(self, value):
         """
@@ -46,6 +76,7 @@ class Cell(object):
         if value is not None and not isinstance(value, dict):
             raise ValueError("Options must be a dictionary")
         self._options = value
+        self._changed()
 
     def __iter__(self):
         """Dictionary interface for JSON encoding"""
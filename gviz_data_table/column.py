@@ -1,7 +1,8 @@
 import datetime
 
 try:
-    a = basestring
+    basestring = basestring
+    unicode = unicode
 except NameError:
     basestring = str
     unicode = str
@@ -11,6 +12,8 @@ try:
 except NameError:
     long = int
 
+NoneType = type(None)
+
 valid_types = {str:'string', unicode:'string', int:'number', float:'number',
                bool:'boolean', datetime.date:'date', datetime.datetime:'datetime',
                datetime.time:'timeofday', long:'number'}
@@ -37,6 +40,31 @@ class Column(object):
             raise ValueError("{0} Type not supported".format(value))
         self._type = value
 
+    def validator(self):
+        """
+        A function checking that a value conforms to the column type or is
+        None, with the type looked up once
+        """
+        typ = self.type
+
+        def validate(value):
+            if value is not None and not isinstance(value, typ):
+                raise ValueError(
+                    "{0} expected, {1} received".format(typ, type(value))
+                )
+        return validate
+
+    def invalid(self, values):
+        """
+        Positions of the values in a sequence that do not conform to the
+        column type
+        """
+        typ = self.type
+        if all(t is NoneType or issubclass(t, typ) for t in set(map(type, values))):
+            return []
+        return [idx for idx, value in enumerate(values)
+                if value is not None and not isinstance(value, typ)]
+
     @property
     def id(self):
         return self._id
@@ -74,3 +102,8 @@ class Column(object):
                 if key == 'type':
                     value = valid_types[value]
                 yield key, value
+
+
+def compile_validators(schema):
+    """One validator per column from a table schema"""
+    return [col.validator() for col in schema.values()]
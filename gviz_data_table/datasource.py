@@ -0,0 +1,71 @@
+"""
+Chart Tools data source protocol.
+
+Requests from the Visualization API carry a `tqx` parameter of semicolon
+separated key:value pairs, e.g. ``reqId:1;sig:5b2f...;out:json``.
+
+https://developers.google.com/chart/interactive/docs/dev/implementing_data_source
+"""
+import hashlib
+import re
+
+
+HANDLER = "google.visualization.Query.setResponse"
+
+handler_re = re.compile(r"^[A-Za-z_$][\w$]*(\.[A-Za-z_$][\w$]*)*$")
+
+outputs = ('json', 'csv', 'tsv-excel', 'html')
+
+
+def parse_tqx(tqx):
+    """
+    Parse a tqx parameter into a dictionary. Dictionaries are checked and
+    copied.
+    """
+    if tqx is None:
+        return {}
+    if isinstance(tqx, dict):
+        params = dict(tqx)
+    else:
+        params = {}
+        for part in tqx.split(";"):
+            if not part.strip():
+                continue
+            key, sep, value = part.partition(":")
+            if not sep:
+                raise ValueError("Invalid tqx parameter '{0}'".format(part))
+            params[key.strip()] = value.strip()
+    if not handler_re.match(params.get('responseHandler', HANDLER)):
+        raise ValueError("Invalid response handler '{0}'".format(
+            params['responseHandler']))
+    if params.get('out', 'json') not in outputs:
+        raise ValueError("{0} output not supported".format(params['out']))
+    return params
+
+
+def signature(chunks):
+    """Signature of encoded chunks"""
+    digest = hashlib.md5()
+    for chunk in chunks:
+        digest.update(chunk.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def signed(chunks, done):
+    """
+    Pass encoded chunks through and call `done` with their signature after
+    the last one
+    """
+    digest = hashlib.md5()
+    for chunk in chunks:
+        digest.update(chunk.encode('utf-8'))
+        yield chunk
+    done(digest.hexdigest())
+
+
+def not_modified(params, version):
+    """Response when the client already has the data"""
+    return {'status':"error", 'reqId':params.get('reqId', 0),
+            'version':version,
+            'errors':[{'reason':"not_modified",
+                       'message':"Data not modified"}]}
@@ -0,0 +1,142 @@
+"""
+Tables from DB-API cursors.
+
+Rows are fetched in batches with `fetchmany` and added to a table or encoded
+directly. Drivers such as sqlite3 do not report column types, so these are
+inferred from the first batch of rows unless they are given. Batches are
+read ahead until every inferred column has a value, so columns which are
+missing in the first rows do not become string columns.
+"""
+import datetime
+import itertools
+
+from .column import long, unicode, valid_types
+from .encoder import _iterencode, iterrows
+
+
+# subclasses must come before their bases
+inferable = (bool, datetime.datetime, datetime.date, datetime.time, float,
+             int, long, unicode, str)
+
+
+def infer_type(values):
+    """
+    The column type for a sequence of values. Columns with both integers and
+    floats are floats. Columns with no values are strings.
+    """
+    types = set(type(value) for value in values if value is not None)
+    if not types:
+        return str
+    if types <= set([int, long, float]) and float in types:
+        return float
+    for typ in inferable:
+        if all(issubclass(t, typ) for t in types):
+            return typ
+    raise ValueError("Cannot infer a column type for {0}".format(
+        ", ".join(sorted(t.__name__ for t in types))))
+
+
+def _given(names, types):
+    """Column types given as a sequence or a dictionary by column name"""
+    if types is None:
+        return {}
+    if not isinstance(types, dict):
+        return dict(zip(names, types))
+    return types
+
+
+def _inferred(description, types):
+    """Positions of the columns whose types are inferred from their values"""
+    types = _given([col[0] for col in description], types)
+    return [idx for idx, col in enumerate(description)
+            if types.get(col[0]) is None and col[1] not in valid_types]
+
+
+def cursor_schema(description, rows, types=None):
+    """
+    A table schema from a cursor description and a sample of rows
+    """
+    names = [col[0] for col in description]
+    types = _given(names, types)
+    schema = []
+    for idx, name in enumerate(names):
+        typ = types.get(name)
+        if typ is None and description[idx][1] in valid_types:
+            typ = description[idx][1]
+        if typ is None:
+            typ = infer_type(row[idx] for row in rows)
+        schema.append({'id':name, 'type':typ})
+    return schema
+
+
+def _coerce(schema, rows):
+    """Integers in float columns are converted to floats"""
+    floats = [idx for idx, col in enumerate(schema) if col['type'] is float]
+    if not floats:
+        return rows
+    rows = [list(row) for row in rows]
+    for row in rows:
+        for idx in floats:
+            if type(row[idx]) in (int, long):
+                row[idx] = float(row[idx])
+    return rows
+
+
+def _batches(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def _typed_batches(cursor, batch_size, types):
+    """
+    The schema of the rows of a cursor and an iterator of their batches.
+    Batches are read until every inferred column has a value or there are
+    no more rows, and types are inferred from all of them.
+    """
+    batches = _batches(cursor, batch_size)
+    pending = _inferred(cursor.description, types)
+    sample = []
+    for rows in batches:
+        sample.append(rows)
+        pending = [idx for idx in pending
+                   if all(row[idx] is None for row in rows)]
+        if not pending:
+            break
+    schema = cursor_schema(cursor.description,
+                           [row for rows in sample for row in rows], types)
+    return schema, itertools.chain(sample, batches)
+
+
+def from_cursor(cls, cursor, batch_size=1000, types=None, **kwargs):
+    """
+    Create a table of class `cls` from an executed cursor
+    """
+    schema, batches = _typed_batches(cursor, batch_size, types)
+    table = cls(schema, **kwargs)
+    for rows in batches:
+        table.extend(_coerce(schema, rows))
+    return table
+
+
+def iterencode_cursor(cursor, batch_size=1000, types=None, options=None):
+    """
+    Encode the rows of an executed cursor as a JSON table without keeping
+    them. Each batch of rows is added to a columnar table, encoded and
+    discarded. Columns with no values are read ahead until one is found,
+    so give `types` for columns which may be missing in many rows.
+    """
+    from .table import Table
+    schema, batches = _typed_batches(cursor, batch_size, types)
+    table = Table(schema, options, storage='columnar')
+
+    def encoded():
+        for rows in batches:
+            table.clear()
+            table.extend(_coerce(schema, rows))
+            for chunk in iterrows(table, batch_size):
+                yield chunk
+
+    return _iterencode(table.schema, options, encoded())
@@ -0,0 +1,257 @@
+"""
+Downsampling of series for charts.
+
+Rows are read once, in the order they are encoded, and divided by position
+into buckets of about the same number of rows. Only the x and y values of
+one or two buckets are kept at a time and the chosen rows are read from the
+table at the end. Rows should be ordered by their x values, as they are for
+time series or after sorting the table by the x column.
+"""
+import copy
+import datetime
+
+from .aggregate import numbers
+from .column import basestring, long, valid_types
+
+
+epoch = datetime.datetime(1970, 1, 1)
+
+
+def _date(value):
+    return value.toordinal()
+
+
+def _datetime(value):
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return (value - epoch).total_seconds()
+
+
+converters = {'number':None, 'date':_date, 'datetime':_datetime}
+
+
+def _series(table, x, ys, chunk_rows=1000):
+    """
+    Chunks of the x values, as numbers, and the y values of a table as a
+    list of columns
+    """
+    col = list(table.schema.values())[x]
+    convert = converters[valid_types[col.type]]
+    chunks = table._store.iter_chunks(chunk_rows, 0, table._order())
+    for length, columns, extras in chunks:
+        xs = list(columns[x])
+        if None in xs:
+            raise ValueError("Missing value in column '{0}'".format(col.id))
+        if convert is not None:
+            xs = [convert(value) for value in xs]
+        yield [xs] + [list(columns[y]) for y in ys]
+
+
+def _bounds(start, stop, count):
+    """The first positions of `count` buckets from `start` to `stop`"""
+    span = stop - start
+    return [start + idx * span // count for idx in range(count)]
+
+
+def _buckets(series, starts, size):
+    """
+    (first position, columns) of each bucket of the points of a series.
+    Buckets start at `starts` and the last ends at `size`.
+    """
+    ends = starts[1:] + [size]
+    idx = 0
+    position = 0
+    bucket = None
+    for columns in series:
+        length = len(columns[0])
+        offset = max(starts[0] - position, 0)
+        while offset < length and idx < len(starts):
+            end = min(length, ends[idx] - position)
+            part = [values[offset:end] for values in columns]
+            if bucket is None:
+                bucket = part
+            else:
+                for values, more in zip(bucket, part):
+                    values.extend(more)
+            offset = end
+            if position + end == ends[idx]:
+                yield starts[idx], bucket
+                bucket = None
+                idx += 1
+        position += length
+
+
+def _mean(values):
+    if None in values:
+        values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return float(sum(values)) / len(values)
+
+
+def _average(bucket):
+    """The mean x and y values of a bucket"""
+    return _mean(bucket[0]), [_mean(values) for values in bucket[1:]]
+
+
+def _point(bucket, idx):
+    return bucket[0][idx], [values[idx] for values in bucket[1:]]
+
+
+def _largest(bucket, a, c):
+    """
+    The position in a bucket of the point making the largest triangle with
+    the points `a` and `c`, summed over the y columns
+    """
+    xs = bucket[0]
+    if len(xs) == 1:
+        return 0
+    ax, ays = a
+    cx, cys = c
+    areas = [0.0] * len(xs)
+    for ys, ay, cy in zip(bucket[1:], ays, cys):
+        if ay is None or cy is None:
+            continue
+        dx, dy = ax - cx, cy - ay
+        areas = [area if y is None else
+                 area + abs(dx * (y - ay) - (ax - x) * dy)
+                 for area, x, y in zip(areas, xs, ys)]
+    return areas.index(max(areas))
+
+
+def lttb(series, size, target, ys):
+    """
+    Largest triangle three buckets: the first and last points and the point
+    of each bucket making the largest triangle with the point chosen from
+    the previous bucket and the mean of the next bucket
+    """
+    if target < 3:
+        raise ValueError("lttb needs at least 3 points")
+    starts = [0] + _bounds(1, size - 1, target - 2) + [size - 1]
+    selected = None
+    current = None
+    for start, bucket in _buckets(series, starts, size):
+        if current is not None:
+            idx = 0 if selected is None else _largest(
+                current[1], selected, _average(bucket))
+            selected = _point(current[1], idx)
+            yield current[0] + idx, None
+        current = start, bucket
+    yield current[0], None
+
+
+def _extremes(values):
+    """The positions of the smallest and largest of a list of values"""
+    if None in values:
+        present = [(value, idx) for idx, value in enumerate(values)
+                   if value is not None]
+        if not present:
+            return []
+        return [min(present)[1], max(present)[1]]
+    return [values.index(min(values)), values.index(max(values))]
+
+
+def minmax(series, size, target, ys):
+    """
+    The points with the smallest and largest y values of each bucket, in
+    the order they are read. Each y column gets its own points.
+    """
+    count = target // (2 * len(ys))
+    if count < 1:
+        raise ValueError("minmax needs at least 2 points per y column")
+    for start, bucket in _buckets(series, _bounds(0, size, count), size):
+        chosen = set()
+        for values in bucket[1:]:
+            chosen.update(_extremes(values))
+        for idx in sorted(chosen) or [0]:
+            yield start + idx, None
+
+
+def avg(series, size, target, ys):
+    """
+    A point for each bucket with the mean y values of the bucket and the
+    other values of its middle point
+    """
+    for start, bucket in _buckets(series, _bounds(0, size, target), size):
+        means = _average(bucket)[1]
+        yield start + len(bucket[0]) // 2, dict(zip(ys, means))
+
+
+methods = {'lttb':lttb, 'minmax':minmax, 'avg':avg}
+
+
+def downsample(table, x_col, y_cols, target_points, method='lttb'):
+    """
+    A new table with the same columns and at most `target_points` rows
+    chosen to keep the shape of the `y_cols` series plotted against
+    `x_col`. Methods are lttb (largest triangle three buckets), minmax and
+    avg. Tables with no more rows are copied.
+
+    The x column is a number, date or datetime column without missing
+    values and the y columns are number columns. Averages of integer
+    columns are floats.
+    """
+    from .table import Table, column_dict
+    if method not in methods:
+        raise ValueError("{0} downsampling not supported".format(method))
+    if isinstance(y_cols, basestring):
+        y_cols = [y_cols]
+    y_cols = list(y_cols)
+    if not y_cols:
+        raise ValueError("Downsampling needs at least one y column")
+    for key in [x_col] + y_cols:
+        if key not in table.schema:
+            raise ValueError("Unknown column '{0}'".format(key))
+    if valid_types[table.schema[x_col].type] not in converters:
+        raise ValueError("x column must be a number, date or datetime")
+    for key in y_cols:
+        if table.schema[key].type not in numbers:
+            raise ValueError("y column '{0}' must be a number".format(key))
+    if x_col in y_cols:
+        raise ValueError("x column cannot also be a y column")
+    if target_points < 1:
+        raise ValueError("Downsampling needs at least one point")
+
+    ids = list(table.schema)
+    ys = [ids.index(key) for key in y_cols]
+    size = len(table._store)
+    order = table._order()
+    averaged = method == 'avg' and size > target_points
+    if size > target_points:
+        series = _series(table, ids.index(x_col), ys)
+        chosen = list(methods[method](series, size, target_points, ys))
+        positions = [position for position, means in chosen]
+        if order is not None:
+            positions = [order[position] for position in positions]
+    else:
+        chosen = None
+        positions = order
+
+    schema = []
+    for col in table.schema.values():
+        typ = col.type
+        if averaged and col.id in y_cols and typ in (int, long):
+            typ = float
+        schema.append(column_dict(col, typ))
+    rows = []
+    for length, columns, extras in table._store.iter_chunks(1000, 0,
+                                                            positions):
+        for idx, values in enumerate(zip(*columns)):
+            parts = extras.get(idx)
+            means = chosen and chosen[len(rows)][1]
+            if means:
+                values = [means.get(col, value)
+                          for col, value in enumerate(values)]
+                if parts is not None:
+                    parts = [(None, None) if col in means else part
+                             for col, part in enumerate(parts)]
+            if parts is None:
+                rows.append(list(values))
+            else:
+                rows.append([(value, label, options) for value, (label, options)
+                             in zip(values, parts)])
+    result = Table(schema, copy.deepcopy(table.options), storage=table.storage,
+                   validation=table.validation,
+                   sample_every=table.sample_every)
+    result.extend(rows)
+    return result
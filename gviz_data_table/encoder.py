@@ -1,9 +1,19 @@
 import datetime
+import itertools
 import json
+import threading
+from collections import namedtuple
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
 
 from . import cell
 from . import column
+from . import storage
 from . import table
+from json.encoder import encode_basestring_ascii as encode_string
 
 
 class Encoder(json.JSONEncoder):
@@ -26,17 +36,296 @@ class Encoder(json.JSONEncoder):
             return dict(obj)
         elif isinstance(obj, table.Table):
             return dict(obj)
+        elif isinstance(obj, storage.Row):
+            return obj.copy()
+        elif isinstance(obj, storage.RowsView):
+            return list(obj)
         t = type(obj)
-        if t in self.formats:
-            tt = list(obj.timetuple())
-            tt[1] -= 1
-            return self.formats[t].format(*tt)
-        elif t == datetime.time:
-            return [obj.hour, obj.minute, obj.second]
+        if t in self.formats or t == datetime.time:
+            return date_cache.get(obj)
 
         return json.JSONEncoder.default(self, obj)
 
 
+DateCacheInfo = namedtuple('DateCacheInfo', 'hits misses evictions size maxsize')
+
+
+class DateCache(object):
+    """
+    Bounded least recently used cache of encoded dates, datetimes and times.
+
+    Each type has its own cache of up to `maxsize` values. Setting `maxsize`
+    to 0 disables caching.
+    """
+
+    types = (datetime.date, datetime.datetime, datetime.time)
+    # columns of a type which skip the cache after one of distinct values
+    skip = 15
+
+    def __init__(self, maxsize=4096):
+        self._lock = threading.Lock()
+        self._caches = dict((typ, OrderedDict()) for typ in self.types)
+        self._skips = dict((typ, 0) for typ in self.types)
+        self.hits = self.misses = self.evictions = 0
+        self.maxsize = maxsize
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        if value < 0:
+            raise ValueError("Cache size cannot be negative")
+        with self._lock:
+            self._maxsize = value
+            for cache in self._caches.values():
+                self._trim(cache)
+
+    def _trim(self, cache):
+        while len(cache) > self._maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def convert(value):
+        """Encode a date, datetime or time without the cache"""
+        t = type(value)
+        if t is datetime.date:
+            return "Date(%d, %d, %d)" % (value.year, value.month - 1, value.day)
+        elif t is datetime.datetime:
+            return "Date(%d, %d, %d, %d, %d, %d)" % (
+                value.year, value.month - 1, value.day,
+                value.hour, value.minute, value.second)
+        return [value.hour, value.minute, value.second]
+
+    def get(self, value):
+        """The encoded value of a date, datetime or time"""
+        return self.encode([value], type(value), keep=True)[0]
+
+    def encode(self, values, typ, keep=False):
+        """
+        Encode a column of values. Only values of exactly `typ` are encoded,
+        others are None. Each distinct value is looked up once.
+
+        Values which are not in the cache are only added to it if `keep` is
+        true or they repeat within the column. Columns of distinct values,
+        such as the timestamps of a time series, would only evict values
+        which are used again, and the next `skip` columns of the type are
+        converted without looking them up.
+        """
+        convert = self.convert
+        direct = not keep and self._skips[typ]
+        if direct:
+            self._skips[typ] -= 1
+        elif typ is not datetime.date and any(
+                getattr(value, 'tzinfo', None) is not None for value in values):
+            # aware values of the same instant are equal in any time zone
+            direct = True
+        if direct:
+            return [convert(value) if value.__class__ is typ else None
+                    for value in values]
+        cache = self._caches[typ]
+        encoded = {}
+        missing = []
+        with self._lock:
+            for value in set(values):
+                if value.__class__ is not typ:
+                    continue
+                hit = cache.pop(value, None)
+                if hit is None:
+                    missing.append(value)
+                else:
+                    encoded[value] = cache[value] = hit
+            self.hits += len(encoded)
+            self.misses += len(missing)
+            keep = self._maxsize and (keep or len(missing) * 2 <= len(values))
+            if not keep:
+                self._skips[typ] = self.skip
+            for value in missing:
+                encoded[value] = convert(value)
+                if keep:
+                    cache[value] = encoded[value]
+            if keep:
+                self._trim(cache)
+        return [encoded.get(value) for value in values]
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+            self._skips = dict((typ, 0) for typ in self.types)
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        size = sum(len(cache) for cache in self._caches.values())
+        return DateCacheInfo(self.hits, self.misses, self.evictions, size,
+                             self.maxsize)
+
+
+date_cache = DateCache()
+_default = Encoder()
+
+
 def encode(obj):
+    if isinstance(obj, table.Table):
+        return obj.encode()
     e = Encoder()
     return e.encode(obj)
+
+
+def _generic(value):
+    if value is None:
+        return '{}'
+    return _default.encode({'v':value})
+
+
+def _numbers(values):
+    # NaN and infinity are left to the JSON encoder
+    return ['{"v": %r}' % v if v.__class__ is float and v - v == 0 else
+            '{"v": %d}' % v if v.__class__ is int else
+            _generic(v) for v in values]
+
+
+def _strings(values):
+    return ['{"v": %s}' % encode_string(v) if v.__class__ is str else
+            _generic(v) for v in values]
+
+
+def _booleans(values):
+    return ['{"v": true}' if v is True else '{"v": false}' if v is False else
+            _generic(v) for v in values]
+
+
+def _dates(values):
+    return ['{"v": "%s"}' % d if d is not None else _generic(v)
+            for d, v in zip(date_cache.encode(values, datetime.date), values)]
+
+
+def _datetimes(values):
+    return ['{"v": "%s"}' % d if d is not None else _generic(v)
+            for d, v in zip(date_cache.encode(values, datetime.datetime),
+                            values)]
+
+
+def _times(values):
+    return ['{"v": [%d, %d, %d]}' % tuple(t) if t is not None else _generic(v)
+            for t, v in zip(date_cache.encode(values, datetime.time), values)]
+
+
+serializers = {'number':_numbers, 'string':_strings, 'boolean':_booleans,
+               'date':_dates, 'datetime':_datetimes, 'timeofday':_times}
+
+
+def compile_serializers(schema):
+    """
+    One serializer per column from a table schema. Serializers encode lists
+    of plain values as cells directly without going through
+    `Encoder.default`. Anything they do not recognise is passed to `Encoder`.
+    """
+    return [serializers[column.valid_types[col.type]]
+            for col in schema.values()]
+
+
+def _extra_cell(cell, label, options, pool):
+    """
+    Add a label and options to an encoded cell. Options equal to ones
+    already in the pool are not encoded again.
+    """
+    parts = [cell[1:-1]] if cell != '{}' else []
+    if label is not None:
+        parts.append('"f": ' + _default.encode(label))
+    if options is not None:
+        parts.append('"p": ' + pool.json(options, _default.encode))
+    return '{%s}' % ", ".join(parts)
+
+
+def _row_chunks(table, chunk_rows=1000, offset=0, positions=None):
+    """
+    Lists of encoded rows from `offset` in chunks of `chunk_rows` rows,
+    optionally of the rows at `positions`.
+
+    Cells with labels or options are encoded by `Encoder`, plain values by
+    the serializers of their columns. Rows whose cells no longer match the
+    schema are encoded cell by cell, as they are.
+    """
+    store = table._store
+    funcs = store.serializers(compile_serializers(table.schema))
+    misfits = {}
+    for length, columns, extras in store.iter_chunks(chunk_rows, offset,
+                                                     positions, misfits):
+        cells = [f(values) for f, values in zip(funcs, columns)]
+        rows = list(zip(*cells)) or [()] * length
+        for idx, parts in extras.items():
+            rows[idx] = [
+                cell if part == (None, None) else
+                _extra_cell(cell, part[0], part[1], store.pool)
+                for cell, part in zip(rows[idx], parts)]
+        for idx, row in misfits.items():
+            rows[idx] = [_default.encode(cell) for cell in row]
+        misfits.clear()
+        yield ['{"c": [%s]}' % ", ".join(r) for r in rows]
+
+
+def encode_rows(table, offset=0):
+    """
+    A list of the encoded rows of a table from `offset`
+    """
+    return list(itertools.chain.from_iterable(_row_chunks(table, 1000, offset)))
+
+
+def iterrows(table, chunk_rows=1000):
+    """
+    Encode the rows of a table in chunks of `chunk_rows` rows.
+
+    Append-only tables reuse the encoded rows they keep and only encode rows
+    that have changed. Sorted tables are encoded in the order of their
+    index.
+    """
+    order = table._order()
+    if not table.append_only:
+        for rows in _row_chunks(table, chunk_rows, positions=order):
+            yield ", ".join(rows)
+        return
+    fragments = table._store.fragments()
+    idx = 0
+    while idx < len(fragments):
+        if fragments[idx] is not None:
+            idx += 1
+            continue
+        # encode runs of missing rows together
+        end = idx
+        while end < len(fragments) and end - idx < chunk_rows \
+                and fragments[end] is None:
+            end += 1
+        rows = next(_row_chunks(table, end - idx, idx))
+        fragments[idx:end] = rows
+        table._store.set_fragments(idx, rows)
+        idx = end
+    if order is not None:
+        fragments = [fragments[idx] for idx in order]
+    for start in range(0, len(fragments), chunk_rows):
+        yield ", ".join(fragments[start:start + chunk_rows])
+
+
+def _iterencode(schema, options, chunks):
+    yield '{"cols": %s, "rows": [' % _default.encode(list(schema.values()))
+    sep = ""
+    for chunk in chunks:
+        yield sep + chunk
+        sep = ", "
+    tail = "]"
+    if options is not None:
+        tail += ', "p": %s' % _default.encode(options)
+    yield tail + "}"
+
+
+def iterencode(table, chunk_rows=1000):
+    """
+    Encode a table as JSON in chunks, one for the columns, one for every
+    `chunk_rows` rows and one for the table options.
+
+    The joined chunks are identical to `encode(table)`.
+    """
+    return _iterencode(table.schema, table.options,
+                       iterrows(table, chunk_rows))
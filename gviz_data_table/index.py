@@ -0,0 +1,104 @@
+"""
+Sort indexes of tables.
+
+An index keeps the positions of the rows of a table ordered by the values of
+some of its columns without moving the rows. Missing values sort before all
+others, so they come first in ascending order and last in descending order.
+Rows with equal values keep the order they were added in.
+"""
+import bisect
+import datetime
+
+
+class Descending(object):
+    """Reverses the order of a sort key"""
+
+    __slots__ = ('key', )
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return self.key != other.key
+
+
+def sort_key(value):
+    """Missing values sort before all others"""
+    return (value is not None, value)
+
+
+def date_key(value):
+    """
+    Sort key of date columns, which can also hold datetimes. These cannot
+    be compared with dates and sort by their date.
+    """
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return (value is not None, value)
+
+
+key_funcs = {datetime.date:date_key}
+
+
+class SortIndex(object):
+    """
+    Positions of rows ordered by the columns at `columns`, each ascending or
+    descending. `types` are the types of the columns, if given their values
+    are compared as for those types. Rows can be inserted as they are added
+    to a table.
+    """
+
+    # inserting a row moves the keys after it, merging compares all keys
+    merge_rows = 500
+
+    def __init__(self, columns, descending, types=None):
+        if types is None:
+            types = [None] * len(columns)
+        funcs = [key_funcs.get(typ, sort_key) for typ in types]
+        self.columns = list(zip(columns, descending, funcs))
+        self.keys = []
+        self.positions = []
+        self.changes = None
+
+    def key(self, values, position):
+        """The sort key of a row of values at a position"""
+        key = [Descending(func(values[idx])) if reverse else
+               func(values[idx]) for idx, reverse, func in self.columns]
+        key.append(position)
+        return tuple(key)
+
+    def build(self, rows):
+        """Index an iterable of rows of values"""
+        keys = [self.key(values, position)
+                for position, values in enumerate(rows)]
+        keys.sort()
+        self.keys = keys
+        self.positions = [key[-1] for key in keys]
+
+    def insert_all(self, start, rows):
+        """
+        Add rows of values at positions from `start` after the indexed rows.
+        Large batches are sorted and merged with the index in one pass.
+        """
+        keys = [self.key(values, position)
+                for position, values in enumerate(rows, start)]
+        if len(keys) < self.merge_rows:
+            for key in keys:
+                idx = bisect.bisect(self.keys, key)
+                self.keys.insert(idx, key)
+                self.positions.insert(idx, key[-1])
+            return
+        keys.sort()
+        # sorting two sorted runs merges them
+        self.keys.extend(keys)
+        self.keys.sort()
+        self.positions = [key[-1] for key in self.keys]
+
+    def __len__(self):
+        return len(self.positions)
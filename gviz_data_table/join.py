@@ -0,0 +1,189 @@
+"""
+Joins of tables.
+
+Rows are matched on the values of key columns with a hash index of the
+smaller table, so each table is read once. Rows with a missing key value
+match no rows. Result rows are in the order of the left table, followed by
+the rows only in the right table for outer joins.
+"""
+import copy
+import itertools
+import operator
+
+from .column import basestring, valid_types
+
+
+hows = ('inner', 'left', 'outer')
+
+
+def _float(cell):
+    """A number cell, or a (value, label, options) tuple, as a float"""
+    if isinstance(cell, tuple):
+        value = cell[0]
+        return (None if value is None else float(value), ) + cell[1:]
+    return None if cell is None else float(cell)
+
+
+def _cells(values, extras):
+    """Cells of a record, as (value, label, options) if any have either"""
+    if extras is None:
+        return values
+    return [(value, label, options)
+            for value, (label, options) in zip(values, extras)]
+
+
+def _key(positions):
+    """
+    A function returning the key of a row of values, None if any value is
+    missing. Single values are their own key.
+    """
+    get = operator.itemgetter(*positions)
+    if len(positions) == 1:
+        return get
+
+    def key(values):
+        key = get(values)
+        if None in key:
+            return None
+        return key
+    return key
+
+
+def _project(positions):
+    """A function returning a list of the cells at `positions`"""
+    if not positions:
+        return lambda cells: []
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda cells: [cells[position]]
+    get = operator.itemgetter(*positions)
+    return lambda cells: list(get(cells))
+
+
+def _index_right(left, right, keys, how):
+    """Rows of a join with the index built on the right table"""
+    lk, lr, rk, rr = keys
+    left_key, right_key = _key(lk), _key(rk)
+    head, rest, right_head = _project(lk + lr), _project(rr), _project(rk)
+    rows = []
+    row_keys = []
+    index = {}
+    for pos, (values, extras) in enumerate(right._records()):
+        key = right_key(values)
+        rows.append(_cells(values, extras))
+        row_keys.append(key)
+        if key is not None:
+            index.setdefault(key, []).append(pos)
+    matched = set()
+    missing = [None] * len(rr)
+    for values, extras in left._records():
+        cells = head(_cells(values, extras))
+        key = left_key(values)
+        found = index.get(key, ())
+        for pos in found:
+            yield cells + rest(rows[pos])
+        if found:
+            matched.add(key)
+        elif how != 'inner':
+            yield cells + missing
+    if how == 'outer':
+        missing = [None] * len(lr)
+        for key, cells in zip(row_keys, rows):
+            if key is None or key not in matched:
+                yield right_head(cells) + missing + rest(cells)
+
+
+def _index_left(left, right, keys, how):
+    """Rows of a join with the index built on the left table"""
+    lk, lr, rk, rr = keys
+    left_key, right_key = _key(lk), _key(rk)
+    head, rest, right_head = _project(lk + lr), _project(rr), _project(rk)
+    heads = []
+    index = {}
+    for pos, (values, extras) in enumerate(left._records()):
+        heads.append(head(_cells(values, extras)))
+        key = left_key(values)
+        if key is not None:
+            index.setdefault(key, []).append(pos)
+    matches = [[] for cells in heads]
+    unmatched = []
+    missing = [None] * len(lr)
+    for values, extras in right._records():
+        cells = _cells(values, extras)
+        found = index.get(right_key(values), ())
+        for pos in found:
+            matches[pos].append(rest(cells))
+        if not found and how == 'outer':
+            unmatched.append(right_head(cells) + missing + rest(cells))
+    missing = [None] * len(rr)
+    for cells, found in zip(heads, matches):
+        for others in found:
+            yield cells + others
+        if not found and how != 'inner':
+            yield cells + missing
+    for row in unmatched:
+        yield row
+
+
+def join(left, right, on, how='inner', batch_size=1000):
+    """
+    Join the rows of two tables with equal values in the `on` columns,
+    which both tables must have. `how` is inner, left or outer: left joins
+    keep rows of the left table without matches and outer joins also those
+    of the right table, with None for the columns of the other table.
+
+    The result is a new table with the key columns, the other columns of the
+    left table and then those of the right table. Other columns with the
+    same id in both tables are an error.
+    """
+    from .table import Table, column_dict
+    if how not in hows:
+        raise ValueError("{0} join not supported".format(how))
+    if isinstance(on, basestring):
+        on = [on]
+    on = list(on)
+    if not on:
+        raise ValueError("Joins need at least one key column")
+    for key in on:
+        if key not in left.schema or key not in right.schema:
+            raise ValueError("Unknown column '{0}'".format(key))
+        if (valid_types[left.schema[key].type] !=
+                valid_types[right.schema[key].type]):
+            raise ValueError("Column '{0}' has different types".format(key))
+    left_rest = [key for key in left.schema if key not in on]
+    right_rest = [key for key in right.schema if key not in on]
+    duplicates = [key for key in right_rest if key in left.schema]
+    if duplicates:
+        raise ValueError("Duplicate column ids '{0}'".format(
+            "', '".join(duplicates)))
+    schema = ([column_dict(left.schema[key]) for key in on + left_rest] +
+              [column_dict(right.schema[key]) for key in right_rest])
+    # integer and float keys match, the key column holds both as floats
+    promoted = [idx for idx, key in enumerate(on)
+                if float in (left.schema[key].type, right.schema[key].type)
+                and left.schema[key].type is not right.schema[key].type]
+    for idx in promoted:
+        schema[idx]['type'] = float
+
+    left_ids = list(left.schema)
+    right_ids = list(right.schema)
+    keys = ([left_ids.index(key) for key in on],
+            [left_ids.index(key) for key in left_rest],
+            [right_ids.index(key) for key in on],
+            [right_ids.index(key) for key in right_rest])
+    if len(right._store) <= len(left._store):
+        rows = _index_right(left, right, keys, how)
+    else:
+        rows = _index_left(left, right, keys, how)
+
+    result = Table(schema, copy.deepcopy(left.options), storage=left.storage,
+                   validation=left.validation, sample_every=left.sample_every)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        for row in batch:
+            for idx in promoted:
+                row[idx] = _float(row[idx])
+        result.extend(batch)
+    return result
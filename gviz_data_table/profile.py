@@ -0,0 +1,194 @@
+"""
+Opt-in instrumentation of building and encoding tables.
+
+    from gviz_data_table.profile import profile
+
+    with profile() as stats:
+        table.source()
+    print(stats.report())
+
+While a profile is active the functions of each phase are wrapped with
+timers. Nothing is wrapped otherwise. Wrapping is global so profiles also
+record work done in other threads. Phases can be nested, times are
+inclusive.
+"""
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from . import cell
+from . import column
+from . import encoder
+from . import storage
+from . import table
+
+
+logger = logging.getLogger("gviz_data_table")
+
+timer = getattr(time, 'perf_counter', time.time)
+
+Phase = namedtuple('Phase', 'count seconds')
+
+
+class Stats(object):
+    """
+    Counts and cumulative times of each phase and a record of each
+    `encode()` or `source()` call with its row, cell and byte counts
+    """
+
+    def __init__(self, log=None):
+        self.phases = {}
+        self.calls = []
+        self.log = log
+
+    def record(self, name, seconds):
+        count, total = self.phases.get(name, (0, 0.0))
+        self.phases[name] = Phase(count + 1, total + seconds)
+
+    def record_call(self, call):
+        self.calls.append(call)
+        if self.log is not None:
+            self.log.debug("%(call)s: %(rows)d rows, %(cells)d cells, "
+                           "%(bytes)d bytes in %(seconds).6fs", call)
+
+    def report(self):
+        lines = ["{0:<25} {1:>10} {2:>12}".format("phase", "count", "seconds")]
+        for name in sorted(self.phases):
+            count, seconds = self.phases[name]
+            lines.append("{0:<25} {1:>10} {2:>12.6f}".format(name, count,
+                                                              seconds))
+        return "\n".join(lines)
+
+
+_collectors = []
+_patched = []
+
+
+def _record(name, seconds):
+    for stats in _collectors:
+        stats.record(name, seconds)
+
+
+def _timed(name, func):
+    def timed(*args, **kwargs):
+        start = timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(name, timer() - start)
+    return timed
+
+
+def _timed_generator(name, func):
+    def timed(*args, **kwargs):
+        chunks = func(*args, **kwargs)
+        elapsed = 0.0
+        while True:
+            start = timer()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                elapsed += timer() - start
+            yield chunk
+        _record(name, elapsed)
+    return timed
+
+
+def _call(name, func):
+    """Record a call which encodes a table in chunks"""
+    def timed(self, *args, **kwargs):
+        chunks = func(self, *args, **kwargs)
+        elapsed = 0.0
+        size = 0
+        while True:
+            start = timer()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                elapsed += timer() - start
+            size += len(chunk)
+            yield chunk
+        rows = len(self._store)
+        for stats in _collectors:
+            stats.record(name, elapsed)
+            stats.record_call({'call':name, 'rows':rows,
+                               'cells':rows * len(self.schema), 'bytes':size,
+                               'seconds':elapsed})
+    return timed
+
+
+def _targets():
+    """Objects, attributes, phase names and wrappers"""
+    targets = [
+        (cell.Cell, 'validate', 'Cell.validate', _timed),
+        (column.Column, 'invalid', 'Column.invalid', _timed),
+        (table.Table, '_validate', 'Table.validate', _timed),
+        (encoder.Encoder, 'default', 'Encoder.default', _timed),
+        (table, '_join_chunks', 'join', _timed),
+        (table.Table, 'iter_encode', 'encode', _call),
+        (table.Table, 'iter_source', 'source', _call),
+    ]
+    for store in (storage.RowStore, storage.ColumnStore):
+        name = store.__name__
+        targets.extend([
+            (store, 'append', name + '.append', _timed),
+            (store, 'extend', name + '.extend', _timed),
+            (store, 'encodable', name + '.encodable', _timed_generator),
+        ])
+    for key in encoder.serializers:
+        targets.append((encoder.serializers, key, 'serialize.' + key, _timed))
+    return targets
+
+
+def _get(obj, attr):
+    if isinstance(obj, dict):
+        return obj[attr]
+    return obj.__dict__[attr]
+
+
+def _set(obj, attr, value):
+    if isinstance(obj, dict):
+        obj[attr] = value
+    else:
+        setattr(obj, attr, value)
+
+
+def _install():
+    for obj, attr, name, wrapper in _targets():
+        original = _get(obj, attr)
+        _patched.append((obj, attr, original))
+        _set(obj, attr, wrapper(name, original))
+
+
+def _uninstall():
+    while _patched:
+        obj, attr, original = _patched.pop()
+        _set(obj, attr, original)
+
+
+@contextmanager
+def profile(log=None):
+    """
+    Record phases while the context is active. `log` is a logger for each
+    `encode()` and `source()` call, or True for the `gviz_data_table`
+    logger. Yields a `Stats` object.
+    """
+    if log is True:
+        log = logger
+    stats = Stats(log)
+    if not _collectors:
+        _install()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+        if not _collectors:
+            _uninstall()
+        if log is not None:
+            log.debug("phases\n%s", stats.report())
@@ -0,0 +1,535 @@
+"""
+Google Visualization Query Language for tables.
+
+Supports the ``select``, ``where``, ``group by``, ``order by``, ``limit``,
+``offset`` and ``label`` clauses with the ``count``, ``sum``, ``avg``,
+``min`` and ``max`` aggregates. Queries return a new table.
+
+https://developers.google.com/chart/interactive/docs/querylanguage
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+import copy
+import datetime
+import operator
+import re
+
+from .aggregate import Groups, aggregate_id, result_type
+from .column import unicode
+from .index import sort_key
+
+
+class QueryError(ValueError):
+    """Raised for queries which cannot be parsed or run against a table"""
+
+
+token_re = re.compile(r"""
+    \s*(?:
+      (?P<string>'[^']*'|"[^"]*")
+     |(?P<quoted>`[^`]*`)
+     |(?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|-?\.\d+(?:[eE][-+]?\d+)?)
+     |(?P<op><=|>=|!=|<>|=|<|>|\(|\)|,|\*)
+     |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+clauses = ('select', 'where', 'group', 'pivot', 'order', 'limit', 'offset',
+           'label', 'format', 'options')
+
+aggregates = ('count', 'sum', 'avg', 'min', 'max')
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = token_re.match(text, pos)
+        if match is None or match.end() == pos:
+            raise QueryError("Invalid query at '{0}'".format(text[pos:].strip()))
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = value[1:-1]
+        elif kind == 'quoted':
+            value = value[1:-1]
+        elif kind == 'number':
+            value = float(value) if set('.eE') & set(value) else int(value)
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class ColumnRef(object):
+    """A column of the table in a query"""
+
+    def __init__(self, id):
+        self.id = id
+
+    def __eq__(self, other):
+        return isinstance(other, ColumnRef) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return "ColumnRef({0!r})".format(self.id)
+
+
+class Aggregate(object):
+    """An aggregate of a column"""
+
+    def __init__(self, function, column):
+        self.function = function
+        self.column = column
+
+    @property
+    def id(self):
+        return aggregate_id(self.function, self.column.id)
+
+    def __eq__(self, other):
+        return isinstance(other, Aggregate) and \
+            (other.function, other.column) == (self.function, self.column)
+
+    def __hash__(self):
+        return hash((self.function, self.column))
+
+    def __repr__(self):
+        return "Aggregate({0!r}, {1!r})".format(self.function, self.column)
+
+
+class Literal(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return "Literal({0!r})".format(self.value)
+
+
+class Parser(object):
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        return (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def keyword(self, *words):
+        """Consume keywords if they follow"""
+        for offset, word in enumerate(words):
+            kind, value = self.peek(offset)
+            if kind != 'word' or value.lower() != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def expect(self, kind, value=None):
+        token = self.next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise QueryError("Expected {0} but found {1}".format(
+                value or kind, token[1]))
+        return token[1]
+
+    def at_clause(self):
+        kind, value = self.peek()
+        return kind is None or (kind == 'word' and value.lower() in clauses)
+
+    def parse(self):
+        query = Query()
+        if self.keyword('select'):
+            query.select = self.select()
+        if self.keyword('where'):
+            query.where = self.expression()
+        if self.keyword('group', 'by'):
+            query.group_by = self.columns()
+        if self.keyword('pivot'):
+            raise QueryError("pivot is not supported")
+        if self.keyword('order', 'by'):
+            query.order_by = self.order()
+        if self.keyword('limit'):
+            query.limit = self.integer()
+        if self.keyword('offset'):
+            query.offset = self.integer()
+        if self.keyword('label'):
+            query.labels = self.labels()
+        if self.peek()[0] is not None:
+            raise QueryError("Unexpected '{0}'".format(self.peek()[1]))
+        return query
+
+    def integer(self):
+        value = self.expect('number')
+        if not isinstance(value, int) or value < 0:
+            raise QueryError("Expected a positive integer")
+        return value
+
+    def column(self):
+        kind, value = self.next()
+        if kind == 'quoted' or (kind == 'word' and value.lower() not in clauses):
+            return ColumnRef(value)
+        raise QueryError("Expected a column but found {0}".format(value))
+
+    def columns(self):
+        columns = [self.column()]
+        while self.peek() == ('op', ','):
+            self.next()
+            columns.append(self.column())
+        return columns
+
+    def selection(self):
+        kind, value = self.peek()
+        if kind == 'word' and value.lower() in aggregates \
+                and self.peek(1) == ('op', '('):
+            self.pos += 2
+            column = self.column()
+            self.expect('op', ')')
+            return Aggregate(value.lower(), column)
+        return self.column()
+
+    def select(self):
+        if self.peek() == ('op', '*'):
+            self.next()
+            return None
+        selected = [self.selection()]
+        while self.peek() == ('op', ','):
+            self.next()
+            selected.append(self.selection())
+        return selected
+
+    def order(self):
+        order = []
+        while True:
+            selection = self.selection()
+            descending = False
+            if self.keyword('desc'):
+                descending = True
+            else:
+                self.keyword('asc')
+            order.append((selection, descending))
+            if self.peek() != ('op', ','):
+                return order
+            self.next()
+
+    def labels(self):
+        labels = {}
+        while True:
+            selection = self.selection()
+            labels[selection] = self.expect('string')
+            if self.peek() != ('op', ','):
+                return labels
+            self.next()
+
+    def expression(self):
+        left = self.conjunction()
+        while self.keyword('or'):
+            left = ('or', left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.keyword('and'):
+            left = ('and', left, self.negation())
+        return left
+
+    def negation(self):
+        if self.keyword('not'):
+            return ('not', self.negation())
+        if self.peek() == ('op', '('):
+            self.next()
+            expression = self.expression()
+            self.expect('op', ')')
+            return expression
+        return self.comparison()
+
+    def comparison(self):
+        left = self.operand()
+        kind, value = self.peek()
+        if kind == 'op' and value in comparisons:
+            self.next()
+            return (value, left, self.operand())
+        if self.keyword('is', 'not', 'null'):
+            return ('is not null', left)
+        if self.keyword('is', 'null'):
+            return ('is null', left)
+        for words in (('contains', ), ('starts', 'with'), ('ends', 'with'),
+                      ('matches', ), ('like', )):
+            if self.keyword(*words):
+                return (" ".join(words), left, self.operand())
+        raise QueryError("Expected a comparison but found {0}".format(value))
+
+    def operand(self):
+        kind, value = self.peek()
+        if kind in ('string', 'number'):
+            self.next()
+            return Literal(value)
+        if kind == 'word':
+            word = value.lower()
+            if word in ('true', 'false'):
+                self.next()
+                return Literal(word == 'true')
+            if word in literal_types and self.peek(1)[0] == 'string':
+                self.pos += 2
+                return Literal(literal_types[word](self.peek(-1)[1]))
+        return self.selection()
+
+
+def _date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def _datetime(text):
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise QueryError("Invalid datetime '{0}'".format(text))
+
+
+def _timeofday(text):
+    for fmt in ("%H:%M:%S.%f", "%H:%M:%S", "%H:%M"):
+        try:
+            return datetime.datetime.strptime(text, fmt).time()
+        except ValueError:
+            pass
+    raise QueryError("Invalid timeofday '{0}'".format(text))
+
+
+literal_types = {'date':_date, 'datetime':_datetime, 'timeofday':_timeofday}
+
+
+def _compare(op):
+    def compare(left, right):
+        if left is None or right is None:
+            return False
+        try:
+            return op(left, right)
+        except TypeError:
+            return False
+    return compare
+
+
+def _strings(op):
+    def compare(left, right):
+        if not isinstance(left, (str, unicode)) or \
+                not isinstance(right, (str, unicode)):
+            return False
+        return op(left, right)
+    return compare
+
+
+def _matches(regex):
+    try:
+        return re.compile(u"(?:{0})\\Z".format(regex))
+    except re.error as e:
+        raise QueryError("Invalid regular expression '{0}': {1}".format(
+            regex, e))
+
+
+def _like(pattern):
+    regex = "".join('.*' if c == '%' else '.' if c == '_' else re.escape(c)
+                    for c in pattern)
+    return re.compile(regex + r'\Z', re.DOTALL)
+
+
+patterns = {'matches':_matches, 'like':_like}
+
+
+comparisons = {
+    '=':_compare(operator.eq), '!=':_compare(operator.ne),
+    '<>':_compare(operator.ne), '<':_compare(operator.lt),
+    '<=':_compare(operator.le), '>':_compare(operator.gt),
+    '>=':_compare(operator.ge),
+}
+
+string_comparisons = {
+    'contains':_strings(lambda s, sub: sub in s),
+    'starts with':_strings(lambda s, prefix: s.startswith(prefix)),
+    'ends with':_strings(lambda s, suffix: s.endswith(suffix)),
+    'matches':_strings(lambda s, regex: _matches(regex).match(s) is not None),
+    'like':_strings(lambda s, pattern: _like(pattern).match(s) is not None),
+}
+
+
+class Query(object):
+    """A parsed query"""
+
+    def __init__(self):
+        self.select = None
+        self.where = None
+        self.group_by = []
+        self.order_by = []
+        self.limit = None
+        self.offset = 0
+        self.labels = {}
+
+    def _position(self, table, column):
+        try:
+            return list(table.schema).index(column.id)
+        except ValueError:
+            raise QueryError("Unknown column '{0}'".format(column.id))
+
+    def _compile(self, table, expression):
+        """A function of a row of values for a where clause"""
+        if isinstance(expression, Literal):
+            value = expression.value
+            return lambda row: value
+        if isinstance(expression, ColumnRef):
+            idx = self._position(table, expression)
+            return lambda row: row[idx]
+        if isinstance(expression, Aggregate):
+            raise QueryError("Aggregates cannot be used in where clauses")
+        op = expression[0]
+        args = [self._compile(table, e) for e in expression[1:]]
+        if op == 'and':
+            left, right = args
+            return lambda row: left(row) and right(row)
+        if op == 'or':
+            left, right = args
+            return lambda row: left(row) or right(row)
+        if op == 'not':
+            arg = args[0]
+            return lambda row: not arg(row)
+        if op == 'is null':
+            arg = args[0]
+            return lambda row: arg(row) is None
+        if op == 'is not null':
+            arg = args[0]
+            return lambda row: arg(row) is not None
+        func = comparisons.get(op) or string_comparisons[op]
+        pattern = expression[2]
+        if op in patterns and isinstance(pattern, Literal) and \
+                isinstance(pattern.value, (str, unicode)):
+            # compile literal patterns once rather than for each row
+            match = patterns[op](pattern.value).match
+            func = _strings(lambda s, pattern: match(s) is not None)
+        left, right = args
+        return lambda row: func(left(row), right(row))
+
+    def _aggregate_type(self, table, aggregate):
+        try:
+            return result_type(aggregate.function,
+                               table.schema[aggregate.column.id].type)
+        except ValueError as e:
+            raise QueryError(str(e))
+
+    def execute(self, table):
+        """Run the query against a table and return a new table"""
+        from .table import Table, column_dict
+        selected = self.select
+        if selected is None:
+            selected = [ColumnRef(id) for id in table.schema]
+        for selection in selected:
+            column = getattr(selection, 'column', selection)
+            self._position(table, column)
+
+        records = table._records()
+        if self.where is not None:
+            where = self._compile(table, self.where)
+            records = (r for r in records if where(r[0]))
+
+        grouped = self.group_by or any(isinstance(s, Aggregate)
+                                       for s in selected)
+        ids = [s.id for s in selected]
+        if grouped:
+            rows, schema = self._group(table, selected, records)
+            for selection, descending in reversed(self.order_by):
+                if selection.id not in ids:
+                    raise QueryError("Cannot order by '{0}' which is not "
+                                     "selected".format(selection.id))
+                idx = ids.index(selection.id)
+                rows.sort(key=lambda row: sort_key(_value(row[idx])),
+                          reverse=descending)
+        else:
+            # order before selecting, so unselected columns can be used
+            records = list(records)
+            for selection, descending in reversed(self.order_by):
+                if isinstance(selection, Aggregate):
+                    raise QueryError("Cannot order by '{0}' without "
+                                     "grouping".format(selection.id))
+                idx = self._position(table, selection)
+                records.sort(key=lambda record: sort_key(record[0][idx]),
+                             reverse=descending)
+            positions = [self._position(table, s) for s in selected]
+            rows = []
+            for values, extras in records:
+                if extras is None:
+                    rows.append([values[idx] for idx in positions])
+                else:
+                    rows.append([(values[idx], ) + tuple(extras[idx])
+                                 for idx in positions])
+            schema = [column_dict(table.schema[s.id]) for s in selected]
+
+        stop = None if self.limit is None else self.offset + self.limit
+        rows = rows[self.offset:stop]
+
+        for selection, label in self.labels.items():
+            if selection.id not in ids:
+                raise QueryError("Cannot label '{0}' which is not "
+                                 "selected".format(selection.id))
+            schema[ids.index(selection.id)]['label'] = label
+        result = Table(schema, copy.deepcopy(table.options))
+        result.extend(rows)
+        return result
+
+    def _group(self, table, selected, records):
+        from .table import column_dict
+        keys = [self._position(table, c) for c in self.group_by]
+        for selection in selected:
+            if isinstance(selection, ColumnRef) \
+                    and selection not in self.group_by:
+                raise QueryError("'{0}' must be grouped or aggregated".format(
+                    selection.id))
+        aggregated = [s for s in selected if isinstance(s, Aggregate)]
+        sources = [self._position(table, a.column) for a in aggregated]
+        schema = []
+        for selection in selected:
+            if isinstance(selection, Aggregate):
+                col = table.schema[selection.column.id]
+                schema.append(dict(
+                    id=selection.id,
+                    type=self._aggregate_type(table, selection),
+                    label="{0} {1}".format(selection.function, col.label)))
+            else:
+                schema.append(column_dict(table.schema[selection.id]))
+        groups = Groups(keys, sources, [a.function for a in aggregated])
+        for values, extras in records:
+            groups.add(values)
+        results = OrderedDict(groups.items())
+        if not keys and not results:
+            results[()] = groups.empty()
+
+        rows = []
+        for key in sorted(results, key=lambda k: [sort_key(v) for v in k]):
+            computed = dict(zip(aggregated, results[key]))
+            row = []
+            for selection in selected:
+                if isinstance(selection, Aggregate):
+                    row.append(computed[selection])
+                else:
+                    row.append(key[self.group_by.index(selection)])
+            rows.append(row)
+        return rows, schema
+
+
+def _value(cell):
+    return cell[0] if isinstance(cell, tuple) else cell
+
+
+def parse(text):
+    """Parse a query"""
+    return Parser(text).parse()
+
+
+def query(table, text):
+    """Run a query against a table and return a new table"""
+    return parse(text).execute(table)
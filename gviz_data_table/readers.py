@@ -0,0 +1,174 @@
+"""
+Tables from CSV files.
+
+Files are read in batches of rows. Column types are inferred from a sample
+of the first rows unless they are given and each column is converted from
+text by a single converter.
+"""
+import csv
+import datetime
+import io
+import itertools
+import re
+
+from .column import basestring
+
+
+int_re = re.compile(r"^[-+]?\d+$")
+float_re = re.compile(r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+bool_re = re.compile(r"^(true|false)$", re.IGNORECASE)
+date_re = re.compile(r"^(\d{4})-(\d\d)-(\d\d)$")
+datetime_re = re.compile(
+    r"^(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6}))?)?$")
+time_re = re.compile(r"^(\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6}))?)?$")
+
+
+def _parts(match):
+    """Integers of the groups of a match, fractions of seconds as microseconds"""
+    groups = list(match.groups())
+    if groups[-1] is not None:
+        groups[-1] = groups[-1].ljust(6, "0")
+    return [int(g) for g in groups if g is not None]
+
+
+def _int(text):
+    return int(text)
+
+
+def _float(text):
+    return float(text)
+
+
+def _bool(text):
+    if not bool_re.match(text):
+        raise ValueError
+    return text.lower() == "true"
+
+
+def _date(text):
+    return datetime.date(*[int(g) for g in date_re.match(text).groups()])
+
+
+def _datetime(text):
+    return datetime.datetime(*_parts(datetime_re.match(text)))
+
+
+def _time(text):
+    return datetime.time(*_parts(time_re.match(text)))
+
+
+def _str(text):
+    return text
+
+
+# the first pattern matching every sampled value of a column decides its type
+patterns = [(int, int_re), (float, float_re), (bool, bool_re),
+            (datetime.date, date_re), (datetime.datetime, datetime_re),
+            (datetime.time, time_re)]
+
+converters = {int:_int, float:_float, bool:_bool, datetime.date:_date,
+              datetime.datetime:_datetime, datetime.time:_time, str:_str}
+
+
+def infer_csv_type(texts):
+    """
+    The column type for a sequence of text values. Empty values are ignored
+    and columns with none are strings.
+    """
+    texts = [text for text in texts if text]
+    if not texts:
+        return str
+    for typ, pattern in patterns:
+        if all(pattern.match(text) for text in texts):
+            return typ
+    return str
+
+
+def _invalid(texts, convert):
+    """The first text in a column which cannot be converted"""
+    for text in texts:
+        try:
+            if text:
+                convert(text)
+        except (ValueError, TypeError, AttributeError):
+            return text
+
+
+def compile_converters(schema):
+    """
+    One function per column converting a list of text values to values of
+    the column type. Empty values are None except in string columns.
+    """
+    funcs = []
+    for col in schema:
+        if col['type'] is str:
+            funcs.append(list)
+            continue
+
+        def column(texts, convert=converters[col['type']], col=col):
+            try:
+                return [convert(text) if text else None for text in texts]
+            except (ValueError, TypeError, AttributeError):
+                raise ValueError("Invalid {0} '{1}' in column '{2}'".format(
+                    col['type'].__name__, _invalid(texts, convert),
+                    col['id']))
+        funcs.append(column)
+    return funcs
+
+
+def csv_schema(names, rows, types=None):
+    """A table schema from column names and a sample of rows of text"""
+    if types is None:
+        types = {}
+    elif not isinstance(types, dict):
+        types = dict(zip(names, types))
+    schema = []
+    for idx, name in enumerate(names):
+        typ = types.get(name)
+        if typ is None:
+            typ = infer_csv_type(row[idx] for row in rows if idx < len(row))
+        schema.append({'id':name, 'type':typ})
+    return schema
+
+
+def _read(cls, fp, dialect, header, types, sample_size, batch_size, kwargs):
+    reader = csv.reader(fp, dialect)
+    names = next(reader, []) if header else None
+    sample = list(itertools.islice(reader, sample_size))
+    if names is None:
+        width = len(sample[0]) if sample else 0
+        names = ["column{0}".format(idx + 1) for idx in range(width)]
+    schema = csv_schema(names, sample, types)
+    table = cls(schema, **kwargs)
+    funcs = compile_converters(schema)
+    line = 2 if header else 1
+    rows = itertools.chain(sample, reader)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        for idx, row in enumerate(batch):
+            if len(row) != len(names):
+                raise ValueError("Row {0} has {1} fields, expected {2}".format(
+                    line + idx, len(row), len(names)))
+        table.extend(dict(
+            (name, f(list(texts)))
+            for name, f, texts in zip(names, funcs, zip(*batch))))
+        line += len(batch)
+    return table
+
+
+def from_csv(cls, path_or_fp, dialect='excel', header=True, types=None,
+             sample_size=100, batch_size=1000, encoding='utf-8', **kwargs):
+    """
+    Create a table of class `cls` from a CSV file or a path to one. Values
+    are converted to their column types, so rows are not validated again
+    unless another `validation` is given.
+    """
+    kwargs.setdefault('validation', 'trusted')
+    if isinstance(path_or_fp, basestring):
+        with io.open(path_or_fp, newline='', encoding=encoding) as fp:
+            return _read(cls, fp, dialect, header, types, sample_size,
+                         batch_size, kwargs)
+    return _read(cls, path_or_fp, dialect, header, types, sample_size,
+                 batch_size, kwargs)
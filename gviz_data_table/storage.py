@@ -0,0 +1,950 @@
+"""
+Storage engines for table data.
+
+`RowStore` keeps each row as a mapping of cells. `ColumnStore`
+keeps each column in a compact container and only creates cells when they
+are asked for. `DictionaryStore` is a `ColumnStore` which keeps string
+columns as integer codes into a dictionary of their distinct values.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+try:
+    from collections.abc import Mapping, MutableMapping
+except ImportError:
+    from collections import Mapping, MutableMapping
+
+import bisect
+import datetime
+import sys
+from array import array
+from collections import namedtuple
+
+from .cell import Cell
+from .column import long, unicode, NoneType
+
+
+try:
+    int_code = array('q').typecode
+except ValueError:
+    # Python 2 arrays have no long long type
+    int_code = 'l'
+int_bits = array(int_code).itemsize * 8
+typecodes = {float:'d', int:int_code, long:int_code}
+
+DictionaryInfo = namedtuple('DictionaryInfo', 'size distinct bytes plain_bytes')
+
+# buffer protocol formats and NumPy dtype kinds
+formats = {'d':float, 'f':float, 'e':float, '?':bool}
+formats.update((code, int) for code in 'bBhHiIlLqQnN')
+kinds = {'f':float, 'i':int, 'u':int, 'b':bool}
+# datetime64 units which NumPy converts to date or datetime objects
+date_units = ('D', )
+datetime_units = ('h', 'm', 's', 'ms', 'us')
+
+
+def _unit(dtype):
+    return str(dtype).split('[')[-1].rstrip(']')
+
+
+def buffer_type(values):
+    """
+    The column type of a one-dimensional NumPy array or object supporting
+    the buffer protocol. None for anything else.
+    """
+    dtype = getattr(values, 'dtype', None)
+    if dtype is not None:
+        ndim = values.ndim
+        if dtype.kind == 'M':
+            typ = datetime.date if _unit(dtype) in ('D', 'W', 'M', 'Y') \
+                else datetime.datetime
+        else:
+            typ = kinds.get(dtype.kind)
+        name = dtype
+    else:
+        try:
+            view = memoryview(values)
+        except TypeError:
+            return None
+        ndim = view.ndim
+        typ = formats.get(view.format.lstrip('@=<>!'))
+        name = view.format
+    if ndim != 1:
+        raise ValueError("Columns must be one-dimensional")
+    if typ is None:
+        raise ValueError("{0} not supported".format(name))
+    return typ
+
+
+def as_buffer(values):
+    """
+    Column storage for a NumPy array or buffer. Arrays are used as they are
+    except datetimes in units that NumPy does not convert to date or datetime
+    objects, which are converted to days or microseconds.
+    """
+    dtype = getattr(values, 'dtype', None)
+    if dtype is None:
+        return memoryview(values)
+    if dtype.kind == 'M':
+        unit = _unit(dtype)
+        if unit not in date_units + datetime_units:
+            unit = 'D' if unit in ('W', 'M', 'Y') else 'us'
+            values = values.astype('datetime64[{0}]'.format(unit))
+    return values
+
+
+def cell_dict(value, label=None, options=None):
+    """Dictionary interface of a cell without creating one"""
+    d = {}
+    if value is not None:
+        d['v'] = value
+    if label is not None:
+        d['f'] = label
+    if options is not None:
+        d['p'] = options
+    return d
+
+
+def _options_key(options):
+    """
+    A key for the contents of options, telling apart equal keys and values
+    of different types such as 1, 1.0, True and '1'. Options with values
+    which cannot be hashed, such as lists, raise TypeError.
+    """
+    return tuple((k.__class__, k, v.__class__, v) for k, v in options.items())
+
+
+class OptionsPool(object):
+    """
+    Encoded JSON of the cell options of a table. Options are looked up by
+    their contents, so equal dictionaries are encoded once and dictionaries
+    changed in place are encoded again. Up to `maxsize` distinct options
+    are kept.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.encoded = {}
+        self.maxsize = maxsize
+
+    def __len__(self):
+        return len(self.encoded)
+
+    def json(self, options, encode):
+        """The JSON of options, encoded with `encode` if not yet known"""
+        try:
+            key = _options_key(options)
+            return self.encoded[key]
+        except TypeError:
+            return encode(options)
+        except KeyError:
+            pass
+        result = encode(options)
+        if len(self.encoded) < self.maxsize:
+            self.encoded[key] = result
+        return result
+
+
+class RowList(list):
+    """
+    List of rows which tells its owner, usually a table, about changes.
+
+    Rows added to the list become rows of the owner, so it is told about
+    changes to their cells. Mappings of cells are added as `Row` objects.
+    """
+
+    def __init__(self, owner=None):
+        list.__init__(self)
+        self.owner = owner
+
+    def _changed(self):
+        if self.owner is not None:
+            self.owner._changed()
+
+    def _adopt(self, row):
+        owner = self.owner
+        if owner is None:
+            return row
+        if isinstance(row, Row):
+            row._owner = owner
+        elif isinstance(row, Mapping):
+            row = Row(owner.schema, cells=OrderedDict(row), owner=owner)
+        return row
+
+    def append(self, row):
+        list.append(self, self._adopt(row))
+        self._changed()
+
+    def insert(self, idx, row):
+        list.insert(self, idx, self._adopt(row))
+        self._changed()
+
+    def extend(self, rows):
+        list.extend(self, [self._adopt(row) for row in rows])
+        self._changed()
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def __setitem__(self, idx, rows):
+        if isinstance(idx, slice):
+            rows = [self._adopt(row) for row in rows]
+        else:
+            rows = self._adopt(rows)
+        list.__setitem__(self, idx, rows)
+        self._changed()
+
+    def __setslice__(self, start, stop, rows):
+        # Python 2 calls this for simple slices
+        self.__setitem__(slice(start, stop), rows)
+
+    def __reduce__(self):
+        return _row_list, (list(self), self.owner)
+
+
+def _row_list(rows, owner):
+    """
+    Recreate a pickled RowList. Its owner may not be fully loaded yet, so
+    it is not told about the rows.
+    """
+    result = RowList(owner)
+    list.extend(result, rows)
+    return result
+
+
+def _tracked(name):
+    method = getattr(list, name)
+
+    def tracked(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+    tracked.__name__ = name
+    tracked.__doc__ = method.__doc__
+    return tracked
+
+
+for name in ('pop', 'remove', 'reverse', 'sort', '__delitem__', '__imul__'):
+    setattr(RowList, name, _tracked(name))
+for name in ('clear', '__delslice__'):
+    # Python 2 and 3 differences
+    if hasattr(list, name):
+        setattr(RowList, name, _tracked(name))
+
+
+class Row(MutableMapping):
+    """
+    Ordered mapping of column ids to cells with the methods of ordered
+    dictionaries. `copy` returns an ordered dictionary.
+
+    Rows of plain values only keep a tuple of the values and create their
+    cells when one is first read. Rows keep their encoded JSON until one of
+    their cells changes.
+
+    Rows are not dictionaries: the JSON encoder reads dictionaries directly
+    and would find no cells in rows which have not been read.
+    """
+
+    __slots__ = ('_schema', '_values', '_cells', '_json', '_owner')
+
+    def __init__(self, schema, values=None, cells=None, owner=None):
+        self._schema = schema
+        self._values = values
+        self._cells = cells
+        self._json = None
+        self._owner = owner
+        if cells is not None:
+            for cell in cells.values():
+                cell._owner = self
+
+    def _materialize(self):
+        """Create the cells of a row of plain values"""
+        if self._cells is None:
+            cells = OrderedDict()
+            for col, value in zip(self._schema.values(), self._values):
+                cells[col.id] = Cell.trusted(col.type, value, owner=self)
+            self._cells = cells
+            self._values = None
+        return self._cells
+
+    def __getitem__(self, key):
+        return self._materialize()[key]
+
+    def __setitem__(self, key, cell):
+        self._materialize()[key] = cell
+        if isinstance(cell, Cell):
+            cell._owner = self
+        self._changed()
+
+    def __delitem__(self, key):
+        del self._materialize()[key]
+        self._changed()
+
+    def __iter__(self):
+        if self._cells is None:
+            return iter(self._schema)
+        return iter(self._cells)
+
+    def __len__(self):
+        if self._cells is None:
+            return len(self._values)
+        return len(self._cells)
+
+    def __contains__(self, key):
+        if self._cells is None:
+            return key in self._schema
+        return key in self._cells
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __eq__(self, other):
+        # as for ordered dictionaries, order matters between them
+        if isinstance(other, (Row, OrderedDict)):
+            return list(self.items()) == list(other.items())
+        return MutableMapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, list(self.items()))
+
+    def copy(self):
+        """A shallow copy of the row as an ordered dictionary of its cells"""
+        return OrderedDict(self._materialize())
+
+    def popitem(self, last=True):
+        """
+        Remove and return the last (column id, cell) pair, or the first if
+        `last` is false, as for ordered dictionaries
+        """
+        cells = self._materialize()
+        if not cells:
+            raise KeyError("popitem(): row is empty")
+        key = next(reversed(cells)) if last else next(iter(cells))
+        return key, self.pop(key)
+
+    def move_to_end(self, key, last=True):
+        """
+        Move a column id and its cell to the end, or the start if `last` is
+        false, as for ordered dictionaries
+        """
+        cells = self._materialize()
+        cell = cells.pop(key)
+        if last:
+            cells[key] = cell
+        else:
+            rest = list(cells.items())
+            cells.clear()
+            cells[key] = cell
+            cells.update(rest)
+        self._changed()
+
+    def parts(self):
+        """
+        The values of the row and the (label, options) of each cell, or None
+        if no cell has either
+        """
+        if self._cells is None:
+            return self._values, None
+        return cell_parts(self._cells.values())
+
+    def _changed(self):
+        self._json = None
+        if self._owner is not None:
+            self._owner._changed()
+
+
+def cell_parts(cells):
+    cells = list(cells)
+    values = [c._value for c in cells]
+    for c in cells:
+        if c._label is not None or c._options is not None:
+            return values, [(c._label, c._options) for c in cells]
+    return values, None
+
+
+# stands in for the cells missing from a row
+_missing = Cell.trusted(None, None)
+
+
+def row_parts(row):
+    """
+    The values and extras of a row, which can also be a dictionary of cells
+    added to the rows directly
+    """
+    if isinstance(row, Row):
+        return row.parts()
+    return cell_parts(row.values())
+
+
+class RowStore(object):
+    """
+    Rows are mappings of column ids to cells. Rows tell the owner of the
+    store about changes to their cells.
+    """
+
+    def __init__(self, schema, owner=None):
+        self.schema = schema
+        self.owner = owner
+        self.rows = RowList(owner)
+        self.pool = OptionsPool()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, row):
+        """
+        Add a row of validated (value, label, options) tuples
+        """
+        cols = self.schema.values()
+        if all(label is None and options is None for value, label, options in row):
+            values = tuple(value for value, label, options in row)
+            self.rows.append(Row(self.schema, values, owner=self.owner))
+            return
+        cells = OrderedDict()
+        for col, (value, label, options) in zip(cols, row):
+            cells[col.id] = Cell.trusted(col.type, value, label, options)
+        self.rows.append(Row(self.schema, cells=cells, owner=self.owner))
+
+    def extend(self, size, columns):
+        """
+        Add `size` validated rows given as (values, labels, options) for
+        each column. Labels and options are dictionaries keyed by row.
+        """
+        schema = self.schema
+        owner = self.owner
+        extras = set()
+        for values, labels, options in columns:
+            extras.update(labels)
+            extras.update(options)
+        rows = zip(*[values for values, labels, options in columns]) \
+            if columns else [()] * size
+        rows = [Row(schema, values, owner=owner) for values in rows]
+        cols = list(schema.values())
+        for idx in extras:
+            cells = OrderedDict()
+            for col, (values, labels, options) in zip(cols, columns):
+                cells[col.id] = Cell.trusted(col.type, values[idx],
+                                             labels.get(idx), options.get(idx))
+            rows[idx] = Row(schema, cells=cells, owner=owner)
+        self.rows.extend(rows)
+
+    def serializers(self, funcs):
+        """Serializers for each column given those for their types"""
+        return funcs
+
+    def encodable(self):
+        """Rows as dictionaries for JSON encoding"""
+        for r in self.rows:
+            values, extras = row_parts(r)
+            if extras is None:
+                extras = [(None, None)] * len(values)
+            yield {"c":[cell_dict(value, *extra)
+                        for value, extra in zip(values, extras)]}
+
+    def fragments(self):
+        """
+        Encoded JSON of each row, None for rows which have not been encoded
+        or have changed since
+        """
+        return [getattr(r, '_json', None) for r in self.rows]
+
+    def set_fragments(self, start, fragments):
+        for r, fragment in zip(self.rows[start:], fragments):
+            if isinstance(r, Row):
+                r._json = fragment
+
+    def iter_chunks(self, size=1000, offset=0, positions=None, misfits=None):
+        """
+        Rows from `offset` in chunks of `size` as (length, columns, extras).
+        Columns are lists of the values in the chunk. Extras map the position
+        of rows in the chunk with labels or options to the (label, options)
+        of each cell. If `positions` are given the rows at those positions
+        are read in that order.
+
+        Rows whose cells have been deleted or added no longer match the
+        schema and are read by column id, missing cells as None. If a
+        dictionary `misfits` is given the cells of such rows are added to
+        it by their position in the chunk.
+        """
+        ids = list(self.schema)
+        rows = self.rows
+        total = len(rows) if positions is None else len(positions)
+        for start in range(offset, total, size):
+            if positions is None:
+                chunk = rows[start:start + size]
+            else:
+                chunk = [rows[idx] for idx in positions[start:start + size]]
+            values = []
+            extras = {}
+            for idx, r in enumerate(chunk):
+                if r.__class__ is Row and r._cells is None:
+                    # rows of plain values which have not been read
+                    values.append(r._values)
+                    continue
+                cells = r._cells if isinstance(r, Row) else r
+                if list(cells) != ids:
+                    if misfits is not None:
+                        misfits[idx] = list(cells.values())
+                    row, extra = cell_parts(cells.get(key, _missing)
+                                            for key in ids)
+                else:
+                    row, extra = row_parts(r)
+                values.append(row)
+                if extra is not None:
+                    extras[idx] = extra
+            columns = [list(col) for col in zip(*values)]
+            yield len(values), columns, extras
+
+
+def _truncate(parts, size):
+    """Remove the labels or options of positions from `size`"""
+    for idx in [idx for idx in parts if idx >= size]:
+        del parts[idx]
+
+
+class ColumnData(object):
+    """
+    The values of a single column.
+
+    Numbers are held in typed arrays with a set of the positions of missing
+    values. Labels and options are sparse dictionaries keyed by position.
+    Columns loaded from NumPy arrays or buffers keep them until rows are
+    added.
+    """
+
+    __slots__ = ('values', 'nulls', 'labels', 'options')
+
+    def __init__(self, typ):
+        code = typecodes.get(typ)
+        self.values = array(code) if code else []
+        self.nulls = set()
+        self.labels = {}
+        self.options = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def _promote(self):
+        """
+        Replace a typed array or buffer with a list when values do not fit
+        in it
+        """
+        values = self.values.tolist()
+        for idx in self.nulls:
+            values[idx] = None
+        self.values = values
+        self.nulls = set()
+
+    def _fits(self, value):
+        """Can the typed array hold the value without changing it"""
+        if value is None:
+            return True
+        if self.values.typecode != int_code:
+            # integers in float columns keep their type, as in rows
+            return type(value) is float
+        # bool and Python 2 long values must keep their type
+        return type(value) is int and \
+            -2**(int_bits - 1) <= value < 2**(int_bits - 1)
+
+    def append(self, value, label=None, options=None):
+        idx = len(self.values)
+        if not isinstance(self.values, (array, list)):
+            self._promote()
+        if isinstance(self.values, array):
+            if not self._fits(value):
+                self._promote()
+            elif value is None:
+                self.nulls.add(idx)
+                value = 0
+        self.values.append(value)
+        if label is not None:
+            self.labels[idx] = label
+        if options is not None:
+            self.options[idx] = options
+
+    def extend(self, values, labels, options):
+        """
+        Add validated values with labels and options keyed by their position
+        in `values`
+        """
+        start = len(self.values)
+        if not isinstance(self.values, (array, list)):
+            self._promote()
+        if isinstance(self.values, array):
+            values = list(values)
+            types = set(map(type, values))
+            nulls = []
+            if NoneType in types:
+                types.discard(NoneType)
+                nulls = [idx for idx, value in enumerate(values) if value is None]
+                for idx in nulls:
+                    values[idx] = 0
+            block = None
+            # bool, Python 2 long and, in float columns, int values must keep
+            # their type
+            if types <= set([int if self.values.typecode == int_code
+                             else float]):
+                try:
+                    block = array(self.values.typecode, values)
+                except OverflowError:
+                    pass
+            if block is None:
+                for idx in nulls:
+                    values[idx] = None
+                self._promote()
+            else:
+                self.nulls.update(start + idx for idx in nulls)
+                values = block
+        self.values.extend(values)
+        self.labels.update((start + idx, l) for idx, l in labels.items())
+        self.options.update((start + idx, o) for idx, o in options.items())
+
+    def truncate(self, size):
+        """Remove the values after the first `size`"""
+        if len(self.values) > size:
+            if not isinstance(self.values, (array, list)):
+                self._promote()
+            del self.values[size:]
+            self.nulls = set(idx for idx in self.nulls if idx < size)
+        _truncate(self.labels, size)
+        _truncate(self.options, size)
+
+    def __getitem__(self, idx):
+        if idx in self.nulls:
+            return None
+        if not isinstance(self.values, (array, list)):
+            return self.slice(idx, idx + 1)[0]
+        return self.values[idx]
+
+    def parts(self, idx):
+        return self[idx], self.labels.get(idx), self.options.get(idx)
+
+    def serializer(self, func):
+        """The serializer for the column given the one for its type"""
+        return func
+
+    def take(self, positions):
+        """A list of the values at positions"""
+        values = self.values
+        if getattr(values, 'dtype', None) is not None:
+            return values[list(positions)].tolist()
+        nulls = self.nulls
+        if nulls:
+            return [None if idx in nulls else values[idx] for idx in positions]
+        return [values[idx] for idx in positions]
+
+    def slice(self, start, stop):
+        """A list of the values between two positions"""
+        values = self.values[start:stop]
+        if not isinstance(values, list):
+            values = values.tolist()
+        if self.nulls:
+            nulls = self.nulls
+            values = [None if idx in nulls else value
+                      for idx, value in enumerate(values, start)]
+        return values
+
+
+class DictionaryData(object):
+    """
+    The values of a string column as integer codes into a dictionary of
+    distinct values. Missing values have the code -1. The JSON of each
+    distinct value is kept once it has been encoded.
+    """
+
+    __slots__ = ('codes', 'dictionary', 'lookup', 'encoded', 'labels',
+                 'options')
+
+    def __init__(self, typ=str):
+        self.codes = array('i')
+        self.dictionary = []
+        self.lookup = {}
+        self.encoded = {}
+        self.labels = {}
+        self.options = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _code(self, value):
+        if value is None:
+            return -1
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        return code
+
+    def append(self, value, label=None, options=None):
+        idx = len(self.codes)
+        self.codes.append(self._code(value))
+        if label is not None:
+            self.labels[idx] = label
+        if options is not None:
+            self.options[idx] = options
+
+    def extend(self, values, labels, options):
+        """
+        Add validated values with labels and options keyed by their position
+        in `values`
+        """
+        start = len(self.codes)
+        code = self._code
+        self.codes.extend(array('i', [code(value) for value in values]))
+        self.labels.update((start + idx, l) for idx, l in labels.items())
+        self.options.update((start + idx, o) for idx, o in options.items())
+
+    def truncate(self, size):
+        """Remove the values after the first `size`"""
+        del self.codes[size:]
+        _truncate(self.labels, size)
+        _truncate(self.options, size)
+
+    def __getitem__(self, idx):
+        code = self.codes[idx]
+        return self.dictionary[code] if code >= 0 else None
+
+    def parts(self, idx):
+        return self[idx], self.labels.get(idx), self.options.get(idx)
+
+    def serializer(self, func):
+        """
+        The serializer for the column given the one for its type. Distinct
+        values are only encoded the first time they are seen.
+        """
+        encoded = self.encoded
+
+        def serialize(values):
+            missing = [value for value in set(values) if value not in encoded]
+            if missing:
+                encoded.update(zip(missing, func(missing)))
+            return [encoded[value] for value in values]
+        return serialize
+
+    def take(self, positions):
+        """A list of the values at positions"""
+        dictionary = self.dictionary
+        codes = self.codes
+        return [dictionary[codes[idx]] if codes[idx] >= 0 else None
+                for idx in positions]
+
+    def slice(self, start, stop):
+        """A list of the values between two positions"""
+        dictionary = self.dictionary
+        return [dictionary[code] if code >= 0 else None
+                for code in self.codes[start:stop]]
+
+    def info(self):
+        """
+        Memory used by the codes and the dictionary compared with a list
+        holding a string for every value
+        """
+        size = len(self.codes)
+        counts = [0] * len(self.dictionary)
+        for code in self.codes:
+            if code >= 0:
+                counts[code] += 1
+        strings = [sys.getsizeof(value) for value in self.dictionary]
+        used = (sys.getsizeof(self.codes) + sys.getsizeof(self.dictionary)
+                + sys.getsizeof(self.lookup) + sum(strings)
+                + sys.getsizeof(self.encoded)
+                + sum(sys.getsizeof(e) for e in self.encoded.values()))
+        plain = sys.getsizeof([None] * size) + sum(
+            count * length for count, length in zip(counts, strings))
+        return DictionaryInfo(size, len(self.dictionary), used, plain)
+
+
+class ColumnStore(object):
+    """Each column is held separately in a `ColumnData` container"""
+
+    def __init__(self, schema, owner=None):
+        self.schema = schema
+        self.owner = owner
+        self.columns = [self.container(col.type) for col in schema.values()]
+        self.pool = OptionsPool()
+        self.extras = []
+        self.size = 0
+        self._fragments = []
+
+    def __len__(self):
+        return self.size
+
+    def container(self, typ):
+        """The container for the values of a column"""
+        return ColumnData(typ)
+
+    def serializers(self, funcs):
+        """Serializers for each column given those for their types"""
+        return [data.serializer(f) for data, f in zip(self.columns, funcs)]
+
+    def append(self, row):
+        """
+        Add a row of validated (value, label, options) tuples
+        """
+        try:
+            for data, (value, label, options) in zip(self.columns, row):
+                data.append(value, label, options)
+        except Exception:
+            self._truncate()
+            raise
+        if any(label is not None or options is not None
+               for value, label, options in row):
+            self.extras.append(self.size)
+        self.size += 1
+
+    def load(self, size, columns):
+        """
+        Load validated columns into an empty store. NumPy arrays and buffers
+        are used as they are, lists of values are copied.
+        """
+        if self.size:
+            raise ValueError("Columns can only be loaded into empty tables")
+        for data, values in zip(self.columns, columns):
+            if isinstance(values, list):
+                data.extend(values, {}, {})
+            else:
+                data.values = as_buffer(values)
+        self.size = size
+
+    def extend(self, size, columns):
+        """
+        Add `size` validated rows given as (values, labels, options) for
+        each column. Labels and options are dictionaries keyed by row.
+        """
+        extras = set()
+        try:
+            for data, (values, labels, options) in zip(self.columns, columns):
+                data.extend(values, labels, options)
+                extras.update(labels)
+                extras.update(options)
+        except Exception:
+            self._truncate()
+            raise
+        self.extras.extend(sorted(self.size + idx for idx in extras))
+        self.size += size
+
+    def _truncate(self):
+        """
+        Remove values added to some columns but not others, keeping the
+        columns aligned when a row cannot be stored
+        """
+        for data in self.columns:
+            data.truncate(self.size)
+
+    def cells(self, idx):
+        """Create the cells of a row"""
+        cells = OrderedDict()
+        for col, data in zip(self.schema.values(), self.columns):
+            cells[col.id] = Cell.trusted(col.type, *data.parts(idx))
+        return cells
+
+    @property
+    def rows(self):
+        return RowsView(self)
+
+    def fragments(self):
+        """
+        Encoded JSON of each row, None for rows which have not been encoded
+        """
+        return self._fragments + [None] * (self.size - len(self._fragments))
+
+    def set_fragments(self, start, fragments):
+        if start > len(self._fragments):
+            self._fragments.extend([None] * (start - len(self._fragments)))
+        self._fragments[start:start + len(fragments)] = fragments
+
+    def iter_chunks(self, size=1000, offset=0, positions=None, misfits=None):
+        """
+        Rows from `offset` in chunks of `size` as (length, columns, extras).
+        Columns are lists of the values in the chunk. Extras map the position
+        of rows in the chunk with labels or options to the (label, options)
+        of each cell. If `positions` are given the rows at those positions
+        are read in that order. Rows always match the schema, so `misfits`
+        is left empty.
+        """
+        if positions is not None:
+            for chunk in self._iter_positions(size, offset, positions):
+                yield chunk
+            return
+        for start in range(offset, self.size, size):
+            stop = min(start + size, self.size)
+            columns = [data.slice(start, stop) for data in self.columns]
+            extras = {}
+            first = bisect.bisect_left(self.extras, start)
+            last = bisect.bisect_left(self.extras, stop)
+            for idx in self.extras[first:last]:
+                extras[idx - start] = [
+                    (data.labels.get(idx), data.options.get(idx))
+                    for data in self.columns]
+            yield stop - start, columns, extras
+
+    def _iter_positions(self, size, offset, positions):
+        extras = set(self.extras)
+        for start in range(offset, len(positions), size):
+            chunk = positions[start:start + size]
+            columns = [data.take(chunk) for data in self.columns]
+            found = {}
+            if extras:
+                for pos, idx in enumerate(chunk):
+                    if idx in extras:
+                        found[pos] = [
+                            (data.labels.get(idx), data.options.get(idx))
+                            for data in self.columns]
+            yield len(chunk), columns, found
+
+    def encodable(self):
+        """Rows as dictionaries for JSON encoding"""
+        for idx in range(self.size):
+            yield {"c":[cell_dict(*data.parts(idx)) for data in self.columns]}
+
+
+class DictionaryStore(ColumnStore):
+    """
+    Columnar storage with string columns held as integer codes into a
+    dictionary of their distinct values, for columns with many repeated
+    strings
+    """
+
+    def container(self, typ):
+        if typ in (str, unicode):
+            return DictionaryData(typ)
+        return ColumnData(typ)
+
+    def dictionary_info(self):
+        """`DictionaryInfo` of each dictionary encoded column by id"""
+        return OrderedDict(
+            (col.id, data.info())
+            for col, data in zip(self.schema.values(), self.columns)
+            if isinstance(data, DictionaryData))
+
+
+class RowsView(object):
+    """
+    Read-only sequence of rows from a `ColumnStore`.
+
+    Cells are created on access and changing them does not change the table.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.store.cells(i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("Row index out of range")
+        return self.store.cells(idx)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.store.cells(idx)
@@ -3,10 +3,95 @@ try:
 except ImportError:
     from ordereddict import OrderedDict
 
-import sys
+import copy
+import itertools
+from collections import namedtuple
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 from .cell import Cell
-from .column import Column
+from .column import Column, basestring, compile_validators
+from .storage import RowStore, ColumnStore, DictionaryStore
+
+
+stores = {'rows':RowStore, 'columnar':ColumnStore,
+          'dictionary':DictionaryStore}
+
+validations = ('strict', 'sampled', 'trusted')
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size')
+
+
+class InvalidRows(ValueError):
+    """
+    Raised when rows added in a batch are invalid. `rows` are the indexes of
+    the invalid rows in the batch.
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows)
+        ValueError.__init__(self, "Invalid rows: {0}".format(
+            ", ".join(str(idx) for idx in self.rows)))
+
+
+def _join_chunks(chunks):
+    """Join encoded chunks"""
+    return "".join(chunks)
+
+
+def column_dict(col, type=None):
+    """
+    The definition of a column as given to `Table`, for tables computed
+    from other tables. `type` replaces the type of the column and options
+    are copied.
+    """
+    return dict(id=col.id, type=type or col.type, label=col._label,
+                options=copy.deepcopy(col.options))
+
+
+def _cell_args(value, label=None, options=None):
+    return value, label, options
+
+
+def _cell_parts(cell):
+    """The (value, label, options) of a cell"""
+    if isinstance(cell, Cell):
+        return cell.value, cell.label, cell.options
+    return cell
+
+
+def unpack(value):
+    """
+    Convert a cell in any of the supported forms to a (value, label, options)
+    tuple
+    """
+    if isinstance(value, tuple):
+        return _cell_args(*value)
+    elif isinstance(value, dict):
+        return _cell_args(**value)
+    return value, None, None
+
+
+def split(values):
+    """
+    Split a column of cells into a list of values and dictionaries of
+    labels and options keyed by position
+    """
+    values = list(values)
+    labels = {}
+    options = {}
+    if any(issubclass(t, (tuple, dict)) for t in set(map(type, values))):
+        for idx, value in enumerate(values):
+            if isinstance(value, (tuple, dict)):
+                values[idx], label, opts = unpack(value)
+                if label is not None:
+                    labels[idx] = label
+                if opts is not None:
+                    options[idx] = opts
+    return values, labels, options
 
 
 class Table(object):
@@ -16,36 +101,168 @@ class Table(object):
     Columns are ordered dictionaries of id, label and data type.
 
     Rows are ordered dictionaries mirroring columns.
+
+    By default rows are stored as cells. Large tables can use
+    `storage='columnar'` which keeps the values of each column in a compact
+    container and only creates cells when rows are read.
+    `storage='dictionary'` is columnar storage which also keeps string
+    columns as codes into a dictionary of their distinct values.
+
+    Tables created with `cache=True` keep their encoded JSON until they or
+    their cells change. Tables created with `append_only=True` encode rows
+    as they are added and keep the JSON of each row until one of its cells
+    changes.
+
+    Added rows are checked against the schema. With `validation='sampled'`
+    only every `sample_every`-th row is checked and with
+    `validation='trusted'` none are, for data from typed sources.
     """
 
     __gviz__version = 0.6
 
-    def __init__(self, schema=None, options=None):
+    def __init__(self, schema=None, options=None, storage='rows', cache=False,
+                 append_only=False, validation='strict', sample_every=100):
         """Sample schema
         ({'id':'name', 'type':'string', 'label':'Name', 'options':{} },
          {'id':'age', 'type':'number',}
         )
 
         """
-        self.rows = []
-        self.schema = OrderedDict()
+        self._setup(storage, validation, sample_every, cache, append_only)
         if schema is not None:
             for col in schema:
-                self.add_column(**col)
+                self._add_column(**col)
+        self._validators = compile_validators(self.schema)
+        self._store = stores[storage](self.schema, self)
         self.options = options
 
+    def _setup(self, storage, validation, sample_every, cache=False,
+               append_only=False):
+        """Check the settings of a new table or view, which has no columns"""
+        if storage not in stores:
+            raise ValueError("{0} storage not supported".format(storage))
+        if validation not in validations:
+            raise ValueError("{0} validation not supported".format(validation))
+        if sample_every < 1:
+            raise ValueError("Sampling must be at least every row")
+        self.storage = storage
+        self.validation = validation
+        self.sample_every = sample_every
+        self.schema = OrderedDict()
+        self._cache = {} if cache else None
+        self.append_only = append_only
+        self._hits = self._misses = 0
+        self._changes = 0
+        self._signature = None
+        self._indexes = {}
+        self._sort = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # validators are closures, which cannot be pickled
+        del state['_validators']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._validators = compile_validators(self.schema)
+
+    @property
+    def rows(self):
+        """
+        Rows of cells. For columnar tables this is a read-only sequence.
+        """
+        return self._store.rows
+
+    @rows.setter
+    def rows(self, rows):
+        """
+        Replace all rows. Rows are given as for `extend` or as mappings of
+        column ids to cells, such as the rows of another table.
+        """
+        rows = [[_cell_parts(row[key]) for key in self.schema]
+                if isinstance(row, Mapping) else row for row in rows]
+        store = self._store
+        self.clear()
+        try:
+            self.extend(rows)
+        except ValueError:
+            self._store = store
+            self._changed()
+            raise
+
     def add_column(self, id, type, label=None, options=None):
         """
         Add a new column
 
         Columns cannot be added to tables which already contain data.
         """
+        if len(self._store):
+            raise ValueError("Cannot add columns to tables already containing data")
+        self._add_column(id, type, label, options)
+        self._validators = compile_validators(self.schema)
+        self._store = stores[self.storage](self.schema, self)
+        self._changed()
+
+    def _add_column(self, id, type, label=None, options=None):
         if id in self.schema:
             raise ValueError("Duplicate column ids '{0}'".format(id))
         column = Column(id, type, label, options)
         self.schema[column.id] = column
-        if len(self.rows):
-            raise ValueError("Cannot add columns to tables already containing data")
+
+    def clear(self):
+        """
+        Remove all rows
+        """
+        self._store = stores[self.storage](self.schema, self)
+        self._changed()
+
+    def _changed(self):
+        """
+        Called whenever the table, its rows or its cells change
+        """
+        self._changes += 1
+        if self._cache:
+            self._cache.clear()
+
+    def cache_info(self):
+        """
+        Hits and misses of the cache of encoded output and the number of
+        items in it
+        """
+        size = len(self._cache) if self._cache is not None else 0
+        return CacheInfo(self._hits, self._misses, size)
+
+    def dictionary_info(self):
+        """
+        Size, number of distinct values and memory in bytes of each
+        dictionary encoded column, compared with the memory of a list of
+        strings, by column id
+        """
+        info = getattr(self._store, 'dictionary_info', None)
+        return info() if info is not None else OrderedDict()
+
+    def _cached(self, key, chunks):
+        """
+        Chunks of encoded output. If caching is enabled this is a single
+        chunk from the cache or the chunks are joined and cached.
+        """
+        if self._cache is None:
+            return chunks
+        if key in self._cache:
+            self._hits += 1
+            return iter([self._cache[key]])
+        self._misses += 1
+        return self._caching(key, chunks)
+
+    def _caching(self, key, chunks):
+        changes = self._changes
+        encoded = []
+        for chunk in chunks:
+            encoded.append(chunk)
+            yield chunk
+        if changes == self._changes:
+            self._cache[key] = "".join(encoded)
 
     @property
     def options(self):
@@ -59,23 +276,7 @@ class Table(object):
         if options is not None and not isinstance(options, dict):
             raise ValueError("Options must be a dictionary")
         self._options = options
-
-    def _append(self, row):
-        """
-        Convert incoming data into table cells
-        """
-        cols = self.schema.values()
-        cells = OrderedDict()
-        for col, value in zip(cols, row):
-            if isinstance(value, tuple):
-                cell = Cell(*(col.type,) + value)
-            elif isinstance(value, dict):
-                value['typ'] = col.type
-                cell = Cell(**value)
-            else:
-                cell = Cell(col.type, value)
-            cells[col.id] = cell
-        return cells
+        self._changed()
 
     def append(self, row):
         """
@@ -90,16 +291,300 @@ class Table(object):
         """
         if len(row) != len(self.schema):
             raise ValueError("Row length does not match number of columns")
-        self.rows.append(self._append(row))
+        row = [unpack(value) for value in row]
+        if self._sample(len(self._store), 1):
+            self._validate(row)
+        changes = self._changes
+        self._store.append(row)
+        self._changed()
+        self._index(changes, len(self._store) - 1,
+                    [[value for value, l, o in row]])
+        if self.append_only:
+            self._encode_rows(len(self._store) - 1)
 
     def extend(self, rows):
-        """Add multiple rows of data"""
-        for row in rows:
-            self.append(row)
+        """
+        Add multiple rows of data.
+
+        Rows can also be given as a dictionary of column ids and sequences
+        of cells. The batch is checked one column at a time and either all
+        rows are added or, if any are invalid, none are and `InvalidRows`
+        is raised with the indexes of every invalid row.
+        """
+        if isinstance(rows, dict):
+            if set(rows) != set(self.schema):
+                raise ValueError("Columns do not match the table columns")
+            columns = [list(rows[key]) for key in self.schema]
+            sizes = set(len(values) for values in columns)
+            if len(sizes) > 1:
+                raise ValueError("Columns must all have the same length")
+            size = sizes.pop() if sizes else 0
+        else:
+            rows = list(rows)
+            width = len(self.schema)
+            bad = [idx for idx, row in enumerate(rows) if len(row) != width]
+            if bad:
+                raise InvalidRows(bad)
+            columns = list(zip(*rows)) or [()] * width
+            size = len(rows)
+
+        start = len(self._store)
+        sample = self._sample(start, size)
+        bad = set()
+        batch = []
+        for col, cells in zip(self.schema.values(), columns):
+            values, labels, options = split(cells)
+            if sample is not None:
+                first, step = sample.start, sample.step
+                bad.update(first + idx * step
+                           for idx in col.invalid(values[sample]))
+                bad.update(idx for idx, opts in options.items()
+                           if not isinstance(opts, dict)
+                           and (idx - first) % step == 0)
+            batch.append((values, labels, options))
+        if bad:
+            raise InvalidRows(bad)
+        changes = self._changes
+        self._store.extend(size, batch)
+        self._changed()
+        self._index(changes, start, zip(*[values for values, l, o in batch])
+                    if batch else [()] * size)
+        if self.append_only:
+            self._encode_rows(start)
+
+    def _validate(self, row):
+        """Check a row of (value, label, options) tuples"""
+        for validate, (value, label, options) in zip(self._validators, row):
+            validate(value)
+            if options is not None and not isinstance(options, dict):
+                raise ValueError("Options must be a dictionary")
+
+    def _sample(self, start, size):
+        """
+        A slice of the positions in a batch of `size` rows added at `start`
+        which are validated, None if none are
+        """
+        if self.validation == 'trusted':
+            return None
+        if self.validation == 'strict':
+            return slice(0, None, 1)
+        first = -start % self.sample_every
+        if first >= size:
+            return None
+        return slice(first, None, self.sample_every)
+
+    def sort(self, keys, descending=False):
+        """
+        Encode and write rows ordered by the values of the `keys` columns.
+        `descending` is a boolean or a sequence of booleans, one per key.
+        Missing values come first in ascending order and last in descending
+        order.
+
+        Rows are not moved, instead an index of their positions is kept and
+        updated as rows are added. Indexes are kept for sorting by the same
+        keys again. `sort(None)` restores the order rows were added in.
+        """
+        if keys is None:
+            self._sort = None
+            self._reordered()
+            return
+        from .index import SortIndex
+        if isinstance(keys, basestring):
+            keys = [keys]
+        if isinstance(descending, bool):
+            descending = [descending] * len(keys)
+        if len(descending) != len(keys):
+            raise ValueError("descending must be given for every key")
+        ids = list(self.schema)
+        for key in keys:
+            if key not in self.schema:
+                raise ValueError("Unknown column '{0}'".format(key))
+        sort = (tuple(ids.index(key) for key in keys),
+                tuple(bool(d) for d in descending))
+        if sort not in self._indexes:
+            types = [self.schema[key].type for key in keys]
+            self._indexes[sort] = SortIndex(sort[0], sort[1], types)
+        self._sort = sort
+        self._reordered()
+
+    def _reordered(self):
+        """The order of rows changed but not their values"""
+        current = [index for index in self._indexes.values()
+                   if index.changes == self._changes]
+        self._changed()
+        for index in current:
+            index.changes = self._changes
+
+    def _index(self, changes, start, rows):
+        """
+        Add rows of values added at `start` to the indexes which were up to
+        date before they were added
+        """
+        current = [index for index in self._indexes.values()
+                   if index.changes == changes]
+        if not current:
+            return
+        rows = list(rows)
+        for index in current:
+            index.insert_all(start, rows)
+            index.changes = self._changes
+
+    def _order(self):
+        """
+        Positions of rows in the order they are encoded, None for the order
+        they were added in
+        """
+        if self._sort is None:
+            return None
+        index = self._indexes[self._sort]
+        if index.changes != self._changes:
+            index.build(values for values, extras in self._records())
+            index.changes = self._changes
+        return index.positions
+
+    def _encode_rows(self, start):
+        """Encode and keep the rows from `start`"""
+        from .encoder import encode_rows
+        self._store.set_fragments(start, encode_rows(self, start))
+
+    @classmethod
+    def from_cursor(cls, cursor, batch_size=1000, types=None, **kwargs):
+        """
+        Create a table from an executed DB-API cursor.
+
+        Rows are fetched `batch_size` at a time. Column types are taken from
+        `types`, a sequence or a dictionary of column names and types, or
+        inferred from the first batch of rows, and more batches if a column
+        has no values in it. Other keyword arguments are passed to the table.
+        """
+        from .dbapi import from_cursor
+        return from_cursor(cls, cursor, batch_size, types, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path_or_fp, dialect='excel', header=True, types=None,
+                 sample_size=100, batch_size=1000, encoding='utf-8', **kwargs):
+        """
+        Create a table from a CSV file or a path to one.
+
+        The file is read `batch_size` rows at a time. Column ids are taken
+        from the header and types from `types`, a sequence or a dictionary
+        of column ids and types, or inferred from the first `sample_size`
+        rows as numbers, booleans, dates (YYYY-MM-DD), datetimes, times
+        (HH:MM:SS) or strings. Other keyword arguments are passed to the
+        table.
+        """
+        from .readers import from_csv
+        return from_csv(cls, path_or_fp, dialect, header, types, sample_size,
+                        batch_size, encoding, **kwargs)
+
+    @classmethod
+    def from_columns(cls, columns, types=None, options=None):
+        """
+        Create a columnar table from a dictionary of column ids and
+        sequences of values.
+
+        NumPy arrays and objects supporting the buffer protocol are used as
+        column storage without being copied, their types come from the dtype
+        or format. Other sequences are lists of values, their types are taken
+        from `types` or inferred.
+        """
+        from .dbapi import infer_type
+        from .storage import buffer_type
+        types = types or {}
+        table = cls(options=options, storage='columnar')
+        loaded = []
+        for key, values in columns.items():
+            typ = buffer_type(values)
+            if typ is None:
+                values = list(values)
+                typ = types.get(key) or infer_type(values)
+            elif types.get(key, typ) is not typ:
+                raise ValueError("{0} expected, {1} received".format(
+                    types[key], typ))
+            table.add_column(key, typ)
+            loaded.append(values)
+        sizes = set(len(values) for values in loaded)
+        if len(sizes) > 1:
+            raise ValueError("Columns must all have the same length")
+        bad = set()
+        for col, values in zip(table.schema.values(), loaded):
+            if isinstance(values, list):
+                bad.update(col.invalid(values))
+        if bad:
+            raise InvalidRows(bad)
+        table._store.load(sizes.pop() if sizes else 0, loaded)
+        table._changed()
+        return table
+
+    def _records(self, chunk_rows=1000):
+        """
+        Rows as (values, extras) where values is a tuple and extras is
+        None or the (label, options) of each cell
+        """
+        for length, columns, extras in self._store.iter_chunks(chunk_rows):
+            rows = zip(*columns) if columns else [()] * length
+            for idx, values in enumerate(rows):
+                yield values, extras.get(idx)
+
+    def view(self, rows=None, columns=None):
+        """
+        A read-only view of some rows and columns of the table without
+        copying them, see `view.TableView`
+        """
+        from .view import TableView
+        return TableView(self, rows, columns)
+
+    def group_by(self, keys, aggregations):
+        """
+        Group rows by the values of the `keys` columns and aggregate other
+        columns, e.g. ``table.group_by('dept', {'salary':['sum', 'avg']})``.
+        Aggregates are count, sum, avg, min and max. Returns a new table, see
+        `aggregate.group_by`.
+        """
+        from .aggregate import group_by
+        return group_by(self, keys, aggregations)
+
+    def pivot(self, index, columns, values, agg='sum'):
+        """
+        Aggregate the `values` column for each distinct value of the `index`
+        columns, with a new column for each distinct value of the `columns`
+        column. Returns a new table, see `aggregate.pivot`.
+        """
+        from .aggregate import pivot
+        return pivot(self, index, columns, values, agg)
+
+    def join(self, other, on, how='inner'):
+        """
+        Join the rows of the table and another table with equal values in
+        the `on` columns. `how` is inner, left or outer. Returns a new table,
+        see `join.join`.
+        """
+        from .join import join as hash_join
+        return hash_join(self, other, on, how)
+
+    def downsample(self, x_col, y_cols, target_points, method='lttb'):
+        """
+        Reduce a series to at most `target_points` rows for charting, with
+        method lttb, minmax or avg. Returns a new table with the same
+        columns, see `downsample.downsample`.
+        """
+        from .downsample import downsample
+        return downsample(self, x_col, y_cols, target_points, method)
+
+    def query(self, tq):
+        """
+        Run a Google Visualization Query Language query against the table
+        and return the result as a new table
+        """
+        from .query import query
+        return query(self, tq)
 
     def __iter__(self):
         """Dictionary interface for JSON encoding"""
-        rows = [{"c":list(r.values())} for r in self.rows]
+        rows = list(self._store.encodable())
+        order = self._order()
+        if order is not None:
+            rows = [rows[idx] for idx in order]
         cols = list(self.schema.values())
         js = ['cols', 'rows', 'p']
         for k, v in zip(js, [cols, rows, self.options]):
@@ -110,18 +595,138 @@ class Table(object):
         """
         Convenience method for encoding tables
         """
-        from .encoder import encode
-        return encode(self)
+        return _join_chunks(list(self.iter_encode()))
 
-    def source(self):
+    def iter_encode(self, chunk_rows=1000, encoding=None):
         """
-        Convenience method for encoding a table as a static JSON data source.
-        This only wraps the table in the API.
+        Encode the table as JSON in chunks of `chunk_rows` rows.
+
+        If an encoding is given the chunks are bytes, suitable for returning
+        from a WSGI application.
+        """
+        from .encoder import iterencode
+        chunks = self._cached('table', iterencode(self, chunk_rows))
+        for chunk in chunks:
+            if encoding is not None:
+                chunk = chunk.encode(encoding)
+            yield chunk
+
+    def dump(self, fp, chunk_rows=1000, out='json'):
+        """
+        Write the table to a file-like object as JSON or, with `out`, as
+        csv, tsv-excel or html
         """
+        if out != 'json':
+            from .writers import write
+            return write(self, fp, out, chunk_rows)
+        for chunk in self.iter_encode(chunk_rows):
+            fp.write(chunk)
+
+    def signature(self):
+        """
+        Signature of the encoded table, kept until the table or its cells
+        change
+        """
+        sig = self._current_signature()
+        if sig is None:
+            from .datasource import signature
+            changes = self._changes
+            sig = signature(self.iter_encode())
+            self._signature = (changes, sig)
+        return sig
+
+    def _current_signature(self):
+        """The kept signature if the table has not changed since, or None"""
+        if self._signature is not None and self._signature[0] == self._changes:
+            return self._signature[1]
+
+    def _signing(self, chunks):
+        """
+        Encoded table chunks followed by the end of a data source response
+        with their signature, which is kept
+        """
+        from .datasource import signed
         from .encoder import encode
+        changes = self._changes
+        sigs = []
+        for chunk in signed(chunks, sigs.append):
+            yield chunk
+        if changes == self._changes:
+            self._signature = (changes, sigs[0])
+        yield ', "sig": %s})' % encode(sigs[0])
+
+    def _response(self, params=None):
+        params = params or {}
         d = {}
         d['status'] = "OK"
-        d['reqId'] = 0
+        d['reqId'] = params.get('reqId', 0)
         d['version'] = self.__gviz__version
-        d['table'] = self
-        return  'google.visualization.Query.setResponse(%s)' % encode(d)
+        return d
+
+    def iter_source(self, chunk_rows=1000, encoding=None, tqx=None):
+        """
+        Encode the table as a static JSON data source in chunks.
+
+        `tqx` is the data source request parameter, either a string or a
+        dictionary. Responses to requests include the reqId and a signature
+        of the table. If the request signature matches the table is not
+        encoded and the response is `not_modified`. Requests for csv,
+        tsv-excel or html output get the table in that format.
+        """
+        from .datasource import HANDLER, parse_tqx, not_modified, signature
+        from .encoder import encode, iterencode
+        params = parse_tqx(tqx)
+        if params.get('out', 'json') != 'json':
+            from .writers import writers
+            for chunk in writers[params['out']](self, chunk_rows):
+                yield chunk if encoding is None else chunk.encode(encoding)
+            return
+        handler = params.get('responseHandler', HANDLER)
+        response = self._response(params)
+        table = None
+        sig = None
+        if tqx is not None:
+            sig = self._current_signature()
+            if sig is None and 'sig' in params:
+                # encode once for the signature and the response
+                table = list(iterencode(self, chunk_rows))
+                sig = signature(table)
+                self._signature = (self._changes, sig)
+            if sig is not None and params.get('sig') == sig:
+                response = not_modified(params, self.__gviz__version)
+                chunk = '%s(%s)' % (handler, encode(response))
+                yield chunk if encoding is None else chunk.encode(encoding)
+                return
+        if table is None:
+            table = iterencode(self, chunk_rows)
+        # the signature follows the table, so it can be computed while the
+        # table is encoded
+        if tqx is None:
+            tail = ['})']
+        elif sig is None:
+            table, tail = self._signing(table), []
+        else:
+            tail = [', "sig": %s})' % encode(sig)]
+        head = encode(response)[:-1]
+        chunks = ['%s(%s, "table": ' % (handler, head)]
+        chunks = itertools.chain(chunks, table, tail)
+        key = ('source', handler, tqx is not None) + \
+            tuple(sorted(response.items()))
+        for chunk in self._cached(key, chunks):
+            if encoding is not None:
+                chunk = chunk.encode(encoding)
+            yield chunk
+
+    def source(self, fp=None, chunk_rows=1000, tqx=None):
+        """
+        Convenience method for encoding a table as a static JSON data source.
+        This only wraps the table in the API.
+
+        If a file-like object is given the data source is written to it
+        in chunks. `tqx` is the data source request parameter, see
+        `iter_source`.
+        """
+        if fp is None:
+            return _join_chunks(list(self.iter_source(tqx=tqx)))
+        for chunk in self.iter_source(chunk_rows, tqx=tqx):
+            fp.write(chunk)
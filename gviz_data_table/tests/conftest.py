@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture(params=['rows', 'columnar', 'dictionary'])
+def storage(request):
+    """Each storage engine in turn"""
+    return request.param
+
+
+def _values(table):
+    rows = list(table.rows)
+    order = table._order()
+    if order is not None:
+        rows = [rows[idx] for idx in order]
+    return [[cell.value for cell in row.values()] for row in rows]
+
+
+@pytest.fixture
+def values():
+    """
+    Function returning the values of the cells of each row of a table, in
+    the order the rows are encoded
+    """
+    return _values
@@ -0,0 +1,126 @@
+import datetime
+import pytest
+
+from gviz_data_table.aggregate import Groups, aggregation_pairs, result_type
+from gviz_data_table.table import Table
+
+
+@pytest.fixture
+def sales(storage):
+    schema = [{'id':'region', 'type':str, 'label':'Region'},
+              {'id':'amount', 'type':int},
+              {'id':'price', 'type':float},
+              {'id':'day', 'type':datetime.date}]
+    table = Table(schema, storage=storage)
+    table.extend([
+        ("north", 10, 1.5, datetime.date(2012, 1, 3)),
+        ("south", 5, None, datetime.date(2012, 1, 1)),
+        (("north", "North"), None, 2.5, datetime.date(2012, 1, 1)),
+        ("south", 7, 4.0, None),
+        (None, 1, 1.0, datetime.date(2012, 2, 1)),
+    ])
+    return table
+
+
+def test_result_type():
+    assert result_type('count', str) == int
+    assert result_type('avg', int) == float
+    assert result_type('sum', int) == int
+    assert result_type('max', datetime.date) == datetime.date
+    with pytest.raises(ValueError):
+        result_type('sum', datetime.date)
+    with pytest.raises(ValueError):
+        result_type('median', int)
+
+
+def test_aggregation_pairs():
+    assert aggregation_pairs([('a', 'sum')]) == [('a', 'sum')]
+    assert sorted(aggregation_pairs({'a':'sum', 'b':['min', 'max']})) == \
+        [('a', 'sum'), ('b', 'max'), ('b', 'min')]
+
+
+def test_groups():
+    groups = Groups([0], [1, 1], ['count', 'avg'])
+    for row in [("a", 1), ("b", None), ("a", 2)]:
+        groups.add(row)
+    assert list(groups.items()) == [(("a", ), [2, 1.5]), (("b", ), [0, None])]
+    assert groups.empty() == [0, None]
+
+
+def test_group_by(sales, values):
+    result = sales.group_by('region', [
+        ('amount', 'sum'), ('amount', 'count'), ('price', 'avg'),
+        ('price', 'max'), ('day', 'min'), ('day', 'max')])
+    assert list(result.schema) == ['region', 'sum-amount', 'count-amount',
+                                   'avg-price', 'max-price', 'min-day',
+                                   'max-day']
+    assert result.schema['region'].label == "Region"
+    assert result.schema['sum-amount'].type == int
+    assert result.schema['sum-amount'].label == "sum amount"
+    assert result.schema['avg-price'].type == float
+    assert result.schema['min-day'].type == datetime.date
+    assert values(result) == [
+        ["north", 10, 1, 2.0, 2.5, datetime.date(2012, 1, 1),
+         datetime.date(2012, 1, 3)],
+        ["south", 12, 2, 4.0, 4.0, datetime.date(2012, 1, 1),
+         datetime.date(2012, 1, 1)],
+        [None, 1, 1, 1.0, 1.0, datetime.date(2012, 2, 1),
+         datetime.date(2012, 2, 1)],
+    ]
+    assert result.storage == sales.storage
+
+
+def test_group_by_several_keys(sales, values):
+    result = sales.group_by(['region', 'day'], {'amount':'sum'})
+    assert len(result.rows) == 5
+    result = sales.group_by([], {'amount':['sum', 'min']})
+    assert values(result) == [[23, 1]]
+    sales.clear()
+    assert values(sales.group_by([], {'amount':'count'})) == [[0]]
+    assert values(sales.group_by('region', {'amount':'count'})) == []
+
+
+def test_group_by_errors(sales):
+    with pytest.raises(ValueError):
+        sales.group_by('city', {'amount':'sum'})
+    with pytest.raises(ValueError):
+        sales.group_by('region', {'day':'sum'})
+    with pytest.raises(ValueError):
+        sales.group_by('region', {'amount':'median'})
+
+
+def test_pivot(sales, values):
+    result = sales.pivot('region', 'day', 'amount')
+    assert list(result.schema) == ['region', '2012-01-03', '2012-01-01',
+                                   '', '2012-02-01']
+    assert result.schema['2012-01-01'].type == int
+    assert result.schema['2012-01-01'].label == '2012-01-01'
+    assert values(result) == [
+        ["north", 10, None, None, None],
+        ["south", None, 5, 7, None],
+        [None, None, None, None, 1],
+    ]
+
+
+def test_pivot_aggregate(sales, values):
+    result = sales.pivot(['day'], 'region', 'price', agg='avg')
+    assert list(result.schema) == ['day', 'north', 'south', '']
+    assert result.schema['north'].type == float
+    assert values(result)[1] == [datetime.date(2012, 1, 1), 2.5, None, None]
+    result = sales.pivot('region', 'region', 'amount', agg='count')
+    assert values(result)[0] == ["north", 1, None, None]
+
+
+def test_pivot_duplicate_ids():
+    table = Table([{'id':'name', 'type':str}, {'id':'series', 'type':str},
+                   {'id':'value', 'type':int}])
+    table.append(["a", "name", 1])
+    with pytest.raises(ValueError):
+        table.pivot('name', 'series', 'value')
+
+
+def test_pivot_errors(sales):
+    with pytest.raises(ValueError):
+        sales.pivot('region', 'city', 'amount')
+    with pytest.raises(ValueError):
+        sales.pivot('region', 'amount', 'day')
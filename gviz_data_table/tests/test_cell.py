@@ -54,3 +54,26 @@ def test_dictionary_valid_zero():
     c = Cell(int, 0, "Number")
     expected = dict(v=0, f="Number")
     assert dict(c) == expected
+
+def test_trusted():
+    c = Cell.trusted(int, 1, "One")
+    assert c.value == 1
+    assert c.label == "One"
+    assert c.options is None
+
+def test_owner():
+    changes = []
+
+    class Owner(object):
+        def _changed(self):
+            changes.append(True)
+
+    c = Cell(int, 1)
+    c._owner = Owner()
+    c.value = 2
+    c.label = "Two"
+    c.options = {}
+    assert len(changes) == 3
+    with pytest.raises(ValueError):
+        c.value = "a"
+    assert len(changes) == 3
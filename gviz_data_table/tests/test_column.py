@@ -12,6 +12,16 @@ def test_conditional():
             s = basestring
             s = unicode
 
+def test_imports():
+    """The compatibility names are importable on Python 2 and 3"""
+    import pkgutil
+    import gviz_data_table
+    from gviz_data_table import column
+    for name in ('basestring', 'unicode', 'long', 'NoneType'):
+        assert hasattr(column, name)
+    for loader, name, ispkg in pkgutil.iter_modules(gviz_data_table.__path__):
+        __import__('gviz_data_table.' + name)
+
 def test_constructor():
     col = Column(**minimal_schema)
     assert col.id == 'age'
@@ -62,3 +72,8 @@ def test_dictionary_interface():
     assert dict(col) == {'id':'age', 'type':'number', 'label':'Age',
                          'options':{'style':'bold', 'width':100, 'color':'red'}
                          }
+
+def test_invalid():
+    col = Column(**minimal_schema.copy())
+    assert col.invalid([1, None, 2]) == []
+    assert col.invalid([1, "a", 2.5, None]) == [1, 2]
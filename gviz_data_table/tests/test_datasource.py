@@ -0,0 +1,104 @@
+import json
+import pytest
+
+from gviz_data_table.datasource import parse_tqx, signature
+from gviz_data_table.table import Table
+
+
+def response(source, handler="google.visualization.Query.setResponse"):
+    assert source.startswith(handler + "(") and source.endswith(")")
+    return json.loads(source[len(handler) + 1:-1])
+
+
+@pytest.fixture
+def table():
+    table = Table([{'id':'name', 'type':str}, {'id':'age', 'type':int}])
+    table.append(["Jim", 30])
+    return table
+
+
+def test_parse_tqx():
+    assert parse_tqx(None) == {}
+    assert parse_tqx("") == {}
+    assert parse_tqx("reqId:1; sig:abc;out:json") == \
+        {'reqId':"1", 'sig':"abc", 'out':"json"}
+    assert parse_tqx({'reqId':2}) == {'reqId':2}
+    with pytest.raises(ValueError):
+        parse_tqx("reqId")
+    with pytest.raises(ValueError):
+        parse_tqx("out:pdf")
+    with pytest.raises(ValueError):
+        parse_tqx("responseHandler:alert(1);")
+
+
+def test_signature():
+    assert signature(["a", "b"]) == signature(["ab"])
+    assert signature(["a"]) != signature(["b"])
+
+
+def test_table_signature(table):
+    sig = table.signature()
+    assert sig == table.signature()
+    assert sig == signature([table.encode()])
+    table.rows[0]['age'].value = 31
+    assert table.signature() != sig
+
+
+def test_source_request(table):
+    result = response(table.source(tqx="reqId:7"))
+    assert result['reqId'] == "7"
+    assert result['status'] == "OK"
+    assert result['sig'] == table.signature()
+    assert result['table'] == json.loads(table.encode())
+
+
+def test_source_without_request(table):
+    assert 'sig' not in response(table.source())
+
+
+def test_not_modified(table):
+    sig = table.signature()
+    result = response(table.source(tqx="reqId:3;sig:%s" % sig))
+    assert result == {'status':"error", 'reqId':"3", 'version':0.6,
+                      'errors':[{'reason':"not_modified",
+                                 'message':"Data not modified"}]}
+    table.append(["Sally", 25])
+    result = response(table.source(tqx={'reqId':4, 'sig':sig}))
+    assert result['status'] == "OK"
+    assert len(result['table']['rows']) == 2
+
+
+def test_source_encodes_once(table, monkeypatch):
+    from gviz_data_table import encoder
+    calls = []
+
+    def iterencode(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    original = encoder.iterencode
+    monkeypatch.setattr(encoder, 'iterencode', iterencode)
+    result = response(table.source(tqx="reqId:1"))
+    assert len(calls) == 1
+    assert result['sig'] == signature([table.encode()])
+    del calls[:]
+    assert table.signature() == result['sig']
+    assert not calls
+    table.append(["Sally", 25])
+    result = response(table.source(tqx={'reqId':2, 'sig':result['sig']}))
+    assert len(calls) == 1
+    assert len(result['table']['rows']) == 2
+    assert result['sig'] == table.signature()
+    assert len(calls) == 1
+
+def test_response_handler(table):
+    source = table.source(tqx="responseHandler:my.handler")
+    assert response(source, "my.handler")['status'] == "OK"
+
+
+def test_cached_source():
+    table = Table([{'id':'name', 'type':str}], cache=True)
+    table.append(["Jim"])
+    first = table.source(tqx="reqId:1")
+    assert table.source(tqx="reqId:1") == first
+    assert table.source(tqx="reqId:1;responseHandler:f") != first
+    assert table.cache_info().hits == 1
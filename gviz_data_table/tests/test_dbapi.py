@@ -0,0 +1,95 @@
+import datetime
+import json
+import sqlite3
+import pytest
+
+from gviz_data_table.dbapi import infer_type, cursor_schema, iterencode_cursor
+from gviz_data_table.table import Table
+
+
+@pytest.fixture
+def cursor():
+    db = sqlite3.connect(":memory:")
+    c = db.cursor()
+    c.execute("CREATE TABLE employees (name TEXT, salary REAL, age INTEGER)")
+    c.executemany("INSERT INTO employees VALUES (?, ?, ?)",
+                  [("Jim", 50, 30), ("Bob", 80.5, None), ("Sally", None, 25)])
+    c.execute("SELECT name, salary, age FROM employees")
+    return c
+
+
+def test_infer_type():
+    assert infer_type([None, 1, 2]) == int
+    assert infer_type([1, 2.5]) == float
+    assert infer_type([True, False]) == bool
+    assert infer_type([datetime.datetime(2012, 1, 1)]) == datetime.datetime
+    assert infer_type([datetime.date(2012, 1, 1)]) == datetime.date
+    assert infer_type([None]) == str
+    with pytest.raises(ValueError):
+        infer_type([1, "a"])
+
+def test_cursor_schema():
+    description = (('name', None), ('age', int))
+    rows = [("Bob", None)]
+    assert cursor_schema(description, rows) == [{'id':'name', 'type':str},
+                                                {'id':'age', 'type':int}]
+    schema = cursor_schema(description, rows, {'name':bool})
+    assert schema[0]['type'] == bool
+    schema = cursor_schema(description, rows, [float, float])
+    assert schema[1]['type'] == float
+
+def test_from_cursor(cursor):
+    table = Table.from_cursor(cursor, batch_size=2)
+    assert [col.type for col in table.schema.values()] == [str, float, int]
+    assert len(table.rows) == 3
+    assert table.rows[0]['salary'].value == 50.0
+    assert table.rows[1]['age'].value is None
+
+def test_from_cursor_options(cursor):
+    table = Table.from_cursor(cursor, types={'age':float},
+                              storage='columnar', options={'foo':'bar'})
+    assert table.storage == 'columnar'
+    assert table.options == {'foo':'bar'}
+    assert table.rows[2]['age'].value == 25.0
+
+def test_from_cursor_empty():
+    db = sqlite3.connect(":memory:")
+    c = db.execute("SELECT 1 AS one WHERE 0")
+    table = Table.from_cursor(c)
+    assert table.schema['one'].type == str
+    assert len(table.rows) == 0
+
+def test_iterencode_cursor(cursor):
+    chunks = list(iterencode_cursor(cursor, batch_size=2))
+    assert len(chunks) == 4
+    cursor.execute("SELECT name, salary, age FROM employees")
+    assert "".join(chunks) == Table.from_cursor(cursor).encode()
+
+
+@pytest.mark.parametrize("encode", [False, True])
+def test_missing_first_batch(encode):
+    db = sqlite3.connect(":memory:")
+    c = db.cursor()
+    c.execute("CREATE TABLE t (name TEXT, score REAL)")
+    c.executemany("INSERT INTO t VALUES (?, ?)",
+                  [("a", None), ("b", None), ("c", 1), ("d", 2.5),
+                   ("e", None)])
+    c.execute("SELECT name, score FROM t")
+    if encode:
+        result = json.loads("".join(iterencode_cursor(c, batch_size=2)))
+        assert result['cols'][1]['type'] == "number"
+        assert [row['c'][1] for row in result['rows']] == \
+            [{}, {}, {'v':1.0}, {'v':2.5}, {}]
+    else:
+        table = Table.from_cursor(c, batch_size=2)
+        assert table.schema['score'].type is float
+        assert [row['score'].value for row in table.rows] == \
+            [None, None, 1.0, 2.5, None]
+
+def test_all_missing():
+    db = sqlite3.connect(":memory:")
+    c = db.cursor()
+    c.execute("SELECT NULL AS x UNION ALL SELECT NULL")
+    table = Table.from_cursor(c, batch_size=1)
+    assert table.schema['x'].type is str
+    assert len(table.rows) == 2
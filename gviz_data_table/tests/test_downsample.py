@@ -0,0 +1,142 @@
+import datetime
+import math
+
+import pytest
+
+from gviz_data_table import Table
+from gviz_data_table.downsample import _bounds
+
+
+def series(storage, size=100, x=int):
+    schema = [{'id':'x', 'type':x}, {'id':'y', 'type':float},
+              {'id':'n', 'type':int}, {'id':'name', 'type':str}]
+    table = Table(schema, storage=storage)
+    start = datetime.date(2020, 1, 1) if x is datetime.date else \
+        datetime.datetime(2020, 1, 1, 12)
+    for idx in range(size):
+        if x is int:
+            xv = idx
+        else:
+            xv = start + datetime.timedelta(days=idx)
+        table.append([xv, math.sin(idx / 5.0), idx, "p{0}".format(idx)])
+    return table
+
+
+def column(table, key):
+    return [row[key].value for row in table.rows]
+
+
+def test_bounds():
+    assert _bounds(0, 10, 3) == [0, 3, 6]
+    assert _bounds(1, 9, 4) == [1, 3, 5, 7]
+
+
+@pytest.mark.parametrize("x", [int, datetime.date, datetime.datetime])
+def test_lttb(storage, x):
+    table = series(storage, x=x)
+    result = table.downsample('x', 'y', 10)
+    assert list(result.schema) == list(table.schema)
+    assert result.schema['n'].type is int
+    positions = column(result, 'n')
+    assert len(positions) == 10
+    assert positions[0] == 0 and positions[-1] == 99
+    assert positions == sorted(positions)
+    assert column(result, 'name') == ["p{0}".format(p) for p in positions]
+
+
+def test_lttb_peak():
+    table = Table([{'id':'x', 'type':int}, {'id':'y', 'type':int}])
+    table.extend([[idx, 100 if idx == 37 else 0] for idx in range(100)])
+    assert 37 in column(table.downsample('x', 'y', 5), 'x')
+
+
+def test_minmax(storage):
+    table = series(storage)
+    result = table.downsample('x', ['y'], 20, method='minmax')
+    ys = column(result, 'y')
+    assert len(ys) == 20
+    assert max(ys) == max(column(table, 'y'))
+    assert min(ys) == min(column(table, 'y'))
+    assert column(result, 'x') == sorted(column(result, 'x'))
+
+
+def test_avg(storage):
+    table = series(storage, size=10)
+    result = table.downsample('x', ['y', 'n'], 2, method='avg')
+    assert column(result, 'n') == [2.0, 7.0]
+    assert result.schema['n'].type is float
+    assert column(result, 'x') == [2, 7]
+    assert column(result, 'y')[0] == pytest.approx(
+        sum(math.sin(idx / 5.0) for idx in range(5)) / 5)
+
+
+def test_missing_values():
+    table = Table([{'id':'x', 'type':int}, {'id':'y', 'type':float}])
+    table.extend([[idx, None if idx % 2 else float(idx)] for idx in range(20)])
+    assert len(table.downsample('x', 'y', 4, method='avg').rows) == 4
+    assert len(table.downsample('x', 'y', 4, method='minmax').rows) == 4
+    assert len(table.downsample('x', 'y', 4).rows) == 4
+    table.append([None, 1.0])
+    with pytest.raises(ValueError):
+        table.downsample('x', 'y', 4)
+
+
+def test_sorted():
+    table = Table([{'id':'x', 'type':int}, {'id':'y', 'type':int}])
+    table.extend([[idx, idx] for idx in range(20, 0, -1)])
+    table.sort('x')
+    xs = column(table.downsample('x', 'y', 3), 'x')
+    assert xs[0] == 1 and xs[-1] == 20 and xs == sorted(xs)
+
+
+def test_small(storage):
+    table = series(storage, size=5)
+    result = table.downsample('x', 'y', 10)
+    assert column(result, 'n') == [0, 1, 2, 3, 4]
+    assert result.schema['n'].type is int
+
+
+def test_labels():
+    table = Table([{'id':'x', 'type':int}, {'id':'y', 'type':int}])
+    table.extend([[idx, (idx, "y{0}".format(idx))] for idx in range(10)])
+    result = table.downsample('x', 'y', 3)
+    assert [row['y'].label for row in result.rows] == ["y0", "y1", "y9"]
+
+
+def test_errors():
+    table = series('rows', size=10)
+    with pytest.raises(ValueError):
+        table.downsample('x', 'y', 5, method='median')
+    with pytest.raises(ValueError):
+        table.downsample('name', 'y', 5)
+    with pytest.raises(ValueError):
+        table.downsample('x', 'name', 5)
+    with pytest.raises(ValueError):
+        table.downsample('x', 'x', 5)
+    with pytest.raises(ValueError):
+        table.downsample('x', [], 5)
+    with pytest.raises(ValueError):
+        table.downsample('x', 'y', 2)
+    with pytest.raises(ValueError):
+        table.downsample('x', ['y', 'n'], 3, method='minmax')
+
+
+def test_views(storage):
+    table = series(storage)
+    view = table.view(rows=slice(0, 50), columns=['x', 'y', 'n'])
+    result = view.downsample('x', 'y', 10)
+    positions = column(result, 'n')
+    assert len(positions) == 10
+    assert positions[0] == 0 and positions[-1] == 49
+    assert list(result.schema) == ['x', 'y', 'n']
+    assert result.validation == 'strict'
+    result = view.downsample('x', ['y', 'n'], 5, method='avg')
+    assert result.schema['n'].type is float
+
+
+def test_validation():
+    table = Table([{'id':'x', 'type':int}, {'id':'y', 'type':int}],
+                  validation='sampled', sample_every=3)
+    table.extend([[idx, idx] for idx in range(20)])
+    result = table.downsample('x', 'y', 4, method='avg')
+    assert (result.validation, result.sample_every) == ('sampled', 3)
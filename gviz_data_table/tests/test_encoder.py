@@ -44,6 +44,158 @@ def test_encode_table():
     python = json.loads(js)
     assert python == {'rows':[], 'cols':[]}
 
+@pytest.mark.parametrize('storage', ['rows', 'columnar'])
+def test_encode_rows(storage):
+    from gviz_data_table.table import Table
+    table = Table([{'id':'age', 'type':int}, {'id':'name', 'type':str}],
+                  storage=storage)
+    table.extend([[18, 'Bob'], [20, ('Sally', 'Sal')]])
+    assert json.loads(encode(table.rows[1])) == {
+        'age':{'v':20}, 'name':{'v':'Sally', 'f':'Sal'}}
+    assert json.loads(encode(table.rows)) == [
+        {'age':{'v':18}, 'name':{'v':'Bob'}},
+        {'age':{'v':20}, 'name':{'v':'Sally', 'f':'Sal'}}]
+
 def test_encode_unknown():
     with pytest.raises(TypeError):
         encode(object)
+
+def test_iterencode_table():
+    from gviz_data_table.encoder import iterencode
+    from gviz_data_table.table import Table
+    table = Table([{'id':'age', 'type':int}], options={'foo':'bar'})
+    table.extend([[1], [2], [3]])
+    chunks = list(iterencode(table, chunk_rows=2))
+    assert chunks[1:] == ['{"c": [{"v": 1}]}, {"c": [{"v": 2}]}',
+                          ', {"c": [{"v": 3}]}', '], "p": {"foo": "bar"}}']
+    assert "".join(chunks) == encode(table)
+
+def test_serializers_match_encoder():
+    from gviz_data_table.encoder import Encoder
+    from gviz_data_table.table import Table
+    schema = [{'id':'int', 'type':int}, {'id':'float', 'type':float},
+              {'id':'date', 'type':datetime.date},
+              {'id':'datetime', 'type':datetime.datetime},
+              {'id':'time', 'type':datetime.time},
+              {'id':'string', 'type':str}, {'id':'bool', 'type':bool}]
+    rows = [
+        [1, 1.5, datetime.date(2012, 1, 31),
+         datetime.datetime(2012, 1, 31, 12, 30, 45, 10),
+         datetime.time(10, 30, 45), u"caf\xe9 \"quoted\"", True],
+        [True, float('nan'), datetime.datetime(2012, 1, 31, 1, 2, 3),
+         None, None, None, False],
+        [2**70, float('inf'), None, None, datetime.time(0), "", None],
+        [(0, "zero"), -0.0, (datetime.date(2000, 12, 1), None, {'a':1}),
+         None, None, "plain", None],
+        [(None, "none", {'a':1}), (1.0, None, {'b':[1, 2]}),
+         (None, None, {'when':datetime.date(2012, 1, 1)}), None, None,
+         (u"\xe9", u"\xe9", {'a':1}), (True, 1)],
+    ]
+    for storage in ('rows', 'columnar', 'dictionary'):
+        table = Table(schema, storage=storage)
+        table.extend(rows)
+        assert table.encode() == Encoder().encode(table)
+
+def test_rows_not_matching_schema():
+    from gviz_data_table.cell import Cell
+    from gviz_data_table.encoder import Encoder
+    from gviz_data_table.table import Table
+    table = Table([{'id':'a', 'type':int}, {'id':'b', 'type':str}])
+    table.extend([[1, "x"], [2, "y"], [3, "z"]])
+    del table.rows[0]['b']
+    table.rows[1]['c'] = Cell(int, 5, "five")
+    del table.rows[2]['a']
+    rows = json.loads(table.encode())['rows']
+    assert rows == [{'c':[{'v':1}]},
+                    {'c':[{'v':2}, {'v':'y'}, {'v':5, 'f':'five'}]},
+                    {'c':[{'v':'z'}]}]
+    assert table.encode() == Encoder().encode(table)
+    assert "".join(table.iter_encode(chunk_rows=2)) == table.encode()
+
+def test_compile_serializers():
+    from gviz_data_table.encoder import compile_serializers, serializers
+    from gviz_data_table.table import Table
+    table = Table([{'id':'age', 'type':int}, {'id':'name', 'type':str}])
+    assert compile_serializers(table.schema) == [serializers['number'],
+                                                 serializers['string']]
+    assert serializers['number']([1, None]) == ['{"v": 1}', '{}']
+
+def test_date_cache():
+    from gviz_data_table.encoder import DateCache
+    cache = DateCache(maxsize=2)
+    days = [datetime.date(2012, 1, d) for d in (1, 2, 1, 2)]
+    assert cache.encode(days, datetime.date) == [
+        "Date(2012, 0, 1)", "Date(2012, 0, 2)", "Date(2012, 0, 1)",
+        "Date(2012, 0, 2)"]
+    assert cache.info() == (0, 2, 0, 2, 2)
+    assert cache.get(datetime.date(2012, 1, 1)) == "Date(2012, 0, 1)"
+    assert cache.info().hits == 1
+    # least recently used
+    cache.get(datetime.date(2012, 1, 3))
+    assert cache.info().evictions == 1
+    assert cache.get(datetime.date(2012, 1, 1)) == "Date(2012, 0, 1)"
+    assert cache.info().hits == 2
+    assert cache.get(datetime.time(1, 2, 3)) == [1, 2, 3]
+    assert cache.info().size == 3
+
+def test_date_cache_types():
+    from gviz_data_table.encoder import DateCache
+    cache = DateCache()
+    values = [datetime.date(2012, 1, 1), datetime.datetime(2012, 1, 1), None]
+    assert cache.encode(values, datetime.date) == ["Date(2012, 0, 1)", None,
+                                                   None]
+    assert cache.encode(values, datetime.datetime) == [
+        None, "Date(2012, 0, 1, 0, 0, 0)", None]
+
+def test_date_cache_distinct():
+    from gviz_data_table.encoder import DateCache
+    cache = DateCache()
+    cache.skip = 1
+    days = [datetime.date(2012, 1, d) for d in range(1, 11)]
+    assert cache.encode(days, datetime.date)[-1] == "Date(2012, 0, 10)"
+    assert cache.info().size == 0
+    assert cache.info().misses == 10
+    # the next column is converted without lookups
+    cache.encode(days, datetime.date)
+    assert cache.info().misses == 10
+    assert cache.encode(days[:2] * 2, datetime.date)[0] == "Date(2012, 0, 1)"
+    assert cache.info() == (0, 12, 0, 2, 4096)
+
+class FixedOffset(datetime.tzinfo):
+
+    def __init__(self, minutes):
+        self.offset = datetime.timedelta(minutes=minutes)
+
+    def utcoffset(self, dt):
+        return self.offset
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+def test_date_cache_aware():
+    from gviz_data_table.encoder import DateCache
+    cache = DateCache()
+    noon = datetime.datetime(2020, 1, 1, 12, tzinfo=FixedOffset(0))
+    one = datetime.datetime(2020, 1, 1, 13, tzinfo=FixedOffset(60))
+    assert noon == one
+    assert cache.encode([noon, noon], datetime.datetime) == [
+        "Date(2020, 0, 1, 12, 0, 0)"] * 2
+    assert cache.encode([one, one], datetime.datetime) == [
+        "Date(2020, 0, 1, 13, 0, 0)"] * 2
+    assert cache.get(one) == "Date(2020, 0, 1, 13, 0, 0)"
+
+def test_date_cache_size():
+    from gviz_data_table.encoder import DateCache
+    cache = DateCache(maxsize=0)
+    cache.get(datetime.date(2012, 1, 1))
+    assert cache.info().size == 0
+    cache.maxsize = 10
+    cache.get(datetime.date(2012, 1, 1))
+    cache.get(datetime.date(2012, 1, 2))
+    cache.maxsize = 1
+    assert cache.info().size == 1
+    assert cache.info().evictions == 1
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 1)
+    with pytest.raises(ValueError):
+        cache.maxsize = -1
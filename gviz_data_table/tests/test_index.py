@@ -0,0 +1,55 @@
+import datetime
+import pytest
+
+from gviz_data_table.index import Descending, SortIndex, date_key, sort_key
+
+
+def test_sort_key():
+    values = [3, None, 1]
+    assert sorted(values, key=sort_key) == [None, 1, 3]
+    assert sorted(values, key=lambda v: Descending(sort_key(v))) == \
+        [3, 1, None]
+
+
+def test_build():
+    index = SortIndex([0, 1], [False, True])
+    index.build([("b", 1), ("a", 1), (None, 5), ("a", 2), ("b", 1)])
+    assert index.positions == [2, 3, 1, 0, 4]
+    assert len(index) == 5
+
+
+def test_insert():
+    rows = [(5, ), (None, ), (2, ), (5, ), (3, ), (None, )]
+    index = SortIndex([0], [False])
+    index.build(rows[:3])
+    for position, values in enumerate(rows[3:], 3):
+        index.insert_all(position, [values])
+    expected = SortIndex([0], [False])
+    expected.build(rows)
+    assert index.positions == expected.positions == [1, 5, 2, 4, 0, 3]
+
+
+def test_date_key():
+    day = datetime.date(2012, 1, 2)
+    rows = [(datetime.datetime(2012, 1, 2, 12), ), (day, ), (None, ),
+            (datetime.datetime(2012, 1, 1, 23), )]
+    index = SortIndex([0], [False], [datetime.date])
+    index.build(rows)
+    assert index.positions == [2, 3, 0, 1]
+    assert sorted(rows, key=lambda r: date_key(r[0]))[1:] == rows[3:] + \
+        rows[:2]
+
+
+@pytest.mark.parametrize("merge_rows", [1, 500])
+def test_insert_all(merge_rows):
+    rows = [(5, "a"), (None, "b"), (2, "c"), (5, "a"), (3, None), (None, "b"),
+            (2, "d"), (5, "a")]
+    index = SortIndex([0, 1], [False, True])
+    index.merge_rows = merge_rows
+    index.build(rows[:3])
+    index.insert_all(3, rows[3:6])
+    index.insert_all(6, rows[6:])
+    expected = SortIndex([0, 1], [False, True])
+    expected.build(rows)
+    assert index.positions == expected.positions
+    assert index.keys == expected.keys
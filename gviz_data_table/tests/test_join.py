@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from gviz_data_table import Table
+
+
+@pytest.fixture
+def sales(storage):
+    schema = [{'id':'id', 'type':int, 'label':'Id'},
+              {'id':'amount', 'type':float}]
+    table = Table(schema, storage=storage)
+    table.extend([[1, 10.0], [2, 20.0], [1, 5.0], [None, 1.0], [4, 2.0]])
+    return table
+
+
+@pytest.fixture
+def names(storage):
+    schema = [{'id':'id', 'type':int}, {'id':'name', 'type':str}]
+    table = Table(schema, storage=storage)
+    table.extend([[1, "one"], [2, ("two", "Two")], [3, "three"],
+                  [None, "none"]])
+    return table
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_inner(sales, names, reverse, values):
+    if reverse:
+        result = names.join(sales, 'id')
+        assert values(result) == [[1, "one", 10.0], [1, "one", 5.0],
+                                  [2, "two", 20.0]]
+    else:
+        result = sales.join(names, 'id')
+        assert values(result) == [[1, 10.0, "one"], [2, 20.0, "two"],
+                                  [1, 5.0, "one"]]
+    assert result.storage == sales.storage
+
+
+def test_left(sales, names, values):
+    result = sales.join(names, 'id', how='left')
+    assert values(result) == [[1, 10.0, "one"], [2, 20.0, "two"],
+                              [1, 5.0, "one"], [None, 1.0, None],
+                              [4, 2.0, None]]
+
+
+@pytest.mark.parametrize("big", [False, True])
+def test_outer(sales, names, big, values):
+    if big:
+        # index the left table
+        names.extend([[idx, "n{0}".format(idx)] for idx in range(10, 20)])
+    result = sales.join(names, 'id', how='outer')
+    rows = values(result)
+    assert rows[:5] == [[1, 10.0, "one"], [2, 20.0, "two"], [1, 5.0, "one"],
+                        [None, 1.0, None], [4, 2.0, None]]
+    assert rows[5:7] == [[3, None, "three"], [None, None, "none"]]
+    assert len(rows) == 7 + (10 if big else 0)
+
+
+def test_schema(sales, names, values):
+    result = sales.join(names, ['id'])
+    assert [(col.id, col.label) for col in result.schema.values()] == \
+        [('id', 'Id'), ('amount', 'amount'), ('name', 'name')]
+    cells = json.loads(result.encode())['rows'][1]['c']
+    assert cells[2] == {'v':"two", 'f':"Two"}
+
+
+def test_several_keys(values):
+    schema = [{'id':'a', 'type':int}, {'id':'b', 'type':str},
+              {'id':'x', 'type':int}]
+    left = Table(schema)
+    left.extend([[1, "a", 1], [1, "b", 2], [2, "a", 3]])
+    right = Table([schema[0], schema[1], {'id':'y', 'type':int}])
+    right.extend([[1, "b", 10], [2, "a", 20], [2, "b", 30]])
+    assert values(left.join(right, ['a', 'b'])) == [[1, "b", 2, 10],
+                                                    [2, "a", 3, 20]]
+
+
+def test_errors(sales, names):
+    with pytest.raises(ValueError):
+        sales.join(names, 'id', how='cross')
+    with pytest.raises(ValueError):
+        sales.join(names, 'name')
+    with pytest.raises(ValueError):
+        sales.join(names, [])
+    with pytest.raises(ValueError):
+        sales.join(sales, 'id')
+    other = Table([{'id':'id', 'type':str}])
+    with pytest.raises(ValueError):
+        sales.join(other, 'id')
+
+
+def test_validation(sales, names):
+    result = sales.join(names, 'id')
+    assert result.validation == 'strict'
+    with pytest.raises(ValueError):
+        result.append(["x", 1.0, "y"])
+
+
+def test_views(sales, names, values):
+    result = sales.view(rows=[0, 1, 2]).join(names.view(columns=['id',
+                                                                 'name']),
+                                             'id', how='outer')
+    assert values(result)[:3] == [[1, 10.0, "one"], [2, 20.0, "two"],
+                                  [1, 5.0, "one"]]
+    assert result.validation == 'strict'
+
+
+def test_sampled(storage):
+    schema = [{'id':'id', 'type':int}, {'id':'x', 'type':int}]
+    left = Table(schema, storage=storage, validation='sampled',
+                 sample_every=7)
+    left.extend([[1, 1], [2, 2]])
+    right = Table([schema[0], {'id':'y', 'type':int}])
+    right.extend([[1, 10]])
+    result = left.join(right, 'id')
+    assert (result.validation, result.sample_every) == ('sampled', 7)
+
+
+@pytest.mark.parametrize("how", ['inner', 'outer'])
+def test_mixed_key_types(storage, how, values):
+    left = Table([{'id':'id', 'type':int}, {'id':'x', 'type':str}],
+                 storage=storage)
+    left.extend([[1, "a"], [2, ("b", "B")]])
+    right = Table([{'id':'id', 'type':float}, {'id':'y', 'type':str}])
+    right.extend([[1.0, "c"], [2.5, "d"]])
+    result = left.join(right, 'id', how=how)
+    assert result.schema['id'].type is float
+    rows = values(result)
+    assert rows[0] == [1.0, "a", "c"]
+    assert isinstance(rows[0][0], float)
+    if how == 'outer':
+        assert rows[1:] == [[2.0, "b", None], [2.5, None, "d"]]
+        assert result.rows[1]['x'].label == "B"
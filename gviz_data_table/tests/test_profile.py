@@ -0,0 +1,64 @@
+import io
+import logging
+import pytest
+
+from gviz_data_table.cell import Cell
+from gviz_data_table.profile import profile
+from gviz_data_table.table import Table
+
+schema = ({'id':'age', 'type':int}, {'id':'name', 'type':str})
+
+
+def test_phases():
+    validate = Cell.validate
+    with profile() as stats:
+        assert Cell.validate is not validate
+        table = Table(schema)
+        table.append((18, ('Bob', 'Bobby')))
+        table.extend([(20, 'Sally')])
+        table.rows[0]['age'].value = 19
+        table.encode()
+    assert Cell.validate is validate
+    assert stats.phases['Cell.validate'].count == 1
+    assert stats.phases['Table.validate'].count == 1
+    assert stats.phases['RowStore.append'].count == 1
+    assert stats.phases['Column.invalid'].count == 2
+    assert stats.phases['serialize.number'].count == 1
+    assert stats.phases['join'].count == 1
+    assert stats.phases['encode'].seconds >= 0
+    assert 'Cell.validate' in stats.report()
+
+def test_calls():
+    table = Table(schema, storage='columnar')
+    table.extend([(18, 'Bob'), (20, 'Sally')])
+    with profile() as stats:
+        encoded = table.encode()
+        table.source(io.StringIO())
+    encode, source = stats.calls
+    assert encode['call'] == 'encode'
+    assert (encode['rows'], encode['cells']) == (2, 4)
+    assert encode['bytes'] == len(encoded)
+    assert source['bytes'] == len(table.source())
+
+def test_nested():
+    table = Table(schema)
+    with profile() as outer:
+        with profile() as inner:
+            table.encode()
+        table.encode()
+    assert len(inner.calls) == 1
+    assert len(outer.calls) == 2
+
+def test_log(caplog):
+    with caplog.at_level(logging.DEBUG, logger="gviz_data_table"):
+        with profile(log=True):
+            Table(schema).encode()
+    assert "encode: 0 rows" in caplog.text
+    assert "phases" in caplog.text
+
+def test_exception_restores():
+    validate = Cell.validate
+    with pytest.raises(ValueError):
+        with profile():
+            Cell(int, "a")
+    assert Cell.validate is validate
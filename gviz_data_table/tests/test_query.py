@@ -0,0 +1,153 @@
+import datetime
+import json
+import pytest
+
+from gviz_data_table.query import QueryError, parse, query, tokenize
+from gviz_data_table.table import Table
+
+
+@pytest.fixture
+def employees():
+    schema = [{'id':'name', 'type':str, 'label':'Name'},
+              {'id':'dept', 'type':str},
+              {'id':'salary', 'type':int},
+              {'id':'hired', 'type':datetime.date}]
+    table = Table(schema)
+    table.extend([
+        ("John", "Eng", 1000, datetime.date(2010, 1, 1)),
+        (("Dave", "Mr Dave"), "Eng", 500, None),
+        ("Sally", "Sales", None, datetime.date(2011, 2, 3)),
+        ("Ben", "Sales", 700, datetime.date(2009, 1, 1)),
+    ])
+    return table
+
+
+def test_tokenize():
+    assert tokenize("select `a b`, 'c' where x >= -1.5") == [
+        ('word', 'select'), ('quoted', 'a b'), ('op', ','), ('string', 'c'),
+        ('word', 'where'), ('word', 'x'), ('op', '>='), ('number', -1.5)]
+    with pytest.raises(QueryError):
+        tokenize("select a; drop")
+
+
+def test_parse():
+    q = parse("SELECT name, sum(salary) GROUP BY name ORDER BY name DESC "
+              "LIMIT 5 OFFSET 2 LABEL name 'Who'")
+    assert [s.id for s in q.select] == ['name', 'sum-salary']
+    assert [c.id for c in q.group_by] == ['name']
+    assert [(s.id, d) for s, d in q.order_by] == [('name', True)]
+    assert (q.limit, q.offset) == (5, 2)
+    assert parse("select *").select is None
+    for text in ("select", "select a limit x", "where a", "select a b",
+                 "pivot a"):
+        with pytest.raises(QueryError):
+            parse(text)
+
+
+def test_select(employees, values):
+    result = employees.query("select salary, name")
+    assert list(result.schema) == ['salary', 'name']
+    assert result.schema['name'].label == "Name"
+    assert values(result)[1] == [500, "Dave"]
+    assert result.rows[1]['name'].label == "Mr Dave"
+    assert employees.query("").encode() == employees.encode()
+
+
+def test_unknown_column(employees):
+    with pytest.raises(QueryError):
+        employees.query("select age")
+    with pytest.raises(QueryError):
+        employees.query("where age > 1")
+
+
+def test_where(employees, values):
+    def names(tq):
+        return [row[0] for row in values(employees.query(tq))]
+    assert names("where salary > 600") == ["John", "Ben"]
+    assert names("where salary != 1000 and not dept = 'Eng'") == ["Ben"]
+    assert names("where salary is null or hired is null") == ["Dave", "Sally"]
+    assert names("where hired is not null and salary <= 700") == ["Ben"]
+    assert names("where hired < date '2010-06-01'") == ["John", "Ben"]
+    assert names("where name contains 'a'") == ["Dave", "Sally"]
+    assert names("where name starts with 'S' or name ends with 'n'") == \
+        ["John", "Sally", "Ben"]
+    assert names("where name matches '.a.e'") == ["Dave"]
+    assert names("where name like '_a%'") == ["Dave", "Sally"]
+    assert names("where name matches 'Ben|Da'") == ["Ben"]
+    assert names("where name like 'J%' or name like '%y'") == \
+        ["John", "Sally"]
+    with pytest.raises(QueryError):
+        employees.query("where name matches '(a'")
+    assert names("where (dept = 'Eng' or dept = 'Sales') and salary < 800") \
+        == ["Dave", "Ben"]
+
+
+def test_order_limit_offset(employees, values):
+    def names(tq):
+        return [row[0] for row in values(employees.query(tq))]
+    assert names("order by salary") == ["Sally", "Dave", "Ben", "John"]
+    assert names("order by salary desc") == ["John", "Ben", "Dave", "Sally"]
+    assert names("order by dept desc, name") == ["Ben", "Sally", "Dave", "John"]
+    assert names("order by name limit 2") == ["Ben", "Dave"]
+    assert names("order by name limit 2 offset 3") == ["Sally"]
+    assert names("offset 1") == ["Dave", "Sally", "Ben"]
+    assert names("select name order by salary desc") == \
+        ["John", "Ben", "Dave", "Sally"]
+    assert values(employees.query("select salary order by name limit 2")) == \
+        [[700], [500]]
+    with pytest.raises(QueryError):
+        employees.query("select name order by max(salary)")
+    with pytest.raises(QueryError):
+        employees.query("select dept, count(name) group by dept "
+                        "order by name")
+
+
+def test_group_by(employees, values):
+    result = employees.query(
+        "select dept, sum(salary), count(salary), avg(salary), max(hired) "
+        "group by dept")
+    assert list(result.schema) == ['dept', 'sum-salary', 'count-salary',
+                                   'avg-salary', 'max-hired']
+    assert result.schema['avg-salary'].type == float
+    assert result.schema['max-hired'].type == datetime.date
+    assert values(result) == [
+        ["Eng", 1500, 2, 750.0, datetime.date(2010, 1, 1)],
+        ["Sales", 700, 1, 700.0, datetime.date(2011, 2, 3)]]
+    result = employees.query("select count(name), min(salary)")
+    assert values(result) == [[4, 500]]
+    result = employees.query("select sum(salary) where salary > 5000")
+    assert values(result) == [[None]]
+
+
+def test_group_by_errors(employees):
+    with pytest.raises(QueryError):
+        employees.query("select name, count(salary) group by dept")
+    with pytest.raises(QueryError):
+        employees.query("select sum(name)")
+    with pytest.raises(QueryError):
+        employees.query("where count(name) > 1")
+
+
+def test_group_order_label(employees, values):
+    result = employees.query(
+        "select dept, sum(salary) group by dept order by sum(salary) desc "
+        "label sum(salary) 'Total', dept 'Department'")
+    assert values(result) == [["Eng", 1500], ["Sales", 700]]
+    assert [col.label for col in result.schema.values()] == \
+        ["Department", "Total"]
+
+
+def test_query_function(employees):
+    result = query(employees, "select name where salary = 500")
+    assert json.loads(result.encode())['rows'] == [
+        {'c': [{'v': "Dave", 'f': "Mr Dave"}]}]
+
+
+def test_columnar(employees, values):
+    schema = [{'id':col.id, 'type':col.type}
+              for col in employees.schema.values()]
+    table = Table(schema, storage='columnar')
+    for row in employees.rows:
+        table.append([(c.value, c.label) for c in row.values()])
+    tq = "select dept, avg(salary) where hired is not null group by dept"
+    assert values(table.query(tq)) == values(employees.query(tq))
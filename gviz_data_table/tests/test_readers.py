@@ -0,0 +1,100 @@
+import datetime
+import io
+import pytest
+
+from gviz_data_table.readers import compile_converters, csv_schema, \
+    infer_csv_type
+from gviz_data_table.table import Table
+
+
+data = u"""name,age,score,active,born,seen,alarm
+Jim,30,1.5,true,1982-03-01,2012-01-02 03:04:05,07:30
+Bob,,2,False,,2012-01-02T03:04:05.25,07:30:15
+"Smith, Jr.",41,,,1970-12-31,,
+"""
+
+
+def test_infer_csv_type():
+    assert infer_csv_type(["1", "", "-2"]) == int
+    assert infer_csv_type(["1", "2.5", "1e3"]) == float
+    assert infer_csv_type(["true", "FALSE"]) == bool
+    assert infer_csv_type(["2012-01-01"]) == datetime.date
+    assert infer_csv_type(["2012-01-01 10:00"]) == datetime.datetime
+    assert infer_csv_type(["10:00:01"]) == datetime.time
+    assert infer_csv_type(["1", "a"]) == str
+    assert infer_csv_type(["", ""]) == str
+
+
+def test_csv_schema():
+    rows = [["1", "a"]]
+    assert csv_schema(["x", "y"], rows) == [{'id':'x', 'type':int},
+                                            {'id':'y', 'type':str}]
+    assert csv_schema(["x", "y"], rows, [float, str])[0]['type'] == float
+    assert csv_schema(["x", "y"], rows, {'y':bool})[1]['type'] == bool
+
+
+def test_converters():
+    schema = [{'id':'x', 'type':int}, {'id':'y', 'type':str}]
+    to_int, to_str = compile_converters(schema)
+    assert to_int(["1", ""]) == [1, None]
+    assert to_str(["", "a"]) == ["", "a"]
+    with pytest.raises(ValueError) as e:
+        to_int(["1", "two"])
+    assert "'two'" in str(e.value)
+
+
+@pytest.mark.parametrize('storage', ['rows', 'columnar'])
+def test_from_csv(storage):
+    table = Table.from_csv(io.StringIO(data), batch_size=2, storage=storage)
+    assert [(col.id, col.type) for col in table.schema.values()] == [
+        ('name', str), ('age', int), ('score', float), ('active', bool),
+        ('born', datetime.date), ('seen', datetime.datetime),
+        ('alarm', datetime.time)]
+    values = [[cell.value for cell in row.values()] for row in table.rows]
+    assert values == [
+        ["Jim", 30, 1.5, True, datetime.date(1982, 3, 1),
+         datetime.datetime(2012, 1, 2, 3, 4, 5), datetime.time(7, 30)],
+        ["Bob", None, 2.0, False, None,
+         datetime.datetime(2012, 1, 2, 3, 4, 5, 250000),
+         datetime.time(7, 30, 15)],
+        ["Smith, Jr.", 41, None, None, datetime.date(1970, 12, 31), None,
+         None],
+    ]
+
+
+def test_from_csv_path(tmpdir):
+    path = tmpdir.join("data.csv")
+    path.write_text(data, encoding='utf-8')
+    table = Table.from_csv(str(path), types={'age':float})
+    assert table.schema['age'].type == float
+    assert table.rows[0]['age'].value == 30.0
+
+
+def test_from_csv_no_header():
+    table = Table.from_csv(io.StringIO(u"1\ta\n2\tb\n"), dialect='excel-tab',
+                           header=False)
+    assert list(table.schema) == ['column1', 'column2']
+    assert table.rows[1]['column1'].value == 2
+
+
+def test_from_csv_sample():
+    text = u"x\n1\n2\nthree\n"
+    with pytest.raises(ValueError):
+        Table.from_csv(io.StringIO(text), sample_size=2)
+    table = Table.from_csv(io.StringIO(text), sample_size=3)
+    assert table.schema['x'].type == str
+
+
+def test_from_csv_invalid_row():
+    with pytest.raises(ValueError) as e:
+        Table.from_csv(io.StringIO(u"x,y\n1,2\n3\n"))
+    assert "Row 3" in str(e.value)
+
+
+def test_from_csv_encodes_like_extend():
+    table = Table.from_csv(io.StringIO(data), storage='columnar')
+    expected = Table([{'id':col.id, 'type':col.type}
+                      for col in table.schema.values()])
+    expected.extend([[cell.value for cell in row.values()]
+                     for row in table.rows])
+    assert table.encode() == expected.encode()
@@ -0,0 +1,242 @@
+import datetime
+import json
+import sys
+import pytest
+from array import array
+
+from gviz_data_table.storage import ColumnData, DictionaryData, cell_dict, \
+    int_code
+
+
+def test_cell_dict():
+    assert cell_dict(1) == {'v':1}
+    assert cell_dict(None) == {}
+    assert cell_dict(0, "Zero", {'foo':'bar'}) == dict(v=0, f="Zero",
+                                                       p={'foo':'bar'})
+
+def test_number_container():
+    data = ColumnData(float)
+    assert isinstance(data.values, array)
+    assert data.values.typecode == 'd'
+    data = ColumnData(int)
+    assert data.values.typecode == int_code
+    data = ColumnData(str)
+    assert data.values == []
+
+def test_nulls():
+    data = ColumnData(int)
+    data.append(1)
+    data.append(None)
+    assert data[0] == 1
+    assert data[1] is None
+    assert data.nulls == set([1])
+
+def test_promote_large_numbers():
+    data = ColumnData(int)
+    data.append(None)
+    data.append(1)
+    data.append(sys.maxsize + 1)
+    assert data.values == [None, 1, sys.maxsize + 1]
+    assert data.nulls == set()
+
+def test_promote_bool():
+    data = ColumnData(int)
+    data.append(True)
+    assert data[0] is True
+
+def test_sparse_labels():
+    data = ColumnData(datetime.date)
+    data.append(datetime.date(2012, 1, 1))
+    data.append(datetime.date(2012, 1, 2), "Monday", {'style':'bold'})
+    assert data.labels == {1:"Monday"}
+    assert data.options == {1:{'style':'bold'}}
+    assert data.parts(0) == (datetime.date(2012, 1, 1), None, None)
+
+def test_extend_numbers():
+    data = ColumnData(int)
+    data.append(None)
+    data.extend([1, None, 2], {1:"None"}, {})
+    assert isinstance(data.values, array)
+    assert data.slice(0, 4) == [None, 1, None, 2]
+    assert data.labels == {2:"None"}
+    data.extend([True, sys.maxsize + 1], {}, {})
+    assert data.values == [None, 1, None, 2, True, sys.maxsize + 1]
+
+def test_extend_overflow():
+    data = ColumnData(int)
+    data.extend([None, 2**64], {}, {})
+    assert data.values == [None, 2**64]
+
+def test_float_keeps_ints():
+    data = ColumnData(float)
+    data.extend([1.5, None], {}, {})
+    assert isinstance(data.values, array)
+    data.extend([2, 2.5], {}, {})
+    data.append(3)
+    assert data.values == [1.5, None, 2, 2.5, 3]
+    assert type(data[2]) is int
+
+def test_truncate():
+    data = ColumnData(int)
+    data.extend([1, None, 3], {0:"One"}, {2:{'a':1}})
+    data.truncate(1)
+    assert data.slice(0, 1) == [1]
+    assert (data.nulls, data.labels, data.options) == (set(), {0:"One"}, {})
+    data = DictionaryData(str)
+    data.extend(["a", "b"], {1:"B"}, {})
+    data.truncate(1)
+    assert data.slice(0, 1) == ["a"]
+    assert data.labels == {}
+
+
+@pytest.mark.parametrize("storage", ['columnar', 'dictionary'])
+def test_extend_aligned(storage):
+    from gviz_data_table.table import Table
+    schema = [{'id':'a', 'type':int}, {'id':'b', 'type':float},
+              {'id':'name', 'type':str}]
+    table = Table(schema, storage=storage, validation='trusted')
+    table.extend([[1, 1, "x"], [2, 2.5, "y"], [3, "oops", "z"]])
+    rows = Table(schema, validation='trusted')
+    rows.extend([[1, 1, "x"], [2, 2.5, "y"], [3, "oops", "z"]])
+    assert table.encode() == rows.encode()
+    if storage == 'dictionary':
+        with pytest.raises(TypeError):
+            table.extend([[4, 4.0, "w"], [5, 5.0, ["unhashable"]]])
+        with pytest.raises(TypeError):
+            table.append([6, 6.0, {}])
+    assert [len(data) for data in table._store.columns] == [3, 3, 3]
+    assert len(table._store) == 3
+    assert table.encode() == rows.encode()
+
+
+def _schema():
+    from gviz_data_table.table import Table
+    return Table([{'id':'age', 'type':int}, {'id':'name', 'type':str}]).schema
+
+def test_lazy_row():
+    from gviz_data_table.storage import Row
+    row = Row(_schema(), (18, 'Bob'))
+    assert list(row) == ['age', 'name']
+    assert len(row) == 2
+    assert 'age' in row
+    assert row._cells is None
+    assert row.parts() == ((18, 'Bob'), None)
+    assert row['age'].value == 18
+    assert row._values is None
+    assert row.parts() == ([18, 'Bob'], None)
+
+def test_row_changes():
+    from gviz_data_table.cell import Cell
+    from gviz_data_table.storage import Row
+    row = Row(_schema(), (18, 'Bob'))
+    row._json = '{}'
+    row['name'].label = 'Bobby'
+    assert row._json is None
+    assert row.parts() == ([18, 'Bob'], [(None, None), ('Bobby', None)])
+    row._json = '{}'
+    row['age'] = Cell(int, 19)
+    assert row._json is None
+    assert row['age']._owner is row
+    assert [c.value for c in row.values()] == [19, 'Bob']
+
+def test_row_dict_methods():
+    from collections import OrderedDict
+    from gviz_data_table.storage import Row
+    row = Row(_schema(), (18, 'Bob'))
+    copy = row.copy()
+    assert isinstance(copy, OrderedDict)
+    assert list(copy) == ['age', 'name']
+    assert copy['age'] is row['age']
+    assert row == copy
+    assert list(reversed(row)) == ['name', 'age']
+    row._json = '{}'
+    key, cell = row.popitem()
+    assert (key, cell.value) == ('name', 'Bob')
+    assert row._json is None
+    assert row.popitem(last=False)[0] == 'age'
+    with pytest.raises(KeyError):
+        row.popitem()
+
+def test_row_compatibility():
+    """
+    Rows replace the ordered dictionaries of earlier versions. They are
+    mappings with the same methods but not dictionaries.
+    """
+    from collections import OrderedDict
+    from gviz_data_table.cell import Cell
+    from gviz_data_table.encoder import Encoder
+    from gviz_data_table.storage import Mapping, MutableMapping, Row
+    row = Row(_schema(), (18, 'Bob'))
+    assert isinstance(row, MutableMapping)
+    assert not isinstance(row, dict)
+    assert json.loads(json.dumps(row, cls=Encoder)) == {
+        'age':{'v':18}, 'name':{'v':'Bob'}}
+    cells = OrderedDict(row)
+    assert dict(row) == cells
+    assert row == cells
+    assert row != OrderedDict(reversed(list(cells.items())))
+    assert row == dict(reversed(list(cells.items())))
+    assert list(row.keys()) == ['age', 'name']
+    assert row.get('height') is None
+    assert row.setdefault('height', Cell(int, 180)).value == 180
+    row.move_to_end('age')
+    assert list(row) == ['name', 'height', 'age']
+    row.move_to_end('age', last=False)
+    assert list(row) == ['age', 'name', 'height']
+    with pytest.raises(KeyError):
+        row.move_to_end('weight')
+    row.update(height=Cell(int, 181))
+    assert row.pop('height').value == 181
+
+def test_dictionary_container():
+    data = DictionaryData(str)
+    data.append("a")
+    data.extend(["b", None, "a"], {1:"missing"}, {})
+    assert data.codes.tolist() == [0, 1, -1, 0]
+    assert data.dictionary == ["a", "b"]
+    assert data.slice(0, 4) == ["a", "b", None, "a"]
+    assert data.parts(2) == (None, "missing", None)
+    assert data[3] == "a"
+
+def test_dictionary_serializer():
+    seen = []
+
+    def func(values):
+        seen.extend(values)
+        return [repr(value) for value in values]
+
+    data = DictionaryData(str)
+    serialize = data.serializer(func)
+    assert serialize(["a", "b", "a"]) == ["'a'", "'b'", "'a'"]
+    assert serialize(["b", None]) == ["'b'", "None"]
+    assert sorted(seen, key=str) == [None, "a", "b"]
+
+def test_dictionary_info():
+    data = DictionaryData(str)
+    data.extend(["value %d" % (i % 10) for i in range(1000)], {}, {})
+    info = data.info()
+    assert (info.size, info.distinct) == (1000, 10)
+    assert info.bytes < info.plain_bytes
+
+def test_options_pool():
+    from gviz_data_table.storage import OptionsPool
+    pool = OptionsPool(maxsize=3)
+    calls = []
+
+    def encode(options):
+        calls.append(options)
+        return json.dumps(options)
+    first = {'style':'color: red'}
+    assert pool.json(first, encode) == '{"style": "color: red"}'
+    assert pool.json({'style':'color: red'}, encode) == \
+        '{"style": "color: red"}'
+    assert len(calls) == 1 and len(pool) == 1
+    first['style'] = 'color: blue'
+    assert pool.json(first, encode) == '{"style": "color: blue"}'
+    assert pool.json({1:'x'}, encode) == '{"1": "x"}'
+    assert pool.json({'1':'x'}, encode) == '{"1": "x"}'
+    assert pool.json({'1':True}, encode) == '{"1": true}'
+    assert pool.json({'1':1}, encode) == '{"1": 1}'
+    assert len(pool) == 3
+    assert pool.json({'a':[1]}, encode) == '{"a": [1]}'
+    assert len(calls) == 7
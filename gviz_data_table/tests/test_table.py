@@ -1,5 +1,8 @@
+import datetime
 import json
+from collections import OrderedDict
 import pytest
+from gviz_data_table.storage import int_code
 from gviz_data_table.table import Table
 
 valid_schema = (
@@ -153,3 +156,506 @@ class DummyGoogleObject(object):
 
     def setResponse(self, arg):
         return arg
+
+
+mixed_schema = (
+    {'id':'age', 'type':int, 'label':'Age'},
+    {'id':'name', 'type':str, 'label':'Name'},
+    {'id':'score', 'type':float},
+    {'id':'born', 'type':datetime.date},
+    {'id':'seen', 'type':datetime.datetime},
+    {'id':'wake', 'type':datetime.time},
+    {'id':'member', 'type':bool},
+)
+
+mixed_rows = [
+    (18, 'Bob', 1.5, datetime.date(1994, 5, 1),
+     datetime.datetime(2012, 1, 31, 12, 30, 45), datetime.time(7, 30), True),
+    ((20, 'twenty'), ('Sally', 'Sal', {'hair':'long'}), None, None, None,
+     None, False),
+    (None, dict(value='Jim', options={'style':'bold'}), 0.1, None, None,
+     datetime.time(0, 0, 1), None),
+]
+
+
+def test_unsupported_storage():
+    with pytest.raises(ValueError):
+        Table(storage='cloud')
+
+def test_columnar_identical():
+    rows = Table(mixed_schema, options={'foo':'bar'})
+    columns = Table(mixed_schema, options={'foo':'bar'}, storage='columnar')
+    rows.extend(mixed_rows)
+    columns.extend(mixed_rows)
+    assert columns.encode() == rows.encode()
+    assert columns.source() == rows.source()
+
+def test_columnar_rows():
+    table = Table(valid_schema, storage='columnar')
+    table.extend([bob, (20, ('Sally', 'Sal'))])
+    assert len(table.rows) == 2
+    row = table.rows[-1]
+    assert row['age'].value == 20
+    assert row['name'].label == 'Sal'
+    assert [r['name'].value for r in table.rows] == ['Bob', 'Sally']
+    with pytest.raises(IndexError):
+        table.rows[2]
+
+def test_columnar_invalid_row():
+    table = Table(valid_schema, storage='columnar')
+    with pytest.raises(ValueError):
+        table.append(('Bob', 18))
+    assert len(table.rows) == 0
+
+def test_iter_encode():
+    table = Table(mixed_schema, options={'foo':'bar'})
+    table.extend(mixed_rows * 3)
+    chunks = list(table.iter_encode(chunk_rows=2))
+    assert len(chunks) == 7
+    assert "".join(chunks) == table.encode()
+    assert json.loads(table.encode())['p'] == {'foo':'bar'}
+
+def test_iter_encode_bytes():
+    table = Table(valid_schema)
+    table.append(bob)
+    chunks = list(table.iter_encode(encoding='ascii'))
+    assert b"".join(chunks) == table.encode().encode('ascii')
+
+def test_dump():
+    import io
+    table = Table(valid_schema)
+    table.extend([bob, sally])
+    fp = io.StringIO()
+    table.dump(fp, chunk_rows=1)
+    assert fp.getvalue() == table.encode()
+
+def test_source_file():
+    import io
+    table = Table(mixed_schema, storage='columnar')
+    table.extend(mixed_rows)
+    fp = io.StringIO()
+    assert table.source(fp, chunk_rows=1) is None
+    assert fp.getvalue() == table.source()
+    assert b"".join(table.iter_source(encoding='ascii')) == \
+        table.source().encode('ascii')
+
+def test_extend_invalid_rows():
+    from gviz_data_table.table import InvalidRows
+    for storage in ('rows', 'columnar'):
+        table = Table(valid_schema, storage=storage)
+        with pytest.raises(InvalidRows) as exc:
+            table.extend([bob, ('18', 'Bob'), sally, (20, 20),
+                          (1, ('Jim', None, 'bold'))])
+        assert exc.value.rows == [1, 3, 4]
+        assert len(table.rows) == 0
+
+def test_extend_invalid_length():
+    from gviz_data_table.table import InvalidRows
+    table = Table(valid_schema)
+    with pytest.raises(InvalidRows) as exc:
+        table.extend([bob, (1, ), sally, (1, 2, 3)])
+    assert exc.value.rows == [1, 3]
+    assert isinstance(exc.value, ValueError)
+
+def test_extend_columns():
+    table = Table(valid_schema)
+    table.extend({'name':['Bob', ('Sally', 'Sal')], 'age':[18, None]})
+    assert table.rows[0]['age'].value == 18
+    assert table.rows[1]['age'].value is None
+    assert table.rows[1]['name'].label == 'Sal'
+    with pytest.raises(ValueError):
+        table.extend({'name':['Bob']})
+    with pytest.raises(ValueError):
+        table.extend({'name':['Bob'], 'age':[]})
+
+def test_extend_matches_append():
+    appended = Table(mixed_schema, storage='columnar')
+    for row in mixed_rows:
+        appended.append(row)
+    for storage in ('rows', 'columnar'):
+        table = Table(mixed_schema, storage=storage)
+        table.extend(mixed_rows[:1])
+        table.extend(mixed_rows[1:])
+        assert table.encode() == appended.encode()
+
+def test_from_columns_buffers():
+    from array import array
+    table = Table.from_columns(OrderedDict([
+        ('count', array('i', [1, 2, 3])),
+        ('mean', array('d', [0.5, 1.5, 2.5])),
+        ('name', ['a', None, 'c']),
+    ]))
+    assert [col.type for col in table.schema.values()] == [int, float, str]
+    assert table.rows[1]['count'].value == 2
+    assert table.rows[2]['mean'].value == 2.5
+    assert table.rows[1]['name'].value is None
+
+def test_from_columns_no_copy():
+    from array import array
+    counts = array(int_code, [1, 2])
+    table = Table.from_columns({'count':counts})
+    counts[0] = 10
+    assert table.rows[0]['count'].value == 10
+    table.append([3])
+    counts[0] = 20
+    assert [r['count'].value for r in table.rows] == [10, 2, 3]
+
+def test_from_columns_invalid():
+    from array import array
+    from gviz_data_table.table import InvalidRows
+    with pytest.raises(ValueError):
+        Table.from_columns({'count':array(int_code, [1]), 'mean':[0.5, 1.5]})
+    with pytest.raises(ValueError):
+        Table.from_columns({'count':array(int_code, [1])}, types={'count':float})
+    with pytest.raises(InvalidRows):
+        Table.from_columns({'mean':[0.5, 1]}, types={'mean':float})
+    with pytest.raises(ValueError):
+        Table.from_columns({'letter':array('u', 'ab')})
+
+def test_from_columns_numpy():
+    np = pytest.importorskip('numpy')
+    days = np.array(['2012-01-31', 'NaT'], dtype='datetime64[D]')
+    times = np.array(['2012-01-31T12:30:45.5', '2012-02-01'],
+                     dtype='datetime64[ns]')
+    table = Table.from_columns(OrderedDict([
+        ('day', days), ('time', times),
+        ('value', np.array([1.5, np.nan])), ('count', np.arange(2)),
+        ('flag', np.array([True, False])),
+    ]))
+    assert [col.type for col in table.schema.values()] == [
+        datetime.date, datetime.datetime, float, int, bool]
+    assert table._store.columns[0].values is days
+    expected = Table(table_schema(table))
+    expected.extend([
+        [datetime.date(2012, 1, 31), datetime.datetime(2012, 1, 31, 12, 30, 45, 500000),
+         1.5, 0, True],
+        [None, datetime.datetime(2012, 2, 1), float('nan'), 1, False],
+    ])
+    assert table.encode() == expected.encode()
+
+
+def table_schema(table):
+    return [dict(id=col.id, type=col.type) for col in table.schema.values()]
+
+def test_cache():
+    table = Table(valid_schema, cache=True)
+    table.append(bob)
+    assert table.cache_info() == (0, 0, 0)
+    first = table.encode()
+    assert table.encode() == first
+    assert table.cache_info() == (1, 1, 1)
+    table.source()
+    table.source()
+    assert table.cache_info() == (2, 2, 2)
+
+def test_cache_invalidation():
+    table = Table(valid_schema, cache=True)
+    table.append(bob)
+
+    def changed(change):
+        before = table.encode()
+        change()
+        assert table.cache_info().size == 0
+        assert table.encode() != before
+
+    changed(lambda: table.append(sally))
+    changed(lambda: table.extend([bob]))
+    changed(lambda: setattr(table, 'options', {'foo':'bar'}))
+    changed(lambda: table.rows.pop())
+    row = table.rows[0]
+    changed(lambda: setattr(row['age'], 'value', 30))
+    changed(lambda: setattr(row['age'], 'label', 'thirty'))
+    changed(lambda: setattr(row['age'], 'options', {'style':'bold'}))
+    changed(table.clear)
+    changed(lambda: table.add_column('size', int))
+
+def test_no_cache():
+    table = Table(valid_schema)
+    table.encode()
+    table.encode()
+    assert table.cache_info() == (0, 0, 0)
+
+def test_cache_streaming():
+    table = Table(valid_schema, cache=True)
+    table.extend([bob, sally])
+    chunks = list(table.iter_encode(chunk_rows=1))
+    assert len(chunks) == 4
+    assert list(table.iter_encode(chunk_rows=1)) == ["".join(chunks)]
+
+def test_append_only():
+    for storage in ('rows', 'columnar'):
+        table = Table(mixed_schema, storage=storage, append_only=True)
+        expected = Table(mixed_schema)
+        for row in mixed_rows:
+            table.append(row)
+            expected.append(row)
+            assert table.encode() == expected.encode()
+        table.extend(mixed_rows)
+        expected.extend(mixed_rows)
+        assert table._store.fragments()[-1] is not None
+        assert table.encode() == expected.encode()
+        assert table.source() == expected.source()
+
+def test_append_only_changes():
+    table = Table(valid_schema, append_only=True)
+    table.extend([bob, sally])
+    fragments = table._store.fragments()
+    table.rows[1]['age'].value = 21
+    assert table._store.fragments() == [fragments[0], None]
+    assert json.loads(table.encode())['rows'][1] == {'c':[{'v':21},
+                                                         {'v':'Sally'}]}
+    assert table._store.fragments()[1] is not None
+
+def test_append_only_from_columns():
+    from array import array
+    table = Table.from_columns({'age':array(int_code, range(5))})
+    table.append_only = True
+    expected = Table([{'id':'age', 'type':int}])
+    expected.extend([[i] for i in range(5)])
+    assert list(table.iter_encode(chunk_rows=2)) == \
+        list(expected.iter_encode(chunk_rows=2))
+
+def test_plain_rows_are_lazy():
+    table = Table(valid_schema)
+    table.append(bob)
+    table.extend([sally, (21, ('Harry', 'Big Man'))])
+    assert table.rows[0]._cells is None
+    assert table.rows[1]._cells is None
+    assert table.rows[2]._cells is not None
+    assert table.rows[1]['name'].value == 'Sally'
+    assert table.rows[1]._cells is not None
+    with pytest.raises(ValueError):
+        table.append(('Bob', 18))
+
+def test_unsupported_validation():
+    with pytest.raises(ValueError):
+        Table(valid_schema, validation='lax')
+    with pytest.raises(ValueError):
+        Table(valid_schema, validation='sampled', sample_every=0)
+
+@pytest.mark.parametrize('storage', ['rows', 'columnar'])
+def test_trusted_validation(storage):
+    table = Table(valid_schema, storage=storage, validation='trusted')
+    table.append(('Bob', 18))
+    table.extend([sally, ('Harry', 21)])
+    assert len(table.rows) == 3
+
+@pytest.mark.parametrize('storage', ['rows', 'columnar'])
+def test_sampled_validation(storage):
+    from gviz_data_table.table import InvalidRows
+    table = Table(valid_schema, storage=storage, validation='sampled',
+                  sample_every=3)
+    with pytest.raises(ValueError):
+        table.append(('Bob', 18))
+    table.append(bob)
+    table.append(('Bob', 18))
+    table.extend([('Sally', 20), sally, sally, ('Sally', 20)])
+    assert len(table.rows) == 6
+    with pytest.raises(InvalidRows) as e:
+        table.extend([('Sally', 20), sally, sally, ('Sally', 20)])
+    assert e.value.rows == [0, 3]
+    with pytest.raises(InvalidRows) as e:
+        table.extend([({'value':20, 'options':1}, 'Sally'), sally])
+    assert e.value.rows == [0]
+
+def test_column_dict():
+    from gviz_data_table.table import column_dict
+    table = Table([{'id':'age', 'type':int, 'options':{'style':['bold']}},
+                   {'id':'name', 'type':str, 'label':'Name'}])
+    age, name = table.schema.values()
+    assert column_dict(name) == dict(id='name', type=str, label='Name',
+                                     options=None)
+    copied = column_dict(age, float)
+    assert copied == dict(id='age', type=float, label=None,
+                          options={'style':['bold']})
+    assert copied['options']['style'] is not age.options['style']
+
+def test_results_copy_options():
+    schema = [{'id':'name', 'type':str, 'options':{'style':['bold']}},
+              {'id':'age', 'type':int}, {'id':'score', 'type':float}]
+    table = Table(schema, options={'colors':['red']})
+    table.extend([("Bob", 18, 1.5), ("Sally", 20, 2.0), ("Bob", 30, 0.5)])
+    for result in [table.query("select name, age"),
+                   table.query("select name, sum(age) group by name"),
+                   table.group_by('name', {'age':'sum'}),
+                   table.pivot('name', 'age', 'age'),
+                   table.join(table.view(columns=['name']), 'name'),
+                   table.downsample('age', 'score', 3)]:
+        assert result.options == table.options
+        result.options['colors'].append('blue')
+        result.schema['name'].options['style'].append('italic')
+    assert table.options == {'colors':['red']}
+    assert table.schema['name'].options == {'style':['bold']}
+
+@pytest.mark.parametrize('append_only', [False, True])
+def test_rows_added_directly(append_only):
+    from gviz_data_table.cell import Cell
+    table = Table(valid_schema, cache=True, append_only=append_only)
+    table.append(bob)
+    other = Table(valid_schema)
+    other.append(sally)
+
+    def cells(age, name):
+        return OrderedDict([('age', Cell(int, age)), ('name', Cell(str, name))])
+
+    table.rows.append(cells(5, 'A'))
+    table.rows.insert(0, cells(6, 'B'))
+    table.rows.extend([cells(7, 'C')])
+    table.rows[1] = cells(8, 'D')
+    table.rows[2:3] = [cells(9, 'E')]
+    table.rows += [other.rows[0]]
+    table.encode()
+    for idx, row in enumerate(table.rows):
+        row['age'].value = idx
+    ages = [row['c'][0]['v'] for row in json.loads(table.encode())['rows']]
+    assert ages == list(range(5))
+    table.rows[0]['age'] = Cell(int, 10)
+    assert json.loads(table.encode())['rows'][0]['c'][0]['v'] == 10
+
+@pytest.mark.parametrize('append_only', [False, True])
+def test_pickle_rows(append_only):
+    import copy
+    import pickle
+    table = Table(valid_schema, cache=True, append_only=append_only)
+    table.extend([bob, (20, ('Sally', 'Sal', {'a':1}))])
+    table.rows[0]['age'].value
+    encoded = table.encode()
+    for loaded in (pickle.loads(pickle.dumps(table, 2)),
+                   copy.deepcopy(table)):
+        assert loaded.encode() == encoded
+        loaded.rows[0]['age'].value = 19
+        assert loaded.rows[0]['age'].value == 19
+        assert loaded.encode() != encoded
+        changed = loaded.encode()
+        del loaded.rows[1]
+        assert loaded.encode() != changed
+    assert table.encode() == encoded
+
+@pytest.mark.parametrize('storage', ['columnar', 'dictionary'])
+def test_pickle_columns(storage):
+    import pickle
+    table = Table(valid_schema, storage=storage)
+    table.extend([bob, (20, ('Sally', 'Sal', {'a':1}))])
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy.encode() == table.encode()
+    copy.append(sally)
+    with pytest.raises(ValueError):
+        copy.append(('Bob', 18))
+    assert len(copy.rows) == 3 and len(table.rows) == 2
+
+def test_dictionary_storage():
+    schema = [{'id':'name', 'type':str}, {'id':'age', 'type':int}]
+    table = Table(schema, storage='dictionary')
+    expected = Table(schema)
+    rows = [("Bob", 18), (("Bob", "Robert"), 20), (None, 21), ("Sally", None)]
+    table.extend(rows)
+    table.append(("Bob", 30))
+    expected.extend(rows)
+    expected.append(("Bob", 30))
+    assert table.encode() == expected.encode()
+    assert table.encode() == expected.encode()
+    assert table.rows[1]['name'].label == "Robert"
+    info = table.dictionary_info()
+    assert list(info) == ['name']
+    assert (info['name'].size, info['name'].distinct) == (5, 2)
+    assert expected.dictionary_info() == {}
+
+@pytest.mark.parametrize('storage', ['rows', 'columnar'])
+def test_shared_options(storage):
+    table = Table(valid_schema, storage=storage)
+    bold = {'style':'bold'}
+    table.append(((18, None, bold), 'Bob'))
+    table.extend([((20, None, {'style':'bold'}), ('Sally', 'S', {'x':1})),
+                  ((21, None, {'style':'bold'}), 'Harry')])
+    cells = [row['age'] for row in table.rows]
+    assert cells[0].options == {'style':'bold'}
+    encoded = json.loads(table.encode())
+    assert len(table._store.pool) == 2
+    assert [row['c'][0]['p'] for row in encoded['rows']] == [bold] * 3
+    if storage == 'rows':
+        assert cells[0].options is bold
+        assert cells[1].options is not bold
+        cells[0].options['style'] = 'italic'
+        encoded = json.loads(table.encode())
+        assert [row['c'][0]['p']['style'] for row in encoded['rows']] == \
+            ['italic', 'bold', 'bold']
+
+@pytest.mark.parametrize('storage', ['rows', 'columnar', 'dictionary'])
+def test_sort(storage):
+    from gviz_data_table.encoder import Encoder
+    table = Table(valid_schema, storage=storage)
+    table.extend([sally, (None, 'Jim'), bob, (18, ('Ann', 'A'))])
+    rows = [[c.value for c in row.values()] for row in table.rows]
+    table.sort('age')
+    names = [row['c'][1]['v'] for row in json.loads(table.encode())['rows']]
+    assert names == ['Jim', 'Bob', 'Ann', 'Sally']
+    assert [[c.value for c in row.values()] for row in table.rows] == rows
+    table.sort(['age', 'name'], descending=[True, False])
+    names = [row['c'][1]['v'] for row in json.loads(table.encode())['rows']]
+    assert names == ['Sally', 'Ann', 'Bob', 'Jim']
+    assert Encoder().encode(table) == table.encode()
+    assert json.loads(json.dumps({'t':table}, cls=Encoder))['t'] == \
+        json.loads(table.encode())
+    table.sort(None)
+    names = [row['c'][1]['v'] for row in json.loads(table.encode())['rows']]
+    assert names == ['Sally', 'Jim', 'Bob', 'Ann']
+
+def test_sort_dates():
+    table = Table([{'id':'day', 'type':datetime.date}])
+    table.extend([[datetime.datetime(2012, 1, 2, 12)],
+                  [datetime.date(2012, 1, 2)], [datetime.date(2012, 1, 1)]])
+    table.sort('day')
+    assert [row['c'][0]['v'] for row in json.loads(table.encode())['rows']] \
+        == ["Date(2012, 0, 1)", "Date(2012, 0, 2, 12, 0, 0)",
+            "Date(2012, 0, 2)"]
+
+def test_sort_errors():
+    table = Table(valid_schema)
+    with pytest.raises(ValueError):
+        table.sort('height')
+    with pytest.raises(ValueError):
+        table.sort(['age', 'name'], descending=[True])
+
+@pytest.mark.parametrize('append_only', [False, True])
+def test_sort_incremental(append_only):
+    table = Table(valid_schema, append_only=append_only)
+    expected = Table(valid_schema)
+    table.sort('age', descending=True)
+    rows = [(21, 'A'), (None, 'B'), (19, 'C'), (21, 'D'), (30, 'E')]
+    table.append(rows[0])
+    table.encode()
+    index = table._indexes[table._sort]
+    table.extend(rows[1:3])
+    table.append(rows[3])
+    table.append(rows[4])
+    assert index.changes == table._changes
+    expected.extend(sorted(rows, key=lambda r: (r[0] is not None, r[0]),
+                           reverse=True))
+    assert table.encode() == expected.encode()
+    table.rows[4]['age'].value = 1
+    assert index.changes != table._changes
+    assert json.loads(table.encode())['rows'][-2]['c'][1]['v'] == 'E'
+
+def test_sort_writers():
+    from gviz_data_table.writers import iter_csv
+    table = Table(valid_schema, storage='columnar')
+    table.extend([sally, bob])
+    table.sort('age')
+    assert "".join(iter_csv(table)).splitlines()[1:] == ['18,Bob', '20,Sally']
+
+
+@pytest.mark.parametrize("storage", ['rows', 'columnar'])
+def test_set_rows(storage):
+    table = Table(mixed_schema, storage=storage)
+    table.extend(mixed_rows)
+    other = Table(mixed_schema, storage=storage)
+    other.append(mixed_rows[0])
+    other.sort('age')
+    other.rows = table.rows
+    table.sort('age')
+    assert other.encode() == table.encode()
+    other.rows = mixed_rows[2:]
+    assert len(other.rows) == 1
+    with pytest.raises(ValueError):
+        other.rows = [("eighteen", ) + mixed_rows[0][1:]]
+    assert len(other.rows) == 1
@@ -0,0 +1,119 @@
+import io
+import json
+
+import pytest
+
+from gviz_data_table import Table, encode
+from gviz_data_table.encoder import Encoder
+from gviz_data_table.view import positions
+
+
+@pytest.fixture
+def table(storage):
+    schema = [{'id':'n', 'type':int}, {'id':'name', 'type':str},
+              {'id':'score', 'type':float}]
+    table = Table(schema, storage=storage)
+    table.extend([[idx, "p{0}".format(idx % 3), idx / 2.0]
+                  for idx in range(10)])
+    table.append([10, ("q", "Q"), None])
+    return table
+
+
+def test_positions():
+    assert positions(None, 3) is None
+    assert list(positions(slice(1, None), 3)) == [1, 2]
+    assert positions([2, 0], 3) == [2, 0]
+    assert positions([True, False, True], 3) == [0, 2]
+    with pytest.raises(ValueError):
+        positions([True, False], 3)
+    with pytest.raises(ValueError):
+        positions([3], 3)
+
+
+def test_positions_numpy():
+    np = pytest.importorskip('numpy')
+    assert positions(np.array([1, 2]), 3) == [1, 2]
+    assert positions(np.array([1, 2, 3]) > 1, 3) == [1, 2]
+
+
+def test_rows(table, values):
+    view = table.view(slice(8, None))
+    assert values(view) == [[8, "p2", 4.0], [9, "p0", 4.5], [10, "q", None]]
+    assert json.loads(view.encode())['rows'][-1]['c'][1] == \
+        {'v':"q", 'f':"Q"}
+    view = table.view([True, False] * 5 + [False])
+    assert [row[0] for row in values(view)] == [0, 2, 4, 6, 8]
+    assert len(view.rows) == 5
+
+
+def test_columns(table, values):
+    view = table.view([10, 1], ['score', 'name'])
+    assert list(view.schema) == ['score', 'name']
+    assert values(view) == [[None, "q"], [0.5, "p1"]]
+    assert list(view.rows[0]) == ['score', 'name']
+    assert view.rows[1]['name'].value == "p1"
+    with pytest.raises(ValueError):
+        table.view(columns=['missing'])
+
+
+def test_view_of_view(table, values):
+    view = table.view(slice(2, None, 2), ['n', 'name']).view([0, 4], 'n')
+    assert values(view) == [[2], [10]]
+
+
+def test_encoders(table):
+    view = table.view(slice(0, 5), ['name', 'n'])
+    assert encode(view) == Encoder().encode(view) == view.encode()
+    assert json.loads(encode(view))['cols'] == [
+        {'id':'name', 'type':'string', 'label':'name'},
+        {'id':'n', 'type':'number', 'label':'n'}]
+
+
+def test_source(table):
+    view = table.view(slice(0, 2), ['n'])
+    fp = io.StringIO()
+    view.source(fp, tqx="reqId:3")
+    assert '"reqId": "3"' in fp.getvalue()
+    fp = io.StringIO()
+    view.dump(fp, out='csv')
+    assert fp.getvalue() == "n\r\n0\r\n1\r\n"
+
+
+def test_sort(table, values):
+    view = table.view(slice(0, 4), ['n'])
+    view.sort('n', descending=True)
+    assert values(view) == [[3], [2], [1], [0]]
+    assert values(table)[0] == [0, "p0", 0.0]
+
+
+def test_changes(table):
+    view = table.view()
+    partial = table.view(slice(0, 2))
+    signature = view.signature()
+    table.append([11, "p2", 5.5])
+    assert len(view.rows) == 12
+    assert len(partial.rows) == 2
+    assert view.signature() != signature
+
+
+def test_rows_replaced(table, values):
+    view = table.view(slice(0, 2), ['name'])
+    picked = table.view([1, 3])
+    table.clear()
+    table.extend([[1, "a", 0.5], [2, "b", 1.0]])
+    assert values(view) == [["a"], ["b"]]
+    table.rows = [[3, "c", 1.5], [4, "d", 2.0], [5, "e", 2.5], [6, "f", 3.0]]
+    assert values(view) == [["c"], ["d"]]
+    assert values(picked) == [[4, "d", 2.0], [6, "f", 3.0]]
+    table.clear()
+    assert values(view) == []
+    with pytest.raises(ValueError):
+        picked.encode()
+
+
+def test_read_only(table):
+    view = table.view(slice(0, 2))
+    for method, args in [('append', ([1, "a", 1.0], )), ('extend', ([], )),
+                         ('add_column', ('x', int)), ('clear', ())]:
+        with pytest.raises(ValueError):
+            getattr(view, method)(*args)
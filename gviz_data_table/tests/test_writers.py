@@ -0,0 +1,114 @@
+import csv
+import datetime
+import io
+import pytest
+
+from gviz_data_table.column import unicode
+from gviz_data_table.table import Table
+from gviz_data_table.writers import formatted_rows, iter_csv, iter_html, \
+    iter_tsv, write
+
+
+schema = [{'id':'name', 'type':str, 'label':'Name'},
+          {'id':'age', 'type':int},
+          {'id':'score', 'type':float},
+          {'id':'active', 'type':bool},
+          {'id':'born', 'type':datetime.date},
+          {'id':'seen', 'type':datetime.datetime},
+          {'id':'alarm', 'type':datetime.time}]
+
+rows = [
+    ["Jim", 30, 1.5, True, datetime.date(1982, 3, 1),
+     datetime.datetime(2012, 1, 2, 3, 4, 5), datetime.time(7, 30)],
+    [("Bob", "Robert, Jr."), (None, "unknown"), None, False, None, None,
+     None],
+]
+
+
+@pytest.fixture(params=['rows', 'columnar'])
+def table(request):
+    table = Table(schema, storage=request.param)
+    table.extend(rows)
+    return table
+
+
+def test_formatted_rows(table):
+    assert list(formatted_rows(table)) == [[
+        ["Jim", "30", "1.5", "true", "1982-03-01", "2012-01-02 03:04:05",
+         "07:30:00"],
+        ["Robert, Jr.", "unknown", "", "false", "", "", ""],
+    ]]
+
+
+def test_csv(table):
+    result = "".join(iter_csv(table, chunk_rows=1))
+    parsed = list(csv.reader(io.StringIO(result)))
+    assert parsed[0] == ["Name", "age", "score", "active", "born", "seen",
+                         "alarm"]
+    assert parsed[2][0] == "Robert, Jr."
+    assert len(parsed) == 3
+
+
+def test_tsv(table):
+    lines = "".join(iter_tsv(table)).splitlines()
+    assert lines[0].split("\t")[:2] == ["Name", "age"]
+    assert lines[1].split("\t")[:3] == ["Jim", "30", "1.5"]
+
+
+def test_html(table):
+    table.extend([[("<b>", "a & b"), None, None, None, None, None, None]])
+    result = "".join(iter_html(table))
+    assert result.startswith("<table><thead><tr><th>Name</th><th>age</th>")
+    assert "<tr><td>Jim</td><td>30</td>" in result
+    assert "<td>a &amp; b</td>" in result
+    assert result.endswith("</tbody></table>")
+
+
+def test_labels_not_strings(table):
+    table.extend([[("x", 5), (1, 1.5), None, None, None, None, None]])
+    assert list(formatted_rows(table))[0][2][:2] == ["5", "1.5"]
+    assert "<td>5</td><td>1.5</td>" in "".join(iter_html(table))
+    assert "".join(iter_csv(table)).splitlines()[3].startswith("5,1.5,")
+
+
+def test_csv_text():
+    table = Table([{'id':'name', 'type':unicode}, {'id':'age', 'type':int}])
+    table.extend([[u"caf\xe9", 1], [u"na\xefve", None]])
+    chunks = list(iter_csv(table, chunk_rows=1))
+    assert all(isinstance(chunk, unicode) for chunk in chunks)
+    assert u"".join(chunks).splitlines() == [
+        u"name,age", u"caf\xe9,1", u"na\xefve,"]
+
+
+def test_rows_not_matching_schema():
+    table = Table(schema)
+    table.extend(rows)
+    del table.rows[0]['age']
+    table.rows[1]['extra'] = table.rows[1]['age']
+    result = list(formatted_rows(table))[0]
+    assert result[0][:3] == ["Jim", "", "1.5"]
+    assert result[1][:2] == ["Robert, Jr.", "unknown"]
+    assert len(result[1]) == len(schema)
+
+
+def test_chunks(table):
+    assert len(list(iter_csv(table, chunk_rows=1))) == 2
+    assert len(list(iter_html(table, chunk_rows=1))) == 4
+
+
+def test_write(table):
+    fp = io.StringIO()
+    write(table, fp, 'html')
+    assert fp.getvalue() == "".join(iter_html(table))
+    fp = io.StringIO()
+    table.dump(fp, out='csv')
+    assert fp.getvalue() == "".join(iter_csv(table))
+    with pytest.raises(ValueError):
+        write(table, fp, 'pdf')
+
+
+def test_source_output(table):
+    assert table.source(tqx="out:csv") == "".join(iter_csv(table))
+    assert table.source(tqx={'out':'tsv-excel'}) == "".join(iter_tsv(table))
+    assert b"".join(table.iter_source(encoding='utf-16-le', tqx="out:html")) \
+        .decode('utf-16-le') == "".join(iter_html(table))
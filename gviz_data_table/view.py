@@ -0,0 +1,203 @@
+"""
+Views of tables.
+
+A view selects rows and columns of a table without copying them. Views are
+read-only tables and can be encoded, written and used as data sources like
+any other table. They see changes to the cells of their table and to its
+rows when it is cleared or its rows are replaced.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+from .column import basestring, compile_validators
+from .storage import cell_dict
+from .table import Table
+
+
+def positions(rows, size):
+    """
+    Row positions from a slice, a sequence of positions or a sequence of
+    booleans of the same length as the table. Slices are ranges.
+    """
+    if rows is None:
+        return None
+    if isinstance(rows, slice):
+        return range(*rows.indices(size))
+    dtype = getattr(rows, 'dtype', None)
+    if dtype is not None:
+        rows = rows.nonzero()[0] if dtype.kind == 'b' else rows
+        rows = rows.tolist()
+    rows = list(rows)
+    if rows and all(isinstance(row, bool) for row in rows):
+        if len(rows) != size:
+            raise ValueError("Masks must have a value for every row")
+        return [idx for idx, selected in enumerate(rows) if selected]
+    for idx in rows:
+        if not 0 <= idx < size:
+            raise ValueError("Row {0} not in table".format(idx))
+    return rows
+
+
+class ViewStore(object):
+    """
+    Read-only store of the `selected` rows, see `positions`, and the columns
+    at `columns` of the store of a table. All rows or all columns are
+    selected if these are None.
+
+    The store is looked up on the table when it is used, so views follow
+    tables which are cleared or whose rows are replaced. Slices are applied
+    to the new rows, positions must still be in the table.
+    """
+
+    def __init__(self, table, selected=None, columns=None):
+        self.table = table
+        self.columns = columns
+        self._source = table._store
+        self._positions = positions(selected, len(table._store))
+        if not isinstance(selected, slice):
+            selected = self._positions
+        self.selected = selected
+
+    @property
+    def store(self):
+        return self.table._store
+
+    @property
+    def pool(self):
+        return self.table._store.pool
+
+    @property
+    def positions(self):
+        store = self.table._store
+        if store is not self._source:
+            self._positions = positions(self.selected, len(store))
+            self._source = store
+        return self._positions
+
+    def __len__(self):
+        if self.positions is None:
+            return len(self.store)
+        return len(self.positions)
+
+    def _select(self, columns):
+        if self.columns is None:
+            return columns
+        return [columns[idx] for idx in self.columns]
+
+    def iter_chunks(self, size=1000, offset=0, positions=None, misfits=None):
+        """
+        Chunks of rows as for the store, see `ColumnStore.iter_chunks`.
+        Rows which do not match the schema are read by column id and left
+        out of `misfits`.
+        """
+        if positions is None:
+            positions = self.positions
+        elif self.positions is not None:
+            positions = [self.positions[idx] for idx in positions]
+        chunks = self.store.iter_chunks(size, offset, positions)
+        for length, columns, extras in chunks:
+            yield length, self._select(columns), dict(
+                (idx, self._select(parts)) for idx, parts in extras.items())
+
+    def serializers(self, funcs):
+        """Serializers for each column given those for their types"""
+        if self.columns is None:
+            return self.store.serializers(funcs)
+        if not self.columns:
+            return []
+        full = [None] * (max(self.columns) + 1)
+        for idx, func in zip(self.columns, funcs):
+            full[idx] = func
+        return self._select(self.store.serializers(full))
+
+    def encodable(self):
+        """Rows as dictionaries for JSON encoding"""
+        for length, columns, extras in self.iter_chunks():
+            rows = zip(*columns) if columns else [()] * length
+            for idx, values in enumerate(rows):
+                parts = extras.get(idx) or [(None, None)] * len(values)
+                yield {"c":[cell_dict(value, *part)
+                            for value, part in zip(values, parts)]}
+
+    @property
+    def rows(self):
+        return ViewRows(self)
+
+
+class ViewRows(object):
+    """
+    Read-only sequence of the rows of a view. Rows are mappings of the
+    selected column ids to the cells of the table.
+    """
+
+    def __init__(self, view):
+        self.view = view
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        view = self.view
+        if idx < 0:
+            idx += len(self)
+        position = idx if view.positions is None else view.positions[idx]
+        row = view.store.rows[position]
+        if view.columns is None:
+            return row
+        ids = list(row.keys())
+        return OrderedDict((ids[col], row[ids[col]]) for col in view.columns)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+class TableView(Table):
+    """
+    Rows and columns of a table. `rows` is a slice, a sequence of row
+    positions or a sequence of booleans with one for every row, `columns`
+    a sequence of column ids. Rows are positions in the order rows were
+    added to the table.
+
+    Views share the storage of their table. Views of slices are created in
+    constant time, others in time proportional to the number of rows
+    given.
+    """
+
+    def __init__(self, table, rows=None, columns=None):
+        ids = list(table.schema)
+        if isinstance(columns, basestring):
+            columns = [columns]
+        if columns is not None:
+            for key in columns:
+                if key not in table.schema:
+                    raise ValueError("Unknown column '{0}'".format(key))
+            columns = [ids.index(key) for key in columns]
+            ids = [ids[idx] for idx in columns]
+        self.table = table
+        self._view_changes = 0
+        self._setup(table.storage, table.validation, table.sample_every)
+        self.schema.update((key, table.schema[key]) for key in ids)
+        self._validators = compile_validators(self.schema)
+        self._store = ViewStore(table, rows, columns)
+
+    @property
+    def _changes(self):
+        return self.table._changes + self._view_changes
+
+    @_changes.setter
+    def _changes(self, value):
+        self._view_changes = value - self.table._changes
+
+    @property
+    def options(self):
+        return self.table.options
+
+    def _read_only(self, *args, **kwargs):
+        raise ValueError("Table views are read-only")
+
+    append = extend = add_column = clear = _read_only
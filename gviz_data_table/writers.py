@@ -0,0 +1,150 @@
+"""
+CSV, TSV and HTML output.
+
+Headers are column labels and cells are their formatted values, the cell
+label if it has one. Rows are written in chunks as they are read from the
+table.
+"""
+import csv
+import io
+import sys
+
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
+
+from .column import basestring, unicode, valid_types
+
+
+def _plain(value):
+    return u"{0}".format(value)
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return _plain(value)
+
+
+def _boolean(value):
+    return u"true" if value else u"false"
+
+
+def _date(value):
+    return value.strftime("%Y-%m-%d")
+
+
+def _datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _time(value):
+    return value.strftime("%H:%M:%S")
+
+
+def _label(value):
+    if isinstance(value, basestring):
+        return value
+    return _plain(value)
+
+
+formatters = {'number':_number, 'string':_plain, 'boolean':_boolean,
+              'date':_date, 'datetime':_datetime, 'timeofday':_time}
+
+
+def compile_formatters(schema):
+    """One function per column formatting its values for display"""
+    return [formatters[valid_types[col.type]] for col in schema.values()]
+
+
+def formatted_rows(table, chunk_rows=1000):
+    """
+    Lists of rows of formatted values in chunks of `chunk_rows` rows.
+    Missing values are empty strings and labels which are not strings are
+    formatted as text.
+    """
+    funcs = compile_formatters(table.schema)
+    chunks = table._store.iter_chunks(chunk_rows, 0, table._order())
+    for length, columns, extras in chunks:
+        cells = [[u"" if v is None else f(v) for v in values]
+                 for f, values in zip(funcs, columns)]
+        rows = [list(row) for row in zip(*cells)]
+        if not cells:
+            rows = [[] for _ in range(length)]
+        for idx, parts in extras.items():
+            for col, (label, options) in enumerate(parts):
+                if label is not None:
+                    rows[idx][col] = _label(label)
+        yield rows
+
+
+def headers(table):
+    return [col.label for col in table.schema.values()]
+
+
+if sys.version_info < (3, ):
+    # the Python 2 csv module writes UTF-8 encoded bytes
+    _csv_buffer = io.BytesIO
+
+    def _csv_rows(rows):
+        return [[v.encode('utf-8') if isinstance(v, unicode) else v
+                 for v in row] for row in rows]
+
+    def _csv_text(data):
+        return data.decode('utf-8')
+else:
+    _csv_buffer = io.StringIO
+
+    def _csv_rows(rows):
+        return rows
+
+    def _csv_text(data):
+        return data
+
+
+def iter_csv(table, chunk_rows=1000, dialect='excel'):
+    """Encode a table as CSV in chunks of `chunk_rows` rows"""
+    buf = _csv_buffer()
+    writer = csv.writer(buf, dialect)
+    writer.writerows(_csv_rows([headers(table)]))
+    for rows in formatted_rows(table, chunk_rows):
+        writer.writerows(_csv_rows(rows))
+        yield _csv_text(buf.getvalue())
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield _csv_text(buf.getvalue())
+
+
+def iter_tsv(table, chunk_rows=1000):
+    """
+    Encode a table as tab separated values for Excel in chunks of
+    `chunk_rows` rows. Chunks are text, like those of `iter_csv`; encoding
+    them is left to the caller.
+    """
+    return iter_csv(table, chunk_rows, 'excel-tab')
+
+
+def _html_row(tag, values):
+    return u"<tr>%s</tr>" % u"".join(
+        u"<{0}>{1}</{0}>".format(tag, escape(value)) for value in values)
+
+
+def iter_html(table, chunk_rows=1000):
+    """Encode a table as an HTML table in chunks of `chunk_rows` rows"""
+    yield u"<table><thead>%s</thead><tbody>" % _html_row("th", headers(table))
+    for rows in formatted_rows(table, chunk_rows):
+        yield u"".join(_html_row("td", row) for row in rows)
+    yield u"</tbody></table>"
+
+
+writers = {'csv':iter_csv, 'tsv-excel':iter_tsv, 'html':iter_html}
+
+
+def write(table, fp, out='csv', chunk_rows=1000):
+    """Write a table to a file-like object as csv, tsv-excel or html"""
+    if out not in writers:
+        raise ValueError("{0} output not supported".format(out))
+    for chunk in writers[out](table, chunk_rows):
+        fp.write(chunk)